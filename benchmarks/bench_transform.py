@@ -0,0 +1,115 @@
+"""
+Benchmark: row-wise notebook transform vs the vectorized etl.transform steps.
+
+Tiles data/incremental_data.csv up to the requested size (with fresh listing
+IDs), runs both versions of each step, checks the outputs are identical and
+prints the timings.
+
+Usage:
+    python benchmarks/bench_transform.py --scale 1 10 50
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from etl import transform  # noqa: E402
+
+SOURCE = 'data/incremental_data.csv'
+
+
+# ========== ROW-WISE (NOTEBOOK) VERSIONS ==========
+
+def legacy_impute_price(df):
+    price = df.groupby(['room_type', 'neighbourhood'])['price'].transform(
+        lambda x: x.fillna(x.median())
+    )
+    if price.isnull().sum() > 0:
+        price = price.fillna(price.median())
+    return price
+
+
+def legacy_fill_names(df):
+    return df.apply(
+        lambda row: f"Listing {row['id']}" if pd.isnull(row['name']) else row['name'],
+        axis=1
+    )
+
+
+def legacy_review_activity(df):
+    return df['reviews_per_month'].apply(
+        lambda x: 'High' if x >= 2 else ('Medium' if x >= 0.5 else 'Low')
+    )
+
+
+def legacy_host_experience(df):
+    return df['calculated_host_listings_count'].apply(
+        lambda x: 'Professional' if x >= 10 else ('Experienced' if x >= 3 else 'Beginner')
+    )
+
+
+STEPS = [
+    ('impute_price', legacy_impute_price, transform.impute_price),
+    ('fill_names', legacy_fill_names, transform.fill_names),
+    ('review_activity', legacy_review_activity, lambda df: transform.label_column(df, 'review_activity')),
+    ('host_experience', legacy_host_experience, lambda df: transform.label_column(df, 'host_experience')),
+]
+
+
+def scale_up(df, factor):
+    """`factor` copies of `df`; every copy after the first gets new sequential IDs"""
+    copies = [df]
+    for i in range(1, factor):
+        copy = df.copy()
+        copy['id'] = np.arange(i * len(df), (i + 1) * len(df))
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run(df):
+    """Time both versions of every step on `df`; returns one row per step"""
+    rows = []
+    for name, legacy, vectorized in STEPS:
+        expected, legacy_seconds = timed(legacy, df)
+        result, vector_seconds = timed(vectorized, df)
+        pd.testing.assert_series_equal(
+            result.astype(object), expected.astype(object), check_names=False
+        )
+        rows.append({
+            'step': name,
+            'rows': len(df),
+            'row_wise_s': round(legacy_seconds, 4),
+            'vectorized_s': round(vector_seconds, 4),
+            'speedup': round(legacy_seconds / vector_seconds, 1) if vector_seconds else float('inf'),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--source', default=SOURCE, help='CSV of validated listings to tile')
+    parser.add_argument('--scale', type=int, nargs='+', default=[1, 10], help='Copies of the source data')
+    args = parser.parse_args()
+
+    source = transform.filter_columns(pd.read_csv(args.source))
+    results = []
+    for factor in args.scale:
+        results.extend(run(scale_up(source, factor)))
+
+    print(pd.DataFrame(results).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
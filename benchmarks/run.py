@@ -0,0 +1,231 @@
+"""
+Benchmark harness for the ETL and dashboard hot paths.
+
+For each requested row count, generates synthetic listings (see
+synthetic.py), then times and memory-profiles every stage:
+- extract: concat + drop_duplicates merge vs the upsert store
+- transform: filter, clean, standardize, enrich, categorize, the
+  star-schema tables and the review-month partitions
+- dashboard: snapshot write, load_data(), filter index build and sidebar
+  filtering (also with a review date range), cube, host dimension and sampler builds, and every section's
+  aggregation; the same filtering and sections again on the SQLite backend
+
+Each stage reports the best of `--repeat` wall-clock runs and the peak
+memory traced by tracemalloc during one extra run. Results are written as
+JSON (stdout by default) with a summary table on stderr.
+
+Usage:
+    python benchmarks/run.py --rows 10000 100000 --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dashboard.cube import ListingCube  # noqa: E402
+from dashboard.data import load_frame  # noqa: E402
+from dashboard.filters import FilterIndex  # noqa: E402
+from dashboard.hosts import HostIndex  # noqa: E402
+from dashboard.sampling import StratifiedSampler  # noqa: E402
+from dashboard.sections import SECTIONS  # noqa: E402
+from dashboard.selection import Selection  # noqa: E402
+from dashboard.spatial import SpatialGrid  # noqa: E402
+from dashboard.sql import SQLBackend  # noqa: E402
+from etl import transform  # noqa: E402
+from etl.partitions import write_partitions  # noqa: E402
+from etl.schema import apply_schema  # noqa: E402
+from etl.star import build_star  # noqa: E402
+from etl.storage import write_snapshot  # noqa: E402
+from etl.upsert import ListingStore  # noqa: E402
+from synthetic import SOURCE, ListingProfile, generate_batches  # noqa: E402
+
+# A typical sidebar state: one borough, one room type, a price window
+SELECTIONS = {
+    'neighbourhood_group': 'Brooklyn',
+    'room_type': 'Entire Home/Apt',
+    'host_experience': 'All',
+}
+PRICE_RANGE = (50.0, 500.0)
+# Review date filter: the last REVIEW_DAYS days of the data
+REVIEW_DAYS = 90
+
+
+def measure(stage, func, rows, repeat):
+    """Best-of-`repeat` seconds and traced peak MB for `func()`; returns (result, record)"""
+    seconds = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        seconds.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, {
+        'stage': stage,
+        'rows': rows,
+        'seconds': round(min(seconds), 6),
+        'mean_seconds': round(float(np.mean(seconds)), 6),
+        'peak_mb': round(peak / 1024**2, 3),
+    }
+
+
+def run_scale(profile, n_rows, repeat, seed):
+    """Every stage at one row count; returns the stage records"""
+    records = []
+
+    def step(stage, func, rows=n_rows):
+        result, record = measure(stage, func, rows, repeat)
+        records.append(record)
+        return result
+
+    raw, incremental = generate_batches(profile, n_rows, seed=seed)
+
+    # ---- Extract ----
+    validated = step('extract.merge_concat', lambda: pd.concat(
+        [raw, incremental], ignore_index=True
+    ).drop_duplicates(subset=['id'], keep='last'))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def upsert_batches():
+            store = ListingStore(tempfile.mkdtemp(dir=tmp))
+            store.upsert(raw)
+            return store.upsert(incremental)
+
+        def upsert_increment():
+            # Store already holding the raw data: only the delta is applied
+            path = os.path.join(tmp, 'prepared')
+            if not os.path.exists(path):
+                ListingStore(path).upsert(raw)
+            copy = tempfile.mkdtemp(dir=tmp)
+            for name in os.listdir(path):
+                # Segments are never rewritten, so they can be shared; the index
+                # and its delta files are
+                if name.startswith('index'):
+                    shutil.copy(os.path.join(path, name), copy)
+                else:
+                    os.link(os.path.join(path, name), os.path.join(copy, name))
+            return ListingStore(copy).upsert(incremental)
+
+        step('extract.upsert_full', upsert_batches)
+        step('extract.upsert_increment', upsert_increment, rows=len(incremental))
+
+    rows = len(validated)
+
+    # ---- Transform ----
+    now = pd.Timestamp.now()
+    df = step('transform.filter', lambda: transform.filter_columns(validated), rows)
+    df = step('transform.clean', lambda: transform.clean(df), rows)
+    df = step('transform.standardize', lambda: transform.standardize(df), rows)
+    df = step('transform.enrich', lambda: transform.enrich(df, now=now), rows)
+    df = step('transform.categorize', lambda: transform.categorize(df), rows)
+    df = step('transform.compact_schema', lambda: apply_schema(df), rows)
+    step('transform.star_schema', lambda: build_star(df), rows)
+
+    # ---- Dashboard ----
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = os.path.join(tmp, 'transformed_full.parquet')
+        step('dashboard.write_snapshot', lambda: write_snapshot(df, snapshot), rows)
+        step('transform.partitions', lambda: write_partitions(df, os.path.join(tmp, 'partitions')), rows)
+        data = step('dashboard.load_data', lambda: load_frame(snapshot, os.path.join(tmp, 'missing.csv')), rows)
+
+    filter_index = step('dashboard.filter_index', lambda: FilterIndex(data), rows)
+    filtered = step('dashboard.filter', lambda: Selection(data, filter_index.select(SELECTIONS, PRICE_RANGE)), rows)
+    if filter_index.n_reviewed:
+        end = pd.Timestamp(filter_index.review_max)
+        review_range = ((end - pd.Timedelta(days=REVIEW_DAYS)).date(), end.date())
+        step('dashboard.review_filter', lambda: filter_index.select(SELECTIONS, PRICE_RANGE, review_range), rows)
+    cube = step('dashboard.cube', lambda: ListingCube(data, filter_index=filter_index), rows)
+    step('dashboard.cube_slice', lambda: cube.slice(SELECTIONS, PRICE_RANGE), rows)
+    grid = step('dashboard.spatial_grid', lambda: SpatialGrid(data), rows)
+    host_index = step('dashboard.host_index', lambda: HostIndex(data), rows)
+    sampler = step('dashboard.sampler', lambda: StratifiedSampler(data), rows)
+
+    # Same per-section options as the app passes
+    options = {
+        'kpis': {'host_index': host_index},
+        'geographic': {'grid': grid, 'zoom': 10},
+        'hosts': {'host_index': host_index},
+        'reviews': {'sampler': sampler},
+        'trends': {'sampler': sampler},
+    }
+
+    # A fresh cube slice per call: slices memoize their reductions
+    for name, section in SECTIONS.items():
+        func = lambda section=section, name=name: section(  # noqa: E731
+            filtered, cube.slice(SELECTIONS, PRICE_RANGE), **options.get(name, {})
+        )
+        step(f'dashboard.section.{name}', func, len(filtered))
+
+    # ---- Dashboard, SQLite backend ----
+    with tempfile.TemporaryDirectory() as tmp:
+        # A fresh directory per call, otherwise the database is just reopened
+        sql = step('dashboard.sql_backend', lambda: SQLBackend(data, token='bench', directory=tempfile.mkdtemp(dir=tmp)), rows)
+        step('dashboard.sql_filter', lambda: Selection(data, sql.select(SELECTIONS, PRICE_RANGE)), rows)
+        for name, section in SECTIONS.items():
+            func = lambda section=section, name=name: section(  # noqa: E731
+                filtered, sql.slice(SELECTIONS, PRICE_RANGE), **options.get(name, {})
+            )
+            step(f'dashboard.sql_section.{name}', func, len(filtered))
+        sql.close()
+
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ETL and dashboard hot paths")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000], help='Synthetic listings per run')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per stage (best is reported)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--source', default=SOURCE, help='Listings CSV the generator is fitted to')
+    parser.add_argument('--output', default=None, help='JSON file to write (default: stdout)')
+    args = parser.parse_args()
+
+    profile = ListingProfile.from_csv(args.source)
+    results = []
+    for n_rows in args.rows:
+        print(f"Running {n_rows:,} rows...", file=sys.stderr)
+        results.extend(run_scale(profile, n_rows, args.repeat, args.seed))
+
+    report = {
+        'meta': {
+            'created': pd.Timestamp.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'rows': args.rows,
+            'repeat': args.repeat,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+
+    print(pd.DataFrame(results).to_string(index=False), file=sys.stderr)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
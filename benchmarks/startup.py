@@ -0,0 +1,138 @@
+"""
+Dashboard cold-start benchmark.
+
+Every measurement runs in a fresh Python process (with Streamlit already
+imported, as under `streamlit run`) and times the phases before the first
+paint:
+- imports: the dashboard modules dashboardapp.py imports
+- load: first dataset version plus the sidebar filter index, either cold
+  (Parquet snapshot + compact schema + index build) or from the warm
+  snapshot (see dashboard/warm.py)
+- first_section: computing the first chart section, which is where
+  plotly.express is imported now that it is loaded lazily
+
+The data is a synthetic snapshot of `--rows` listings (see synthetic.py).
+Reports the median over `--repeat` processes as JSON.
+
+Usage:
+    python benchmarks/startup.py --rows 100000 --repeat 5 --output startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dashboard.warm import build as build_warm  # noqa: E402
+from etl import transform  # noqa: E402
+from etl.schema import apply_schema  # noqa: E402
+from etl.storage import write_snapshot  # noqa: E402
+from synthetic import SOURCE, ListingProfile  # noqa: E402
+
+# Runs in the child process; prints one JSON object of phase timings
+PROBE = """
+import json, sys, time
+import streamlit
+sys.path.insert(0, {root!r})
+timings = {{}}
+
+started = time.perf_counter()
+import pandas
+from dashboard.cache import ResultsCache, filter_key
+from dashboard.export import EXPORT_FORMATS, export
+from dashboard.perf import PerfMonitor
+from dashboard.refresh import LiveDataset
+from dashboard.sections import SECTIONS
+from dashboard.selection import Selection
+timings['imports'] = time.perf_counter() - started
+
+started = time.perf_counter()
+dataset = LiveDataset({snapshot!r}, {csv!r}, poll_seconds=0, warm_path={warm!r}).current()
+filter_index = dataset.filter_index
+timings['load'] = time.perf_counter() - started
+
+started = time.perf_counter()
+SECTIONS['pricing'](Selection(dataset.df), dataset.cube.slice({{}}))
+timings['first_section'] = time.perf_counter() - started
+
+print(json.dumps(timings))
+"""
+
+
+def probe(snapshot, csv, warm):
+    """Phase timings (seconds) from one fresh interpreter"""
+    code = PROBE.format(root=ROOT, snapshot=snapshot, csv=csv, warm=warm)
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure dashboard cold-start time")
+    parser.add_argument('--rows', type=int, default=100_000, help='Synthetic listings in the snapshot')
+    parser.add_argument('--repeat', type=int, default=5, help='Fresh processes per mode (median is reported)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--source', default=SOURCE, help='Listings CSV the generator is fitted to')
+    parser.add_argument('--output', default=None, help='JSON file to write (default: stdout)')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = os.path.join(tmp, 'transformed_full.parquet')
+        csv = os.path.join(tmp, 'missing.csv')
+        warm = os.path.join(tmp, 'dashboard_warm.pickle')
+
+        raw = ListingProfile.from_csv(args.source).generate(args.rows, seed=args.seed)
+        write_snapshot(apply_schema(transform.transform(raw, now=pd.Timestamp.now())), snapshot)
+        build_warm(snapshot, csv, warm)
+
+        for mode, warm_path in [('cold', ''), ('warm', warm)]:
+            print(f"Measuring {mode} start ({args.repeat} processes)...", file=sys.stderr)
+            runs = [probe(snapshot, csv, warm_path) for _ in range(args.repeat)]
+            for phase in runs[0]:
+                results.append({
+                    'mode': mode,
+                    'phase': phase,
+                    'rows': args.rows,
+                    'seconds': round(float(np.median([run[phase] for run in runs])), 4),
+                })
+            results.append({
+                'mode': mode,
+                'phase': 'total',
+                'rows': args.rows,
+                'seconds': round(float(np.median([sum(run.values()) for run in runs])), 4),
+            })
+
+    report = {
+        'meta': {
+            'created': pd.Timestamp.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'rows': args.rows,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+
+    print(pd.DataFrame(results).pivot(index='phase', columns='mode', values='seconds').to_string(), file=sys.stderr)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Synthetic Airbnb listings at any scale.
+
+Generates rows with the schema of data/incremental_data.csv and
+distributions fitted to it:
+- neighbourhoods (and their boroughs) in their observed proportions
+- room types conditional on the borough
+- coordinates scattered around each neighbourhood's centre and clipped to
+  the observed latitude/longitude range
+- log-normal prices per room type, clipped to the observed range, with
+  the observed share of missing prices
+- review columns (count, last review, per month, last 12 months) resampled
+  together from real rows so they stay consistent
+- minimum nights, availability and host listing counts resampled from
+  their observed values
+
+Names and host names are drawn from the source rows, and every listing gets
+a unique id.
+"""
+
+import numpy as np
+import pandas as pd
+
+SOURCE = 'data/incremental_data.csv'
+
+REVIEW_COLUMNS = ['number_of_reviews', 'last_review', 'reviews_per_month', 'number_of_reviews_ltm']
+RESAMPLED_COLUMNS = ['minimum_nights', 'availability_365', 'calculated_host_listings_count']
+
+
+class ListingProfile:
+    """Distributions fitted to a listings sample"""
+
+    def __init__(self, source):
+        self.columns = list(source.columns)
+        self.source = source.reset_index(drop=True)
+
+        self.neighbourhoods = source.groupby(['neighbourhood_group', 'neighbourhood']).size()
+        self.neighbourhood_p = (self.neighbourhoods / self.neighbourhoods.sum()).to_numpy()
+        self.room_types = {
+            group: rooms.value_counts(normalize=True)
+            for group, rooms in source.groupby('neighbourhood_group')['room_type']
+        }
+
+        centres = source.groupby('neighbourhood')[['latitude', 'longitude']]
+        self.centres = centres.mean()
+        # Single-listing neighbourhoods get the median spread
+        spread = centres.std()
+        self.spread = spread.fillna(spread.median()).clip(lower=1e-3)
+        self.lat_range = (source['latitude'].min(), source['latitude'].max())
+        self.lon_range = (source['longitude'].min(), source['longitude'].max())
+
+        log_price = np.log(source['price'].where(source['price'] > 0))
+        self.price_params = log_price.groupby(source['room_type']).agg(['mean', 'std']).fillna(
+            {'mean': log_price.mean(), 'std': log_price.std()}
+        )
+        self.price_range = (source['price'].min(), source['price'].max())
+        self.price_missing = source['price'].isnull().mean()
+        self.license_missing = source['license'].isnull().mean() if 'license' in source else 1.0
+        self.hosts = source[['host_id', 'host_name']].drop_duplicates('host_id').reset_index(drop=True)
+
+    @classmethod
+    def from_csv(cls, path=SOURCE):
+        return cls(pd.read_csv(path))
+
+    def generate(self, n_rows, seed=0, first_id=1):
+        """DataFrame of `n_rows` synthetic listings with ids from `first_id`"""
+        rng = np.random.default_rng(seed)
+        source = self.source
+
+        picks = rng.choice(len(self.neighbourhoods), size=n_rows, p=self.neighbourhood_p)
+        keys = self.neighbourhoods.index[picks]
+        groups = keys.get_level_values(0).to_numpy()
+        neighbourhoods = keys.get_level_values(1).to_numpy()
+
+        room_type = np.empty(n_rows, dtype=object)
+        for group, probabilities in self.room_types.items():
+            rows = np.flatnonzero(groups == group)
+            room_type[rows] = rng.choice(probabilities.index.to_numpy(), size=len(rows), p=probabilities.to_numpy())
+
+        centre = self.centres.loc[neighbourhoods].to_numpy()
+        spread = self.spread.loc[neighbourhoods].to_numpy()
+        coords = centre + rng.standard_normal((n_rows, 2)) * spread
+        latitude = np.clip(coords[:, 0], *self.lat_range).round(5)
+        longitude = np.clip(coords[:, 1], *self.lon_range).round(5)
+
+        params = self.price_params.reindex(room_type)
+        price = np.exp(params['mean'].to_numpy() + rng.standard_normal(n_rows) * params['std'].to_numpy())
+        price = np.clip(price, *self.price_range).round()
+        price[rng.random(n_rows) < self.price_missing] = np.nan
+
+        reviews = source[REVIEW_COLUMNS].iloc[rng.integers(0, len(source), n_rows)].reset_index(drop=True)
+        hosts = self.hosts.iloc[rng.integers(0, len(self.hosts), n_rows)].reset_index(drop=True)
+        names = source['name'].iloc[rng.integers(0, len(source), n_rows)].to_numpy()
+
+        data = {
+            'id': np.arange(first_id, first_id + n_rows, dtype=np.int64),
+            'name': names,
+            'host_id': hosts['host_id'].to_numpy(),
+            'host_name': hosts['host_name'].to_numpy(),
+            'neighbourhood_group': groups,
+            'neighbourhood': neighbourhoods,
+            'latitude': latitude,
+            'longitude': longitude,
+            'room_type': room_type,
+            'price': price,
+        }
+        for col in RESAMPLED_COLUMNS:
+            data[col] = source[col].to_numpy()[rng.integers(0, len(source), n_rows)]
+        for col in REVIEW_COLUMNS:
+            data[col] = reviews[col].to_numpy()
+        if 'license' in self.columns:
+            licenses = source['license'].dropna().to_numpy()
+            license = np.where(
+                rng.random(n_rows) < self.license_missing,
+                None,
+                licenses[rng.integers(0, len(licenses), n_rows)] if len(licenses) else None
+            )
+            data['license'] = license
+
+        return pd.DataFrame(data)[self.columns]
+
+
+def generate_batches(profile, n_rows, incremental_share=0.13, overlap=0.1, seed=0):
+    """
+    A raw dataset of `n_rows` listings plus an incremental batch.
+
+    The incremental batch has `incremental_share` as many rows; `overlap`
+    of them re-use raw IDs (updates), the rest are new listings.
+    """
+    raw = profile.generate(n_rows, seed=seed)
+    n_incremental = max(1, int(n_rows * incremental_share))
+    incremental = profile.generate(n_incremental, seed=seed + 1, first_id=n_rows + 1)
+    n_updates = int(n_incremental * overlap)
+    rng = np.random.default_rng(seed + 2)
+    incremental.loc[:n_updates - 1, 'id'] = rng.choice(raw['id'].to_numpy(), size=n_updates, replace=False)
+    return raw, incremental
@@ -0,0 +1,6 @@
+"""
+DSA 2040A - Dashboard helpers
+
+Data structures used by dashboardapp.py, kept free of Streamlit calls so
+they can be imported, cached and benchmarked on their own.
+"""
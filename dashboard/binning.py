@@ -0,0 +1,80 @@
+"""
+Server-side summaries for the distribution charts.
+
+px.histogram and px.box send every raw value to the browser, which then
+bins them or computes the quartiles itself, so the payload and the client's
+render time grow with the number of listings shown. These helpers reduce
+the values in NumPy first: a histogram becomes a fixed number of bin
+counts, and a box plot becomes per-group quartiles, whiskers and mean plus
+at most `max_outliers` outlier points per group. The figures built from
+them have the same size whatever the selection.
+"""
+
+import numpy as np
+import pandas as pd
+
+HISTOGRAM_BINS = 50
+MAX_OUTLIERS = 100
+
+
+def histogram(values, bins=HISTOGRAM_BINS):
+    """Equal-width bins over the non-missing values: DataFrame of left, right and count"""
+    values = _finite(values)
+    if len(values) == 0:
+        return pd.DataFrame({'left': [], 'right': [], 'count': []})
+    counts, edges = np.histogram(values, bins=bins)
+    return pd.DataFrame({'left': edges[:-1], 'right': edges[1:], 'count': counts})
+
+
+def box_stats(values, groups, max_outliers=MAX_OUTLIERS):
+    """
+    Box plot statistics of `values` per value of `groups`.
+
+    One row per non-empty group (category order for categoricals) with
+    count, mean, q1, median, q3, the whisker ends (the most extreme values
+    within 1.5 IQR of the box, as Plotly draws them) and `outliers`: up to
+    `max_outliers` of the values beyond the whiskers, evenly spread over
+    their sorted order and always including the most extreme ones.
+    """
+    values = pd.Series(values).to_numpy(dtype='float64', na_value=np.nan)
+    groups = pd.Series(groups)
+    if isinstance(groups.dtype, pd.CategoricalDtype):
+        codes, labels = groups.cat.codes.to_numpy(), groups.cat.categories
+    else:
+        codes, labels = pd.factorize(groups, sort=True)
+    keep = (codes >= 0) & ~np.isnan(values)
+    codes, values = codes[keep], values[keep]
+
+    # One sort: values grouped by code, ascending within each group
+    order = np.lexsort((values, codes))
+    codes, values = codes[order], values[order]
+    counts = np.bincount(codes, minlength=len(labels))
+    starts = np.cumsum(counts) - counts
+
+    rows = []
+    for code in np.flatnonzero(counts):
+        group = values[starts[code]:starts[code] + counts[code]]
+        q1, median, q3 = np.quantile(group, [0.25, 0.5, 0.75])
+        low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        inside = group[(group >= low) & (group <= high)]
+        outliers = group[(group < low) | (group > high)]
+        if len(outliers) > max_outliers:
+            outliers = outliers[np.unique(np.linspace(0, len(outliers) - 1, max_outliers).round().astype(int))]
+        rows.append({
+            'group': labels[code],
+            'count': len(group),
+            'mean': group.mean(),
+            'q1': q1,
+            'median': median,
+            'q3': q3,
+            'lowerfence': inside[0],
+            'upperfence': inside[-1],
+            'outliers': outliers,
+        })
+    columns = ['group', 'count', 'mean', 'q1', 'median', 'q3', 'lowerfence', 'upperfence', 'outliers']
+    return pd.DataFrame(rows, columns=columns)
+
+
+def _finite(values):
+    values = pd.Series(values).to_numpy(dtype='float64', na_value=np.nan)
+    return values[np.isfinite(values)]
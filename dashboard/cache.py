@@ -0,0 +1,98 @@
+"""
+Per-filter-state results cache for the dashboard sections.
+
+Analysts keep returning to the same few sidebar combinations, so computed
+section results (aggregates, tables and figure specs) are memoized under the
+normalized filter state. The cache is shared by all sessions, bounded by an
+entry count with least-recently-used eviction, and cleared automatically
+when the underlying data snapshot changes.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+def filter_key(selections, price_range=None, **extra):
+    """
+    Normalized, hashable key for a sidebar filter state.
+
+    'All' and None selections are dropped, and price bounds are rounded to
+    cents so equivalent slider positions share an entry. Extra keyword
+    arguments (e.g. a search term) become part of the key.
+    """
+    items = tuple(sorted(
+        (col, str(value)) for col, value in selections.items()
+        if value not in (None, 'All')
+    ))
+    price = None if price_range is None else tuple(round(float(bound), 2) for bound in price_range)
+    return items, price, tuple(sorted(extra.items()))
+
+
+class ResultsCache:
+    """Thread-safe LRU cache of section results with hit/miss counters"""
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.snapshot = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bind(self, snapshot):
+        """
+        Tie the cache to a data snapshot token (e.g. a file fingerprint).
+
+        Every entry is dropped when the token differs from the current one.
+        """
+        with self._lock:
+            if snapshot != self.snapshot:
+                self._entries.clear()
+                self.snapshot = snapshot
+
+    def get_or_compute(self, key, compute):
+        """Return the cached result for `key`, calling `compute()` on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Compute outside the lock so other sessions are not blocked
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def get(self, key, default=None):
+        """Cached result for `key` without computing it (`default` if absent or evicted)"""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
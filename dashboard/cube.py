@@ -0,0 +1,347 @@
+"""
+Pre-aggregated listing cube for the dashboard KPIs and tab charts.
+
+Most dashboard numbers are counts, sums or means grouped by a few
+low-cardinality columns. The cube stores those sums in dense NumPy arrays
+indexed by the sidebar filter columns (borough, room type, host experience),
+a price bucket, and at most one chart column. Rolling up a selection then
+costs time proportional to the number of cube cells, not the number of
+listings.
+
+The price slider selects an arbitrary range, so only buckets lying fully
+inside the range are read from the cube (as a difference of prefix sums
+along the bucket axis). The few listings in the two
+partially covered edge buckets are added from the row arrays, which keeps
+every answer exact. Filters the cube has no axis for (the review date
+range) pass the selected rows instead, which are then aggregated directly.
+
+Cells are plain sums, so a data refresh that changes or appends a few
+listings is applied by updated(): the old contributions of those rows are
+subtracted from their cells and the new ones added.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from dashboard.selection import patched
+
+FILTER_DIMS = ['neighbourhood_group', 'room_type', 'host_experience']
+VIEW_DIMS = [
+    'price_category', 'review_activity', 'review_volume_tier',
+    'rental_duration_type', 'availability_category'
+]
+
+# Measure name -> source column (None counts rows)
+MEASURES = {
+    'count': None,
+    'price': 'price',
+    'reviews': 'number_of_reviews',
+    'availability': 'availability_365',
+    'reviews_per_month': 'reviews_per_month',
+    'new_listings': 'is_new_listing',
+}
+
+
+class ListingCube:
+    """
+    Dense aggregate arrays over the filter columns, price buckets and one
+    optional chart column.
+
+    Every dimension keeps an extra trailing slot for missing values: those
+    rows count toward totals but never appear as a group of their own, the
+    same way `value_counts()` and `groupby()` drop NaN.
+    """
+
+    def __init__(self, df, n_price_buckets=32, filter_index=None):
+        self.n_rows = len(df)
+        self.levels = {}
+        self.codes = {}
+        for dim in FILTER_DIMS + VIEW_DIMS:
+            if dim in df.columns:
+                self.levels[dim], self.codes[dim] = _encode(df[dim])
+        self.view_dims = [dim for dim in VIEW_DIMS if dim in self.codes]
+
+        self.measures = _measures(df)
+
+        # Sorted prices (shared with the filter index when one is given)
+        if filter_index is not None:
+            self.price_order = filter_index.price_order
+            self.sorted_prices = filter_index.sorted_prices
+        else:
+            prices = df['price'].to_numpy(dtype='float64', na_value=np.nan)
+            self.price_order = np.argsort(prices, kind='stable')
+            self.sorted_prices = prices[self.price_order]
+
+        # Bucket edges at price quantiles; the last bucket is open-ended
+        valid = self.sorted_prices[~np.isnan(self.sorted_prices)]
+        if len(valid):
+            inner = np.quantile(valid, np.linspace(0, 1, n_price_buckets + 1)[:-1])
+            self.price_edges = np.append(np.unique(inner), np.inf)
+        else:
+            self.price_edges = np.array([0.0, np.inf])
+        self.n_buckets = len(self.price_edges) - 1
+
+        prices = df['price'].to_numpy(dtype='float64', na_value=np.nan)
+        self.priced = ~np.isnan(prices)
+        self.bucket = np.searchsorted(self.price_edges, prices, side='right') - 1
+
+        # One cuboid for the filter columns alone, one per chart column
+        self.cuboids = {None: self._build(None)}
+        for dim in self.view_dims:
+            self.cuboids[dim] = self._build(dim)
+
+    def updated(self, df, rows, filter_index=None):
+        """
+        Cube for `df` where only the positions in `rows` changed.
+
+        `df` keeps every position of the frame this cube was built from and
+        may append new ones (all of which must be in `rows`). The per-row
+        arrays are patched and every cuboid gets the difference of the
+        touched rows' contributions; the price buckets stay as they are.
+        Returns None when a row has a label the cube has no level for, so
+        the caller builds a new cube instead. This cube is left unchanged.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        changes = df.iloc[rows]
+        codes = {}
+        for dim, levels in self.levels.items():
+            codes[dim] = _codes(changes[dim], levels)
+            if codes[dim] is None:
+                return None
+
+        cube = copy.copy(self)
+        cube.n_rows = len(df)
+        cube.codes = {dim: patched(self.codes[dim], cube.n_rows, rows, codes[dim]) for dim in self.codes}
+        cube.measures = {
+            name: patched(self.measures[name], cube.n_rows, rows, values)
+            for name, values in _measures(changes).items()
+        }
+
+        prices = changes['price'].to_numpy(dtype='float64', na_value=np.nan)
+        priced = ~np.isnan(prices)
+        if filter_index is not None:
+            cube.price_order = filter_index.price_order
+            cube.sorted_prices = filter_index.sorted_prices
+        else:
+            all_prices = df['price'].to_numpy(dtype='float64', na_value=np.nan)
+            cube.price_order = np.argsort(all_prices, kind='stable')
+            cube.sorted_prices = all_prices[cube.price_order]
+        # The first bucket starts at the lowest price, so it stretches down
+        # to cover cheaper listings; the last one is open-ended already
+        if priced.any() and prices[priced].min() < self.price_edges[0]:
+            cube.price_edges = self.price_edges.copy()
+            cube.price_edges[0] = prices[priced].min()
+        cube.priced = patched(self.priced, cube.n_rows, rows, priced, fill=False)
+        cube.bucket = patched(self.bucket, cube.n_rows, rows,
+                              np.searchsorted(cube.price_edges, prices, side='right') - 1)
+
+        old_rows = rows[rows < self.n_rows]
+        cube.cuboids = {}
+        for view, prefix in self.cuboids.items():
+            delta = cube._sums(view, rows) - self._sums(view, old_rows)
+            cube.cuboids[view] = prefix + _prefix_sums(delta)
+        return cube
+
+    @property
+    def n_cells(self):
+        """Total number of cells across all cuboids (per measure)"""
+        return sum(arr[0].size // len(MEASURES) * self.n_buckets for arr in self.cuboids.values())
+
+    def slice(self, selections, price_range=None, rows=None):
+        """Restrict the cube to a sidebar selection (see CubeSlice)"""
+        return CubeSlice(self, selections, price_range, rows)
+
+    def _shape(self, view):
+        dims = FILTER_DIMS + ([view] if view else [])
+        return [len(self.levels[dim]) + 1 for dim in dims]
+
+    def _cell_index(self, view, rows=None):
+        """Flat cell index (without the bucket axis) for `rows`"""
+        dims = FILTER_DIMS + ([view] if view else [])
+        codes = [self.codes[dim] if rows is None else self.codes[dim][rows] for dim in dims]
+        return np.ravel_multi_index(codes, self._shape(view))
+
+    def _sums(self, view, rows=None):
+        """Measure sums of the priced `rows` (None for all) per price bucket and cell"""
+        shape = self._shape(view)
+        cells = int(np.prod(shape))
+        rows = np.flatnonzero(self.priced) if rows is None else rows[self.priced[rows]]
+        flat = self.bucket[rows] * cells + self._cell_index(view, rows)
+        size = self.n_buckets * cells
+        arr = np.stack([
+            np.bincount(flat, weights=values[rows], minlength=size)
+            for values in self.measures.values()
+        ], axis=-1)
+        return arr.reshape([self.n_buckets] + shape + [len(MEASURES)])
+
+    def _build(self, view):
+        return _prefix_sums(self._sums(view))
+
+
+class CubeSlice:
+    """
+    Cube cells for one sidebar selection.
+
+    Cuboids are reduced lazily on first use, so a rerun only pays for the
+    views its charts roll up. With `rows` (positions already matching the
+    whole selection) the buckets are skipped and those rows are summed.
+    """
+
+    def __init__(self, cube, selections, price_range=None, rows=None):
+        self.cube = cube
+        self.selections = {
+            dim: value for dim, value in selections.items()
+            if value not in (None, 'All')
+        }
+        self._reduced = {}
+
+        if rows is not None:
+            self.full_buckets = slice(0, 0)
+            self.edge_rows = rows[cube.priced[rows]]
+            return
+
+        low, high = price_range if price_range is not None else (-np.inf, np.inf)
+        edges = cube.price_edges
+        first = int(np.searchsorted(edges, low, side='left'))
+        last = int(np.searchsorted(edges, high, side='right')) - 1
+        if last > first:
+            self.full_buckets = slice(first, last)
+            partial = [(low, edges[first], 'left'), (edges[last], high, 'right')]
+        else:
+            self.full_buckets = slice(0, 0)
+            partial = [(low, high, 'right')]
+
+        # Edge listings inside the range but outside the fully covered buckets
+        pieces = []
+        for start_value, stop_value, side in partial:
+            start = np.searchsorted(cube.sorted_prices, start_value, side='left')
+            stop = np.searchsorted(cube.sorted_prices, stop_value, side=side)
+            pieces.append(cube.price_order[start:stop])
+        self.edge_rows = np.concatenate(pieces)
+
+    def rollup(self, by=()):
+        """
+        Measure sums grouped by the columns in `by`.
+
+        `by` may hold any filter columns plus at most one chart column.
+        Returns a DataFrame indexed by `by` (a single 'total' row when `by`
+        is empty) with one column per measure; groups with no listings are
+        dropped.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        views = [dim for dim in by if dim not in FILTER_DIMS]
+        if len(views) > 1:
+            raise ValueError(f"Cube can roll up at most one chart column, got {views}")
+        view = views[0] if views else None
+
+        arr = self._reduce(view)
+        dims = FILTER_DIMS + ([view] if view else [])
+        for axis, dim in reversed(list(enumerate(dims))):
+            if dim not in by:
+                arr = arr.sum(axis=axis)
+
+        kept = [dim for dim in dims if dim in by]
+        columns = list(MEASURES)
+        if not kept:
+            return pd.DataFrame([arr], columns=columns, index=['total'])
+
+        # Drop the missing-value slot of every grouped dimension
+        labels = [self._labels(dim) for dim in kept]
+        arr = arr[tuple(slice(0, len(names)) for names in labels)]
+        index = pd.MultiIndex.from_product(labels, names=kept)
+        frame = pd.DataFrame(arr.reshape(-1, len(columns)), index=index, columns=columns)
+        frame = frame[frame['count'] > 0]
+        frame['count'] = frame['count'].astype('int64')
+        if len(kept) == 1:
+            frame.index = frame.index.get_level_values(0)
+            return frame
+        return frame.reorder_levels(by)
+
+    def totals(self):
+        """Measure sums over the whole selection as a Series"""
+        return self.rollup(()).iloc[0]
+
+    def _reduce(self, view):
+        """Cuboid summed over the selected price range and filter values"""
+        if view in self._reduced:
+            return self._reduced[view]
+
+        cube = self.cube
+        shape = cube._shape(view)
+        prefix = cube.cuboids[view]
+        arr = prefix[self.full_buckets.stop] - prefix[self.full_buckets.start]
+
+        rows = self.edge_rows
+        if len(rows):
+            flat = cube._cell_index(view, rows)
+            edge = np.stack([
+                np.bincount(flat, weights=values[rows], minlength=int(np.prod(shape)))
+                for values in cube.measures.values()
+            ], axis=-1)
+            arr = arr + edge.reshape(shape + [len(MEASURES)])
+
+        # Keep only the selected slot of each filtered dimension
+        index = []
+        for dim in FILTER_DIMS + ([view] if view else []):
+            if dim not in self.selections:
+                index.append(slice(None))
+                continue
+            code = self._selected_code(dim)
+            index.append(slice(code, code + 1) if code is not None else slice(0, 0))
+        arr = arr[tuple(index)]
+
+        self._reduced[view] = arr
+        return arr
+
+    def _selected_code(self, dim):
+        levels = self.cube.levels[dim]
+        value = self.selections[dim]
+        return levels.index(value) if value in levels else None
+
+    def _labels(self, dim):
+        """Group labels left on a dimension after the selection"""
+        if dim not in self.selections:
+            return self.cube.levels[dim]
+        return [self.selections[dim]] if self._selected_code(dim) is not None else []
+
+
+def mean(frame, measure):
+    """Per-group mean of a measure from rolled-up sums"""
+    return frame[measure] / frame['count']
+
+
+def _measures(df):
+    """Per-row measure values (missing as 0)"""
+    return {
+        name: (np.ones(len(df)) if col is None
+               else np.nan_to_num(df[col].to_numpy(dtype='float64', na_value=np.nan)))
+        for name, col in MEASURES.items()
+    }
+
+
+def _prefix_sums(arr):
+    """Prefix sums over the bucket axis: any bucket range is one subtraction"""
+    return np.concatenate([np.zeros_like(arr[:1]), np.cumsum(arr, axis=0)])
+
+
+def _codes(series, levels):
+    """int16 codes of `series` in existing `levels` (missing in the trailing slot); None for an unknown label"""
+    codes = pd.Index(levels).get_indexer(series.astype(object))
+    unknown = (codes < 0) & series.notna().to_numpy()
+    if unknown.any():
+        return None
+    return np.where(codes < 0, len(levels), codes).astype(np.int16)
+
+
+def _encode(series):
+    """Level labels and int16 codes; missing values map to the trailing slot"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        levels = series.cat.categories.tolist()
+        codes = series.cat.codes.to_numpy()
+    else:
+        codes, uniques = pd.factorize(series, sort=True)
+        levels = uniques.tolist()
+    codes = np.where(codes < 0, len(levels), codes).astype(np.int16)
+    return levels, codes
@@ -0,0 +1,138 @@
+"""
+Dataset loading for the dashboard.
+
+Kept outside dashboardapp.py so the benchmarks load exactly what the app
+loads: the dashboard's columns only, with the compact schema applied. The
+Data Explorer export still writes every transformed column; the ones left
+on disk are read back only when an export is prepared, and only for the
+rows of each chunk being written (see FullFrame).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from etl.schema import apply_schema
+from etl.storage import CSV_PATH, SNAPSHOT_PATH, listing_columns, load_listings, read_csv
+from etl.upsert import KEY
+
+# Columns read by the dashboard (everything else stays on disk)
+DASHBOARD_COLUMNS = [
+    'id', 'name', 'host_id', 'host_name', 'neighbourhood_group', 'neighbourhood',
+    'latitude', 'longitude', 'room_type', 'price', 'number_of_reviews',
+    'last_review', 'reviews_per_month', 'availability_365', 'price_category',
+    'review_activity', 'availability_category', 'host_experience',
+    'is_new_listing', 'rental_duration_type', 'review_volume_tier'
+]
+
+
+def load_frame(snapshot_path=SNAPSHOT_PATH, csv_path=CSV_PATH):
+    """
+    Transformed listings as the dashboard uses them.
+
+    Reads the Parquet snapshot (CSV as fallback) restricted to
+    DASHBOARD_COLUMNS and casts to compact dtypes (categoricals, integer
+    IDs, float32 measures). Raises FileNotFoundError when neither exists.
+    """
+    return apply_schema(
+        load_listings(columns=DASHBOARD_COLUMNS, snapshot_path=snapshot_path, csv_path=csv_path),
+        inplace=True
+    )
+
+
+class FullFrame:
+    """
+    `df` (as loaded by load_frame) with the other transformed columns, taken
+    a few rows at a time.
+
+    The loaded frame is never copied whole: take() gathers the requested
+    rows from `df` and reads the remaining columns for just those rows.
+    Rows are matched to the file on `key` once (only the key column is
+    read), so the frame keeps its own row order, which an incremental
+    refresh may have changed; listings no longer in the file get missing
+    values. From the Parquet snapshot only the row groups holding the
+    requested rows are read; the CSV fallback cannot seek by row, so its
+    remaining columns are read once.
+    """
+
+    def __init__(self, df, snapshot_path=SNAPSHOT_PATH, csv_path=CSV_PATH, key=KEY):
+        self.df = df
+        file_columns = listing_columns(snapshot_path, csv_path)
+        self.missing = [col for col in file_columns if col not in df.columns]
+        self.columns = file_columns + [col for col in df.columns if col not in file_columns]
+        self.file_rows = None
+        self._parquet = self._csv = None
+        if not self.missing:
+            return
+
+        if os.path.exists(snapshot_path):
+            import pyarrow.parquet as pq
+
+            self._parquet = pq.ParquetFile(snapshot_path)
+            sizes = [self._parquet.metadata.row_group(i).num_rows for i in range(self._parquet.num_row_groups)]
+            self._offsets = np.concatenate([[0], np.cumsum(sizes)])
+            file_ids = self._parquet.read(columns=[key]).column(key).to_numpy()
+            dtypes = self._parquet.schema_arrow.empty_table().select(self.missing).to_pandas().dtypes
+        else:
+            self._csv = read_csv(csv_path, columns=[key] + self.missing)
+            file_ids = self._csv[key].to_numpy()
+            dtypes = self._csv[self.missing].dtypes
+
+        # Position of each listing's last row in the file (-1 when absent)
+        ids = df[key].to_numpy(dtype='int64')
+        self.file_rows = np.full(len(ids), -1, dtype=np.intp)
+        matched = np.zeros(len(ids), dtype=bool)
+        if len(file_ids):
+            order = np.argsort(file_ids, kind='stable')
+            found = np.maximum(np.searchsorted(file_ids[order], ids, side='right') - 1, 0)
+            matched = file_ids[order][found] == ids
+            self.file_rows[matched] = order[found[matched]]
+
+        # One dtype per column for every chunk, even when only some have gaps
+        if not matched.all():
+            dtypes = dtypes.map(lambda dtype: _with_missing(dtype))
+        self.dtypes = dtypes
+
+    def __len__(self):
+        return len(self.df)
+
+    def take(self, positions):
+        """Rows at `positions` with every column, in file column order"""
+        positions = np.asarray(positions, dtype=np.intp)
+        rows = self.df.iloc[positions]
+        if not self.missing:
+            return rows[self.columns]
+        extra = self._read(self.file_rows[positions]).set_axis(rows.index)
+        return pd.concat([rows, extra], axis=1)[self.columns]
+
+    def _read(self, file_rows):
+        """The missing columns at file positions `file_rows` (-1 gives missing values)"""
+        found = file_rows >= 0
+        rows = file_rows[found]
+        if self._csv is not None:
+            values = self._csv[self.missing].iloc[rows]
+        elif len(rows):
+            # Read only the row groups the rows fall in, then pick the rows
+            groups = np.unique(np.searchsorted(self._offsets, rows, side='right') - 1)
+            sizes = self._offsets[groups + 1] - self._offsets[groups]
+            starts = np.cumsum(sizes) - sizes
+            group = np.searchsorted(self._offsets, rows, side='right') - 1
+            local = rows - self._offsets[group] + starts[np.searchsorted(groups, group)]
+            table = self._parquet.read_row_groups(groups.tolist(), columns=self.missing)
+            values = table.take(local).to_pandas()
+        else:
+            values = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in self.dtypes.items()})
+        values = values.set_axis(np.flatnonzero(found))
+        if not found.all():
+            values = values.reindex(np.arange(len(file_rows)))
+        return values.astype(self.dtypes)
+
+
+def _with_missing(dtype):
+    """Dtype able to hold missing values alongside values of `dtype`"""
+    if pd.api.types.is_bool_dtype(dtype):
+        return np.dtype('object')
+    if pd.api.types.is_integer_dtype(dtype):
+        return np.dtype('float64')
+    return dtype
@@ -0,0 +1,89 @@
+"""
+On-demand export of the Data Explorer selection.
+
+The export is only generated when the user asks for it. Rows are taken from
+the loaded frame by position in fixed-size chunks and written straight into
+the output buffer, so neither a copy of the whole selection nor one large
+CSV string is ever held in memory. The frame may also be a FullFrame
+(dashboard/data.py), which adds the transformed columns the dashboard does
+not load for each chunk's rows only.
+"""
+
+import gzip
+import io
+
+import numpy as np
+
+CHUNK_ROWS = 20_000
+
+# Label -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'CSV (gzip)': ('csv.gz', 'application/gzip'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+
+def iter_chunks(df, rows=None, chunk_rows=CHUNK_ROWS):
+    """Consecutive slices of `df` at positions `rows` (None means all rows)"""
+    n_rows = len(df) if rows is None else len(rows)
+    for start in range(0, n_rows, chunk_rows):
+        stop = min(start + chunk_rows, n_rows)
+        yield df.take(np.arange(start, stop) if rows is None else np.asarray(rows[start:stop]))
+
+
+def _header(df):
+    """No rows of `df`, with every column and its dtype"""
+    return df.take(np.empty(0, dtype=np.intp))
+
+
+def write_csv(df, out, rows=None, chunk_rows=CHUNK_ROWS):
+    """Write the selection as UTF-8 CSV into the binary stream `out`"""
+    text = io.TextIOWrapper(out, encoding='utf-8', newline='', write_through=True)
+    header = True
+    for chunk in iter_chunks(df, rows, chunk_rows):
+        chunk.to_csv(text, index=False, header=header)
+        header = False
+    if header:
+        # Empty selection: still emit the header row
+        _header(df).to_csv(text, index=False)
+    text.detach()
+
+
+def write_csv_gzip(df, out, rows=None, chunk_rows=CHUNK_ROWS):
+    """Write the selection as gzip-compressed CSV into `out`"""
+    with gzip.GzipFile(fileobj=out, mode='wb', mtime=0) as compressed:
+        write_csv(df, compressed, rows, chunk_rows)
+
+
+def write_parquet(df, out, rows=None, chunk_rows=CHUNK_ROWS):
+    """Write the selection as Parquet into `out`, one row group per chunk"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(_header(df), preserve_index=False)
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in iter_chunks(df, rows, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+WRITERS = {
+    'CSV': write_csv,
+    'CSV (gzip)': write_csv_gzip,
+    'Parquet': write_parquet,
+}
+
+
+def export(df, rows=None, fmt='CSV', chunk_rows=CHUNK_ROWS):
+    """
+    Export the rows of `df` (a DataFrame or FullFrame) at positions `rows`
+    in one of EXPORT_FORMATS.
+
+    Returns a BytesIO positioned at the start, ready for st.download_button.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {list(WRITERS)}")
+    out = io.BytesIO()
+    WRITERS[fmt](df, out, rows, chunk_rows)
+    out.seek(0)
+    return out
@@ -0,0 +1,227 @@
+"""
+Prebuilt filter index for the dashboard sidebar.
+
+Built once per loaded dataset. Each categorical filter column gets one packed
+row bitmap per value, and the price column gets a sorted copy with the
+matching row order. A sidebar selection is resolved by AND-ing bitmaps and
+slicing the sorted prices, which yields row positions without copying or
+re-scanning the frame.
+
+The last_review dates are indexed the same way. Listings sorted by review
+date are the in-memory counterpart of the month partitions on disk (see
+etl/partitions.py): a date range is one contiguous slice, and the
+never-reviewed listings sit together at the end.
+
+When a data refresh changes or appends a few listings, updated() patches
+the bits of those rows and moves their entries within the sorted arrays
+instead of building the index again.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+FILTER_COLUMNS = ['neighbourhood_group', 'room_type', 'host_experience']
+ALL = 'All'
+
+
+class FilterIndex:
+    """Row bitmaps per categorical value plus a sorted price array"""
+
+    def __init__(self, df, columns=FILTER_COLUMNS, price_column='price', price_quantile=0.99,
+                 review_column='last_review'):
+        self.n_rows = len(df)
+        self.bitmaps = {}
+        for col in columns:
+            values = df[col]
+            codes, uniques = pd.factorize(values, sort=True)
+            self.bitmaps[col] = {
+                value: np.packbits(codes == code)
+                for code, value in enumerate(uniques.tolist())
+            }
+
+        self.price_column = price_column
+        self.price_quantile = price_quantile
+        prices = df[price_column].to_numpy(dtype='float64', na_value=np.nan)
+        self.price_order = np.argsort(prices, kind='stable')
+        self.sorted_prices = prices[self.price_order]
+        self._set_price_bounds()
+
+        # Review dates as day numbers; never-reviewed listings (NaN) sort last
+        self.review_column = review_column
+        days = _review_days(df, review_column)
+        self.review_order = np.argsort(days, kind='stable')
+        self.sorted_reviews = days[self.review_order]
+        self._set_review_bounds()
+
+    def updated(self, df, rows, previous):
+        """
+        Index for `df` where only the positions in `rows` changed since
+        `previous` (the frame this index was built from).
+
+        `df` keeps every position of `previous` and may append new ones (all
+        of which must be in `rows`). Only the bitmaps of the old and new
+        values of those rows are touched, and their prices and review dates
+        are moved within the sorted arrays; this index is left unchanged.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        old_rows = rows[rows < self.n_rows]
+        index = copy.copy(self)
+        index.n_rows = len(df)
+        index.bitmaps = {}
+        n_bytes = (len(df) + 7) // 8
+        for col, bitmaps in self.bitmaps.items():
+            grown = {value: _grown(bitmap, n_bytes) for value, bitmap in bitmaps.items()}
+            touched = set()
+            for value, positions in _groups(previous[col].iloc[old_rows], old_rows):
+                _set_bits(grown[value], positions, False)
+                touched.add(value)
+            for value, positions in _groups(df[col].iloc[rows], rows):
+                if value not in grown:
+                    grown[value] = np.zeros(n_bytes, dtype=np.uint8)
+                _set_bits(grown[value], positions, True)
+                touched.add(value)
+            # A value whose last listing changed leaves the options
+            index.bitmaps[col] = {
+                value: bitmap for value, bitmap in grown.items()
+                if value not in touched or bitmap.any()
+            }
+
+        prices = df[self.price_column].iloc[rows].to_numpy(dtype='float64', na_value=np.nan)
+        index.price_order, index.sorted_prices = _resorted(self.price_order, self.sorted_prices, rows, prices)
+        index._set_price_bounds()
+        days = _review_days(df.iloc[rows], self.review_column)
+        index.review_order, index.sorted_reviews = _resorted(self.review_order, self.sorted_reviews, rows, days)
+        index._set_review_bounds()
+        return index
+
+    def options(self, column):
+        """Sorted distinct values of a filter column"""
+        return sorted(self.bitmaps[column])
+
+    def select(self, selections, price_range=None, review_range=None, include_unreviewed=True):
+        """
+        Resolve a sidebar selection to sorted row positions.
+
+        `selections` maps filter columns to a value or 'All'; `price_range`
+        is an inclusive (low, high) tuple and `review_range` an inclusive
+        (start, end) tuple of dates, which drops never-reviewed listings
+        unless `include_unreviewed`. Returns None when nothing is filtered
+        out, so callers can keep using the full frame as-is.
+        """
+        packed = None
+        for col, value in selections.items():
+            if value == ALL or value is None:
+                continue
+            bitmap = self.bitmaps[col].get(value)
+            if bitmap is None:
+                return np.empty(0, dtype=np.intp)
+            packed = bitmap if packed is None else packed & bitmap
+
+        if packed is None:
+            mask = None
+        else:
+            mask = np.unpackbits(packed, count=self.n_rows).view(bool)
+
+        if price_range is not None:
+            start, stop = self._price_slice(*price_range)
+            if start > 0 or stop < self.n_rows:
+                in_range = np.zeros(self.n_rows, dtype=bool)
+                in_range[self.price_order[start:stop]] = True
+                mask = in_range if mask is None else mask & in_range
+
+        if review_range is not None:
+            start, stop = self._review_slice(*review_range)
+            unreviewed = self.n_rows - self.n_reviewed if include_unreviewed else 0
+            if stop - start + unreviewed < self.n_rows:
+                in_range = np.zeros(self.n_rows, dtype=bool)
+                in_range[self.review_order[start:stop]] = True
+                if include_unreviewed:
+                    in_range[self.review_order[self.n_reviewed:]] = True
+                mask = in_range if mask is None else mask & in_range
+
+        if mask is None:
+            return None
+        return np.flatnonzero(mask)
+
+    def apply(self, df, selections, price_range=None, review_range=None, include_unreviewed=True):
+        """Rows of `df` matching the selection (the frame itself when unfiltered)"""
+        rows = self.select(selections, price_range, review_range, include_unreviewed)
+        if rows is None or len(rows) == self.n_rows:
+            return df
+        return df.iloc[rows]
+
+    def _set_price_bounds(self):
+        valid = self.sorted_prices[~np.isnan(self.sorted_prices)]
+        self.price_min = float(valid[0]) if len(valid) else 0.0
+        self.price_max = float(valid[-1]) if len(valid) else 0.0
+        self.price_cap = float(np.quantile(valid, self.price_quantile)) if len(valid) else 0.0
+
+    def _set_review_bounds(self):
+        self.n_reviewed = int(np.count_nonzero(~np.isnan(self.sorted_reviews)))
+        self.review_min = _day_to_date(self.sorted_reviews[0]) if self.n_reviewed else None
+        self.review_max = _day_to_date(self.sorted_reviews[self.n_reviewed - 1]) if self.n_reviewed else None
+
+    def _price_slice(self, low, high):
+        """Slice of the sorted price array covering [low, high]"""
+        start = np.searchsorted(self.sorted_prices, low, side='left')
+        stop = np.searchsorted(self.sorted_prices, high, side='right')
+        return int(start), int(stop)
+
+    def _review_slice(self, start, end):
+        """Slice of the sorted review dates covering [start, end]"""
+        reviewed = self.sorted_reviews[:self.n_reviewed]
+        start = np.searchsorted(reviewed, _date_to_day(start), side='left')
+        stop = np.searchsorted(reviewed, _date_to_day(end), side='right')
+        return int(start), int(stop)
+
+
+def _review_days(df, column):
+    """Review dates as day numbers, NaN where missing (or without the column)"""
+    if column not in df.columns:
+        return np.full(len(df), np.nan)
+    dates = pd.to_datetime(df[column]).to_numpy(dtype='datetime64[D]')
+    return np.where(np.isnat(dates), np.nan, dates.astype('int64').astype('float64'))
+
+
+def _resorted(order, sorted_values, rows, values):
+    """Sorted copy of (`order`, `sorted_values`) with the entries of `rows` replaced by `values`"""
+    keep = ~np.isin(order, rows)
+    order, sorted_values = order[keep], sorted_values[keep]
+    by_value = np.argsort(values, kind='stable')
+    rows, values = rows[by_value], values[by_value]
+    at = np.searchsorted(sorted_values, values, side='right')
+    return np.insert(order, at, rows), np.insert(sorted_values, at, values)
+
+
+def _groups(values, rows):
+    """(value, positions) for each non-missing value among `values` (aligned with `rows`)"""
+    codes, uniques = pd.factorize(values)
+    for code, value in enumerate(uniques.tolist()):
+        yield value, rows[codes == code]
+
+
+def _grown(bitmap, n_bytes):
+    """Copy of a packed bitmap padded with zero bits to `n_bytes`"""
+    grown = np.zeros(n_bytes, dtype=np.uint8)
+    grown[:len(bitmap)] = bitmap
+    return grown
+
+
+def _set_bits(bitmap, positions, on):
+    """Set (or clear) the bits of `positions` in a packed (big-endian) bitmap"""
+    bits = (0x80 >> (positions & 7)).astype(np.uint8)
+    if on:
+        np.bitwise_or.at(bitmap, positions >> 3, bits)
+    else:
+        np.bitwise_and.at(bitmap, positions >> 3, ~bits)
+
+
+def _date_to_day(value):
+    """Day number (days since 1970-01-01) of a date"""
+    return float(np.datetime64(pd.Timestamp(value).date(), 'D').astype('int64'))
+
+
+def _day_to_date(day):
+    return pd.Timestamp(np.datetime64(int(day), 'D')).date()
@@ -0,0 +1,76 @@
+"""
+Host dimension for the dashboard's host analysis.
+
+Built once per data version from the star schema's dim_host (see
+etl/star.py): one row per host_id with precomputed listings, mean price,
+reviews and mean availability, plus each listing's integer host key. The
+unfiltered "Top 10 Hosts" table and host counts are read straight from the
+dimension; for a filtered selection they are bincounts over the selected
+rows' host keys instead of a groupby on the host_name strings. Hosts who
+share a name are counted separately.
+"""
+
+import numpy as np
+import pandas as pd
+
+from etl.star import host_dimension
+
+TOP_COLUMNS = ['host_name', 'id', 'price', 'number_of_reviews', 'availability_365']
+
+
+class HostIndex:
+    """dim_host plus each listing's position in it"""
+
+    def __init__(self, df):
+        self.table, keys = host_dimension(df)
+        self.codes = keys - 1  # Surrogate keys are 1-based
+        self.n_hosts = len(self.table)
+        self.price = df['price'].to_numpy(dtype='float64', na_value=np.nan)
+        self.reviews = df['number_of_reviews'].to_numpy(dtype='float64')
+        self.availability = df['availability_365'].to_numpy(dtype='float64')
+        # Most listings first, ties in host_id order
+        self.ranking = np.argsort(-self.table['listings'].to_numpy(), kind='stable')
+
+    def unique(self, rows=None):
+        """Distinct hosts among the rows (None for all)"""
+        if rows is None:
+            return self.n_hosts
+        return int(np.count_nonzero(np.bincount(self.codes[rows], minlength=self.n_hosts)))
+
+    def top(self, rows=None, n=10):
+        """Hosts with the most listings: name, listings, mean price, reviews, mean availability"""
+        if rows is None:
+            top = self.table.iloc[self.ranking[:n]]
+            return pd.DataFrame({
+                'host_name': top['host_name'].to_numpy(),
+                'id': top['listings'].to_numpy(),
+                'price': top['avg_price'].to_numpy(),
+                'number_of_reviews': top['total_reviews'].to_numpy(),
+                'availability_365': top['avg_availability'].to_numpy(),
+            })
+
+        codes = self.codes[rows]
+        listings = np.bincount(codes, minlength=self.n_hosts)
+        top = np.argsort(-listings, kind='stable')[:n]
+        top = top[listings[top] > 0]
+
+        price = self.price[rows]
+        priced = ~np.isnan(price)
+        price_sum = np.bincount(codes[priced], weights=price[priced], minlength=self.n_hosts)[top]
+        price_count = np.bincount(codes[priced], minlength=self.n_hosts)[top]
+        with np.errstate(invalid='ignore'):
+            mean_price = price_sum / price_count
+        return pd.DataFrame({
+            'host_name': self.table['host_name'].to_numpy()[top],
+            'id': listings[top],
+            'price': mean_price,
+            'number_of_reviews': np.bincount(codes, weights=self.reviews[rows], minlength=self.n_hosts)[top].astype('int64'),
+            'availability_365': np.bincount(codes, weights=self.availability[rows], minlength=self.n_hosts)[top] / listings[top],
+        })
+
+    def experience(self, rows=None):
+        """Distinct hosts per host experience level"""
+        hosts = self.table
+        if rows is not None:
+            hosts = hosts.iloc[np.flatnonzero(np.bincount(self.codes[rows], minlength=self.n_hosts))]
+        return hosts['host_experience'].value_counts(sort=False)
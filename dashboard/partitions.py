@@ -0,0 +1,84 @@
+"""
+Review date filter answered from the last_review month partitions.
+
+etl/partitions.py writes the transformed listings as one Parquet file per
+last_review month, with a manifest of per-partition date ranges and the
+content digest of the snapshot they were written from. When that digest
+matches the snapshot the dashboard loaded, a review date range is resolved
+with prune() / read_partitions(): only the months overlapping the range
+are opened, and only their id and last_review columns are read. The ids
+are mapped back to positions in the shared frame through a sorted copy of
+its id column.
+
+The positions of the last few ranges are kept, so changing the other
+filters does not read the files again. Without a matching manifest (no
+partitions written yet, or written from other data) the filter index's
+sorted review dates answer instead (see dashboard/filters.py).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from etl.partitions import MANIFEST, PARTITION_DIR, prune, read_manifest, read_partitions
+from etl.upsert import KEY
+
+CACHED_RANGES = 16
+
+
+class ReviewPartitions:
+    """Row positions of a review date range, read from the month partitions"""
+
+    def __init__(self, df, manifest, directory=PARTITION_DIR, key=KEY):
+        self.manifest = manifest
+        self.directory = directory
+        self.key = key
+        self.n_partitions = len(manifest['partitions'])
+        ids = df[key].to_numpy(dtype='int64')
+        self.id_order = np.argsort(ids, kind='stable')
+        self.sorted_ids = ids[self.id_order]
+        self.last_read = 0  # Partitions opened by the most recent read
+        self._ranges = OrderedDict()
+        self._lock = threading.Lock()
+
+    def select(self, review_range, include_unreviewed=True, rows=None):
+        """
+        Sorted positions of the listings last reviewed in `review_range`
+        (inclusive dates), plus the never-reviewed ones with
+        `include_unreviewed`; restricted to `rows` when given.
+        """
+        start, end = review_range
+        range_key = (str(start), str(end), include_unreviewed)
+        with self._lock:
+            positions = self._ranges.get(range_key)
+            if positions is not None:
+                self._ranges.move_to_end(range_key)
+        if positions is None:
+            positions = self._read(start, end, include_unreviewed)
+            with self._lock:
+                self._ranges[range_key] = positions
+                while len(self._ranges) > CACHED_RANGES:
+                    self._ranges.popitem(last=False)
+        if rows is None:
+            return positions
+        return np.intersect1d(rows, positions, assume_unique=True)
+
+    def _read(self, start, end, include_unreviewed):
+        self.last_read = len(prune(self.manifest, start, end, include_unreviewed))
+        ids = read_partitions(self.directory, start, end, include_unreviewed, columns=[self.key])[self.key]
+        ids = ids.to_numpy(dtype='int64')
+        found = np.minimum(np.searchsorted(self.sorted_ids, ids), len(self.sorted_ids) - 1)
+        found = found[self.sorted_ids[found] == ids]
+        return np.sort(self.id_order[found])
+
+
+def load_review_partitions(df, digest, directory=PARTITION_DIR):
+    """ReviewPartitions when the partitions were written from the snapshot with content hash `digest`, else None"""
+    if not len(df) or not os.path.exists(os.path.join(directory, MANIFEST)):
+        return None
+    manifest = read_manifest(directory)
+    if manifest.get('source') != digest:
+        return None
+    return ReviewPartitions(df, manifest, directory)
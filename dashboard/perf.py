@@ -0,0 +1,215 @@
+"""
+Rerun instrumentation for the dashboard.
+
+Every script rerun gets a RunTimer whose `lap(name)` calls split the run
+into consecutive segments (load, filters, each section's compute and
+render, ...). A lap records the wall time since the previous lap and, while
+tracemalloc is tracing, the peak memory allocated above the level at the
+previous lap. Finished runs go to a process-wide PerfMonitor, which keeps a
+bounded history per segment for latency percentiles and appends one JSON
+line per run to a log file. The first run of the process (cold imports and
+data load) is also kept and logged separately as the startup time.
+
+tracemalloc is process-wide: it is started while at least one session asks
+for memory sampling (a reference count shared by every monitor) and is
+left alone if something else started it. A session whose tab is closed
+never says it stopped asking, so one not seen for TRACING_TTL seconds is
+dropped the next time any session reruns. The tracemalloc peak is
+process-wide too, so when reruns of several sessions overlap, a segment's
+peak includes the other runs' allocations, and their laps reset it early.
+Peaks are exact for a run that has the process to itself and approximate
+otherwise.
+"""
+
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+LOG_PATH = os.environ.get('DASHBOARD_PERF_LOG', 'logs/dashboard_perf.jsonl')
+PERCENTILES = [50, 90, 99]
+# Seconds after its last rerun that a session stops counting towards tracing
+TRACING_TTL = 900
+
+# Sessions currently asking for tracemalloc, across all monitors
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_started = False
+
+
+class RunTimer:
+    """Consecutive named segments of one rerun (peaks are process-wide, see above)"""
+
+    def __init__(self, context=None, started=None):
+        self.context = dict(context or {})
+        self.segments = []
+        self.started = time.perf_counter() if started is None else started
+        self._last = self.started
+        self._memory_base = self._reset_memory()
+
+    def lap(self, name):
+        """Close the segment since the previous lap under `name`"""
+        now = time.perf_counter()
+        peak_mb = None
+        if tracemalloc.is_tracing() and self._memory_base is not None:
+            peak = tracemalloc.get_traced_memory()[1]
+            peak_mb = max(peak - self._memory_base, 0) / 1024**2
+        self.segments.append({
+            'name': name,
+            'ms': (now - self._last) * 1000,
+            'peak_mb': peak_mb,
+        })
+        self._memory_base = self._reset_memory()
+        self._last = time.perf_counter()
+
+    @property
+    def total_ms(self):
+        return (self._last - self.started) * 1000
+
+    def table(self):
+        """This run's segments as a DataFrame"""
+        frame = pd.DataFrame(self.segments, columns=['name', 'ms', 'peak_mb'])
+        return frame.round({'ms': 1, 'peak_mb': 2})
+
+    @staticmethod
+    def _reset_memory():
+        if not tracemalloc.is_tracing():
+            return None
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+
+class PerfMonitor:
+    """Latency history per segment across reruns, plus a JSON-lines log"""
+
+    def __init__(self, history=1000, log_path=LOG_PATH, tracing_ttl=TRACING_TTL):
+        self.history = history
+        self.log_path = log_path
+        self.tracing_ttl = tracing_ttl
+        self.runs = 0
+        self.startup = None
+        self._latency = {}
+        self._memory = {}
+        self._tracing = {}  # Session -> time.monotonic() of its last call
+        self._lock = threading.Lock()
+
+    def start_run(self, started=None, **context):
+        """
+        New RunTimer; `context` (e.g. the session) is logged with it.
+
+        `started` is a perf_counter() reading to time from instead of now,
+        e.g. taken before the script's imports.
+        """
+        return RunTimer(context, started)
+
+    def trace_memory(self, session, enabled):
+        """
+        Keep tracemalloc running while any session asks for memory sampling.
+
+        Called on every rerun; sessions that have not called for
+        `tracing_ttl` seconds are released as abandoned.
+        """
+        now = time.monotonic()
+        with self._lock:
+            for other, seen in list(self._tracing.items()):
+                if other != session and now - seen > self.tracing_ttl:
+                    del self._tracing[other]
+                    _release_tracing()
+            if enabled:
+                if session not in self._tracing:
+                    _acquire_tracing()
+                self._tracing[session] = now
+            elif self._tracing.pop(session, None) is not None:
+                _release_tracing()
+
+    def finish(self, run):
+        """Record a finished run and append it to the log"""
+        first = False
+        with self._lock:
+            if self.startup is None:
+                first = True
+                self.startup = {
+                    'total_ms': run.total_ms,
+                    **{segment['name']: segment['ms'] for segment in run.segments},
+                }
+            self.runs += 1
+            for segment in run.segments + [{'name': 'total', 'ms': run.total_ms, 'peak_mb': None}]:
+                name = segment['name']
+                self._latency.setdefault(name, deque(maxlen=self.history)).append(segment['ms'])
+                if segment['peak_mb'] is not None:
+                    self._memory.setdefault(name, deque(maxlen=self.history)).append(segment['peak_mb'])
+        if first:
+            self._log(run, event='startup')
+        self._log(run)
+
+    def summary(self):
+        """Count, p50/p90/p99, max latency (ms) and mean peak MB per segment"""
+        with self._lock:
+            latency = {name: np.array(values) for name, values in self._latency.items()}
+            memory = {name: np.mean(values) for name, values in self._memory.items() if values}
+        rows = []
+        for name, values in latency.items():
+            row = {'segment': name, 'runs': len(values)}
+            for pct, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+                row[f'p{pct}_ms'] = value
+            row['max_ms'] = values.max()
+            row['peak_mb'] = memory.get(name, np.nan)
+            rows.append(row)
+        columns = ['segment', 'runs'] + [f'p{pct}_ms' for pct in PERCENTILES] + ['max_ms', 'peak_mb']
+        return pd.DataFrame(rows, columns=columns).round(2)
+
+    def reset(self):
+        """Drop the latency history (the log file is kept)"""
+        with self._lock:
+            self.runs = 0
+            self._latency.clear()
+            self._memory.clear()
+
+    def _log(self, run, event='rerun'):
+        if not self.log_path:
+            return
+        record = {
+            'ts': pd.Timestamp.now().isoformat(timespec='milliseconds'),
+            'event': event,
+            'total_ms': round(run.total_ms, 3),
+            'memory_traced': tracemalloc.is_tracing(),
+            **run.context,
+            'segments': [
+                {key: round(value, 3) if isinstance(value, float) else value for key, value in segment.items()}
+                for segment in run.segments
+            ],
+        }
+        line = json.dumps(record, default=str)
+        try:
+            os.makedirs(os.path.dirname(self.log_path) or '.', exist_ok=True)
+            with self._lock, open(self.log_path, 'a') as f:
+                f.write(line + '\n')
+        except OSError:
+            # Instrumentation must never break the dashboard
+            pass
+
+
+def _acquire_tracing():
+    """Count one more user of tracemalloc, starting it for the first"""
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        _tracing_users += 1
+        # tracemalloc slows every allocation, so it is off unless requested
+        if _tracing_users == 1 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_started = True
+
+
+def _release_tracing():
+    """Count one user less, stopping tracemalloc after the last if it was started here"""
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_started:
+            tracemalloc.stop()
+            _tracing_started = False
@@ -0,0 +1,351 @@
+"""
+Hot data refresh for the dashboard.
+
+The transformed dataset and the structures built from it (filter index,
+cube, map grid, search index, host dimension, scatter sampler, review
+month partitions) are held in an immutable DatasetVersion.
+LiveDataset keeps the current version and a background thread that polls
+the data file's fingerprint (path, size, mtime). Once a change has settled
+and the file's content hash differs, the new snapshot is loaded and
+swapped in as a new version with a single reference assignment, so a
+rerun always sees one consistent version and never waits for a reload.
+
+When the new snapshot only adds or changes a small share of listings
+(matched by id and row hash), it is applied as a delta. The snapshot is
+still read and hashed in full, since it is the only record of what
+changed, but the new frame is the current one with the changed rows
+replaced and the new listings appended, so every position keeps its
+meaning. The filter index, cube, map grid and search index are patched
+for those positions only (see their updated() methods); the host
+dimension, scatter sampler and SQLite copy are rebuilt, all in the
+background before the swap.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from dashboard.cube import ListingCube
+from dashboard.data import load_frame
+from dashboard.filters import FilterIndex
+from dashboard.hosts import HostIndex
+from dashboard.partitions import load_review_partitions
+from dashboard.sampling import StratifiedSampler
+from dashboard.search import SearchIndex
+from dashboard.selection import patched
+from dashboard.spatial import SpatialGrid
+from dashboard.sql import SQLBackend
+from dashboard.warm import WARM_PATH, read_warm, write_warm
+from etl.storage import CSV_PATH, SNAPSHOT_PATH, file_digest, snapshot_fingerprint
+from etl.upsert import KEY, row_hashes
+
+POLL_SECONDS = float(os.environ.get('DASHBOARD_REFRESH_SECONDS', 5))
+# Above this share of changed listings a full rebuild is cheaper
+MAX_INCREMENTAL_SHARE = 0.25
+
+DERIVED = {
+    'filter_index': lambda version: FilterIndex(version.df),
+    'cube': lambda version: ListingCube(version.df, filter_index=version.filter_index),
+    'spatial_grid': lambda version: SpatialGrid(version.df),
+    'search_index': lambda version: SearchIndex(version.df),
+    'host_index': lambda version: HostIndex(version.df),
+    'sampler': lambda version: StratifiedSampler(version.df),
+    'sql_backend': lambda version: SQLBackend(version.df, token=version.token),
+    'review_partitions': lambda version: load_review_partitions(version.df, version.digest),
+}
+
+
+class DatasetVersion:
+    """One loaded snapshot and its derived structures, built on first use"""
+
+    def __init__(self, df, fingerprint, digest, number=1, change=None):
+        self.df = df
+        self.fingerprint = fingerprint
+        self.digest = digest
+        self.number = number
+        self.change = change or {'mode': 'initial', 'inserted': len(df), 'updated': 0}
+        self.loaded_at = pd.Timestamp.now()
+        self._derived = {}
+        self._hashes = None
+        self._lock = threading.Lock()
+
+    @property
+    def token(self):
+        """Identifies the data content (for binding result caches)"""
+        return self.digest
+
+    @property
+    def filter_index(self):
+        return self._get('filter_index')
+
+    @property
+    def cube(self):
+        return self._get('cube')
+
+    @property
+    def spatial_grid(self):
+        return self._get('spatial_grid')
+
+    @property
+    def search_index(self):
+        return self._get('search_index')
+
+    @property
+    def host_index(self):
+        return self._get('host_index')
+
+    @property
+    def sampler(self):
+        return self._get('sampler')
+
+    @property
+    def sql_backend(self):
+        return self._get('sql_backend')
+
+    @property
+    def review_partitions(self):
+        return self._get('review_partitions')
+
+    @property
+    def hashes(self):
+        """Row hashes in frame order (computed on the first refresh)"""
+        if self._hashes is None:
+            self._hashes = row_hashes(self.df)
+        return self._hashes
+
+    def built(self):
+        """Names of the derived structures built so far"""
+        return [name for name in DERIVED if name in self._derived]
+
+    def _get(self, name):
+        # Built once even when several sessions ask at the same time
+        if name not in self._derived:
+            with self._lock:
+                if name not in self._derived:
+                    self._derived[name] = DERIVED[name](self)
+        return self._derived[name]
+
+
+def align(current, df, key=KEY):
+    """
+    The changes from `current.df` to `df`, or None when they cannot be
+    applied as a delta.
+
+    Rows are matched on `key` when it is unique in both frames; otherwise
+    only unchanged rows can be matched, by row hash. Returns (row hashes in
+    the current order followed by the new listings, current positions
+    whose row changed, positions in `df` of those rows followed by the new
+    listings), or None when rows were removed, the columns differ, or too
+    many rows changed.
+    """
+    old = current.df
+    if list(df.columns) != list(old.columns):
+        return None
+    hashes = row_hashes(df)
+    if key in df.columns and df[key].is_unique and old[key].is_unique:
+        positions = pd.Index(df[key].to_numpy()).get_indexer(old[key].to_numpy())
+    else:
+        positions = _occurrences(hashes).get_indexer(_occurrences(current.hashes))
+    if (positions < 0).any():
+        return None
+
+    appended = np.ones(len(df), dtype=bool)
+    appended[positions] = False
+    inserted = np.flatnonzero(appended)
+    updated = np.flatnonzero(hashes[positions] != current.hashes)
+    if len(updated) + len(inserted) > MAX_INCREMENTAL_SHARE * max(len(old), 1):
+        return None
+    return (np.concatenate([hashes[positions], hashes[inserted]]), updated,
+            np.concatenate([positions[updated], inserted]))
+
+
+def patch_frame(old, df, updated, source):
+    """
+    `old` with the rows at `updated` replaced and new rows appended, both
+    taken from `df` at the positions in `source` (as returned by align())
+    """
+    changes = df.iloc[source]
+    n_rows = len(old) + len(source) - len(updated)
+    rows = np.concatenate([updated, np.arange(len(old), n_rows)])
+    columns = {}
+    for col in old.columns:
+        values, new_values = old[col], changes[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            categories = values.cat.categories
+            labels = pd.Index(new_values.dropna().unique()).difference(categories)
+            dtype = pd.CategoricalDtype(categories.append(labels), values.dtype.ordered) if len(labels) else values.dtype
+            codes = dtype.categories.get_indexer(new_values.astype(object))
+            column = pd.Categorical.from_codes(patched(values.cat.codes.to_numpy(), n_rows, rows, codes), dtype=dtype)
+        elif isinstance(values.dtype, np.dtype) and isinstance(new_values.dtype, np.dtype):
+            column = patched(values.to_numpy(), n_rows, rows, new_values.to_numpy())
+        else:
+            column = pd.concat([values, new_values.iloc[len(updated):]], ignore_index=True)
+            if len(updated):
+                column.iloc[updated] = new_values.iloc[:len(updated)].to_numpy()
+        columns[col] = column
+    return pd.DataFrame(columns)
+
+
+def _occurrences(hashes):
+    """(hash, n-th occurrence) pairs, so duplicate rows match one to one"""
+    counts = pd.Series(hashes).groupby(hashes).cumcount().to_numpy()
+    return pd.MultiIndex.from_arrays([hashes, counts])
+
+
+def _patched_structures(current, version, rows):
+    """Derived structures of `current` patched for the changed positions `rows` of `version.df`"""
+    built = current.built()
+    structures = {}
+    if 'filter_index' in built:
+        structures['filter_index'] = current.filter_index.updated(version.df, rows, current.df)
+    if 'cube' in built and 'filter_index' in structures:
+        structures['cube'] = current.cube.updated(version.df, rows, filter_index=structures['filter_index'])
+    if 'spatial_grid' in built:
+        structures['spatial_grid'] = current.spatial_grid.updated(version.df, rows)
+    if 'search_index' in built:
+        structures['search_index'] = current.search_index.updated(version.df, rows)
+    # None: the change does not fit the structure, which is built anew
+    return {name: value for name, value in structures.items() if value is not None}
+
+
+class LiveDataset:
+    """Current DatasetVersion plus a background watcher for data file changes"""
+
+    def __init__(self, snapshot_path=SNAPSHOT_PATH, csv_path=CSV_PATH, poll_seconds=POLL_SECONDS,
+                 warm_path=WARM_PATH):
+        self.snapshot_path = snapshot_path
+        self.csv_path = csv_path
+        self.poll_seconds = poll_seconds
+        self.warm_path = warm_path
+        self.last_error = None
+        self._version = None
+        self._pending = None
+        self._load_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def current(self):
+        """The current version (loaded on first call); None while no data file exists"""
+        if self._version is None:
+            with self._load_lock:
+                if self._version is None:
+                    self._version = self._load_initial()
+        self._start_watcher()
+        return self._version
+
+    def refresh(self):
+        """
+        Load the data file if it changed since the current version.
+
+        Returns the new version, or None when nothing changed.
+        """
+        with self._load_lock:
+            fingerprint = snapshot_fingerprint(self.snapshot_path, self.csv_path)
+            current = self._version
+            if fingerprint is None or (current is not None and fingerprint == current.fingerprint):
+                return None
+
+            digest = file_digest(fingerprint[0])
+            if current is not None and digest == current.digest:
+                # Rewritten with identical content: nothing to reload
+                current.fingerprint = fingerprint
+                return None
+            if current is None:
+                self._version = self._load_initial()
+                return self._version
+
+            started = time.perf_counter()
+            version = self._next_version(current, load_frame(self.snapshot_path, self.csv_path),
+                                         fingerprint, digest)
+            version.change['seconds'] = round(time.perf_counter() - started, 3)
+            # Atomic swap: reruns pick up the new version on their next read
+            self._version = version
+            self._save_warm(version)
+            return version
+
+    def stop(self):
+        """Stop the background watcher"""
+        self._stop.set()
+
+    def _load_initial(self):
+        """First version: from the warm snapshot when it matches the data file, else cold"""
+        fingerprint = snapshot_fingerprint(self.snapshot_path, self.csv_path)
+        if fingerprint is None:
+            return None
+        started = time.perf_counter()
+        digest = file_digest(fingerprint[0])
+        warm = read_warm(digest, self.warm_path) if self.warm_path else None
+        if warm is not None:
+            df, filter_index = warm
+            version = DatasetVersion(df, fingerprint, digest)
+            version._derived['filter_index'] = filter_index
+            version.change['source'] = 'warm snapshot'
+        else:
+            version = DatasetVersion(load_frame(self.snapshot_path, self.csv_path), fingerprint, digest)
+            version.change['source'] = os.path.basename(fingerprint[0])
+            # The next start is warm; written off the startup path
+            threading.Thread(target=self._save_warm, args=(version,), daemon=True).start()
+        version.change['seconds'] = round(time.perf_counter() - started, 3)
+        return version
+
+    def _save_warm(self, version):
+        if not self.warm_path:
+            return
+        try:
+            write_warm(version.df, version.digest, version.filter_index, self.warm_path)
+        except OSError:
+            # Startup just stays cold
+            pass
+
+    def _next_version(self, current, df, fingerprint, digest):
+        """New version from a changed snapshot, patching `current` where possible"""
+        delta = align(current, df)
+        if delta is None:
+            version = DatasetVersion(df, fingerprint, digest, current.number + 1, change={
+                'mode': 'full', 'inserted': len(df), 'updated': 0,
+            })
+        else:
+            hashes, updated, source = delta
+            version = DatasetVersion(patch_frame(current.df, df, updated, source), fingerprint, digest,
+                                     current.number + 1, change={
+                                         'mode': 'incremental', 'inserted': len(source) - len(updated),
+                                         'updated': len(updated),
+                                     })
+            version._hashes = hashes
+            changed = np.concatenate([updated, np.arange(len(current.df), len(version.df))])
+            structures = _patched_structures(current, version, changed)
+            version._derived.update(structures)
+            version.change['patched'] = sorted(structures)
+
+        # Structures in use by the current version are ready before the swap
+        for name in current.built():
+            getattr(version, name)
+        return version
+
+    def _start_watcher(self):
+        if self.poll_seconds <= 0 or self._thread is not None:
+            return
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._watch, name='dashboard-data-watcher', daemon=True)
+                self._thread.start()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_seconds):
+            fingerprint = snapshot_fingerprint(self.snapshot_path, self.csv_path)
+            current = self._version
+            if current is not None and fingerprint == current.fingerprint:
+                continue
+            # Only reload once the file has stopped changing for one interval
+            if fingerprint != self._pending:
+                self._pending = fingerprint
+                continue
+            try:
+                self.refresh()
+                self.last_error = None
+            except Exception as exc:  # retried on the next poll
+                self.last_error = f"{type(exc).__name__}: {exc}"
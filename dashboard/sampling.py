@@ -0,0 +1,112 @@
+"""
+Stable stratified samples for the dashboard's scatter plots.
+
+Plotting every selected listing is slow to serialize and draw, so the
+scatters show a sample. A fresh random sample on each rerun makes the points
+jump around and can drop rare categories entirely. StratifiedSampler is
+built once per data version instead:
+
+- each listing gets a fixed priority from a hash of its id, and the frame
+  is ordered by (stratum, priority) once;
+- a sample of `n` rows takes the lowest-priority rows of each stratum
+  (review activity x price category), at least `min_per_stratum` from every
+  non-empty stratum as far as `n` allows and the rest proportional to size.
+
+The per-stratum counts are not rounded from quotas for each `n` (largest
+remainder rounding can give a stratum fewer rows for a larger `n`, the
+Alabama paradox). Instead the selected rows are put in one fixed sequence,
+see take_order(), and a sample of `n` is its first `n` rows.
+
+The same data and filter state always give the same sample, and a larger
+sample of the same selection contains the smaller one, so refining a
+preview only adds points (progressive mode).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+STRATA = ['review_activity', 'price_category']
+KEY = 'id'
+MIN_PER_STRATUM = 20
+
+# Points per scatter: default view, progressive preview and refined view
+SCATTER_POINTS = 1000
+PREVIEW_POINTS = int(os.environ.get('DASHBOARD_PREVIEW_POINTS', 300))
+REFINED_POINTS = int(os.environ.get('DASHBOARD_REFINED_POINTS', 10_000))
+
+
+class StratifiedSampler:
+    """Reproducible stratified samples of any row selection"""
+
+    def __init__(self, df, strata=STRATA, key=KEY, min_per_stratum=MIN_PER_STRATUM):
+        self.n_rows = len(df)
+        self.min_per_stratum = min_per_stratum
+        strata = [col for col in strata if col in df.columns]
+        if strata:
+            stratum = df.groupby(strata, observed=True, dropna=False, sort=True).ngroup().to_numpy()
+        else:
+            stratum = np.zeros(len(df), dtype=np.int64)
+        self.n_strata = int(stratum.max()) + 1 if len(df) else 0
+        # Hash of the listing id: a listing keeps its rank across reruns and data refreshes
+        if key in df.columns:
+            priority = pd.util.hash_array(df[key].to_numpy())
+        else:
+            priority = np.arange(len(df), dtype=np.uint64)
+        self.order = np.lexsort((priority, stratum))
+        self.stratum = stratum[self.order]
+
+    def sample(self, rows=None, n=SCATTER_POINTS):
+        """Sorted positions of up to `n` of `rows` (None for all rows), every row when fewer"""
+        if rows is None:
+            ordered, strata = self.order, self.stratum
+        else:
+            member = np.zeros(self.n_rows, dtype=bool)
+            member[rows] = True
+            keep = member[self.order]
+            ordered, strata = self.order[keep], self.stratum[keep]
+        if len(ordered) <= n:
+            return np.sort(ordered)
+
+        # Rows are grouped by stratum, lowest priority first within each
+        counts = np.bincount(strata, minlength=self.n_strata)
+        starts = np.cumsum(counts) - counts
+        take = allocate(counts, n, self.min_per_stratum)
+        picked = [ordered[start:start + k] for start, k in zip(starts, take) if k]
+        return np.sort(np.concatenate(picked))
+
+
+def allocate(counts, n, minimum=MIN_PER_STRATUM):
+    """
+    Rows to take from each stratum for a sample of `n`.
+
+    The strata of the first `n` rows of take_order(), so no stratum ever
+    gets fewer rows for a larger `n`.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    if counts.sum() <= n:
+        return counts
+    strata = np.repeat(np.arange(len(counts)), counts)
+    return np.bincount(strata[take_order(counts, minimum)[:n]], minlength=len(counts))
+
+
+def take_order(counts, minimum=MIN_PER_STRATUM):
+    """
+    Order in which a growing sample takes rows grouped by stratum.
+
+    Positions index rows grouped by stratum (`counts` rows each, lowest
+    priority first). The strata take turns for their first `minimum` rows,
+    so every non-empty stratum is covered evenly as far as the sample
+    allows. After that the k-th further row of a stratum with `left` rows
+    beyond the minimum comes at (k + 0.5) / left (the Sainte-Lague divisor
+    method), which splits the rest in proportion to stratum size. Ties go
+    to the lower stratum.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    strata = np.repeat(np.arange(len(counts)), counts)
+    rank = np.arange(len(strata)) - np.repeat(np.cumsum(counts) - counts, counts)
+    beyond = rank >= minimum
+    score = rank.astype('float64')
+    score[beyond] = (rank[beyond] - minimum + 0.5) / (counts[strata[beyond]] - minimum)
+    return np.lexsort((strata, score, beyond))
@@ -0,0 +1,174 @@
+"""
+Trigram search index for the Data Explorer.
+
+The search box used to run a case-insensitive `str.contains` over every
+listing name and neighbourhood on each rerun. Instead, every lower-cased
+text is split into overlapping three-character grams once per loaded
+dataset, with a sorted array of row positions per gram. A search term
+only has to intersect the posting arrays of its own grams; the few
+candidates left are then checked with a vectorized substring test
+(`np.char.find`), so results are exactly the rows the literal substring
+search would return. A term shorter than a gram takes its candidates from
+the posting arrays of the grams that contain it, plus the few texts too
+short to have a gram. Matches are ranked per column on the candidates
+only, so no search allocates or scans an array over every row.
+"""
+
+import copy
+
+import numpy as np
+
+SEARCH_COLUMNS = ['name', 'neighbourhood']
+GRAM_SIZE = 3
+
+
+class SearchIndex:
+    """Inverted index from trigrams to sorted row positions"""
+
+    def __init__(self, df, columns=SEARCH_COLUMNS, n=GRAM_SIZE):
+        self.n = n
+        self.n_rows = len(df)
+        self.columns = [col for col in columns if col in df.columns]
+        self.texts = {}
+        self.postings = {}
+        self.short = {}
+        for col in self.columns:
+            self.texts[col] = _lower(df[col])
+            self.short[col] = _short_rows(self.texts[col], np.arange(self.n_rows), n)
+
+            postings = {}
+            for row, text in enumerate(self.texts[col]):
+                for gram in _grams(text, n):
+                    postings.setdefault(gram, []).append(row)
+            self.postings[col] = {
+                gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()
+            }
+
+    def updated(self, df, rows):
+        """
+        Index for `df` where only the positions in `rows` changed.
+
+        `df` keeps every indexed position of the old frame and may append
+        new ones (all of which must be in `rows`). Only the grams a changed
+        text gained or lost are touched; the other posting arrays are shared
+        with this index, which is left unchanged.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        index = copy.copy(self)
+        index.n_rows = len(df)
+        index.texts = {}
+        index.postings = {}
+        index.short = {}
+        for col in self.columns:
+            texts = np.concatenate([
+                self.texts[col], np.full(len(df) - self.n_rows, '', dtype=object)
+            ])
+            removed, added = {}, {}
+            for row, text in zip(rows.tolist(), _lower(df[col].iloc[rows])):
+                old, new = _grams(texts[row], self.n), _grams(text, self.n)
+                for gram in old - new:
+                    removed.setdefault(gram, []).append(row)
+                for gram in new - old:
+                    added.setdefault(gram, []).append(row)
+                texts[row] = text
+
+            postings = dict(self.postings[col])
+            for gram in removed.keys() | added.keys():
+                positions = postings.get(gram, np.empty(0, dtype=np.int32))
+                if gram in removed:
+                    positions = positions[~np.isin(positions, removed[gram])]
+                if gram in added:
+                    positions = np.union1d(positions, np.array(added[gram], dtype=np.int32))
+                if len(positions):
+                    postings[gram] = positions
+                else:
+                    postings.pop(gram, None)
+            index.texts[col] = texts
+            index.postings[col] = postings
+            unchanged = self.short[col][~np.isin(self.short[col], rows)]
+            index.short[col] = np.union1d(unchanged, _short_rows(texts, rows, self.n))
+        return index
+
+    @property
+    def n_grams(self):
+        """Number of distinct grams across all indexed columns"""
+        return sum(len(postings) for postings in self.postings.values())
+
+    def candidates(self, term, column, rows=None):
+        """
+        Positions that contain every gram of `term` in `column`.
+
+        A term shorter than a gram gets every position with a gram that
+        contains it, or with a text shorter than a gram. Callers always
+        verify candidates.
+        """
+        postings = self.postings[column]
+        if len(term) < self.n:
+            lists = [arr for gram, arr in postings.items() if term in gram] + [self.short[column]]
+            found = np.unique(np.concatenate(lists))
+            if rows is not None:
+                found = np.intersect1d(found, rows, assume_unique=True)
+            return found
+
+        grams = _grams(term, self.n)
+        # Rarest grams first so the running intersection shrinks quickly
+        lists = sorted((postings.get(gram) for gram in grams), key=lambda arr: 0 if arr is None else len(arr))
+        if lists[0] is None:
+            return np.empty(0, dtype=np.int32)
+        found = lists[0]
+        for arr in lists[1:]:
+            found = np.intersect1d(found, arr, assume_unique=True)
+            if not len(found):
+                return found
+        if rows is not None:
+            found = np.intersect1d(found, rows, assume_unique=True)
+        return found
+
+    def search(self, term, rows=None):
+        """
+        Positions whose name or neighbourhood contains `term` (case-insensitive).
+
+        `rows` restricts the search to a filter selection (sorted positions,
+        None for all rows). Matches are ranked: names starting with the term,
+        then other name matches, then neighbourhood-only matches, each group
+        in dataset order.
+        """
+        term = term.lower()
+        if rows is not None:
+            rows = np.asarray(rows)
+        matched, ranks = [np.empty(0, dtype=np.intp)], [np.empty(0, dtype=np.int8)]
+
+        for position, col in enumerate(self.columns):
+            candidates = self.candidates(term, col, rows)
+            if position:
+                # Rows already matched in an earlier column keep that rank
+                candidates = candidates[~np.isin(candidates, np.concatenate(matched))]
+            if not len(candidates):
+                continue
+            found = np.char.find(self.texts[col][candidates].astype(str), term)
+            hits = found >= 0
+            rank = np.full(hits.sum(), position + 1, dtype=np.int8)
+            if position == 0:
+                rank[found[hits] == 0] = 0
+            matched.append(candidates[hits].astype(np.intp))
+            ranks.append(rank)
+
+        matched, ranks = np.concatenate(matched), np.concatenate(ranks)
+        return matched[np.lexsort((matched, ranks))]
+
+
+def _lower(values):
+    """Lower-cased strings of a column as an object array ('' for missing)"""
+    return values.astype('object').where(values.notna(), '').astype(str).str.lower().to_numpy(dtype=object)
+
+
+def _short_rows(texts, rows, n):
+    """Positions from `rows` whose text in `texts` is shorter than a gram"""
+    rows = np.asarray(rows, dtype=np.int32)
+    lengths = np.fromiter((len(texts[row]) for row in rows.tolist()), dtype=np.int64, count=len(rows))
+    return rows[lengths < n]
+
+
+def _grams(text, n):
+    """Distinct overlapping n-character substrings of `text`"""
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
@@ -0,0 +1,602 @@
+"""
+Dashboard sections as separately callable units.
+
+Each function computes the aggregates and Plotly figures for one part of
+the dashboard from the selected rows (a Selection over the shared frame,
+see dashboard/selection.py) and the matching cube slice, and returns them
+in a dict. Only the columns a chart plots are read for the selected rows.
+Nothing here calls Streamlit, so results can be cached per filter state and
+each section can be computed on its own.
+
+The slice is a CubeSlice by default or a SQLSlice with the SQL backend
+(dashboard/sql.py). Aggregates that need individual rows (distinct hosts,
+top hosts, medians) are pushed down to the slice when it can answer them
+and computed from the selected rows otherwise. Host aggregates come from
+the host dimension (dashboard/hosts.py) when the section is given one, and
+the scatter plots draw stable stratified samples (dashboard/sampling.py).
+"""
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go  # Already loaded by Streamlit
+
+# plotly.express is imported inside the functions that use it: it is slow to
+# import and only needed once a section is rendered
+
+from dashboard.binning import box_stats, histogram
+from dashboard.cube import mean
+from dashboard.sampling import SCATTER_POINTS
+from dashboard.spatial import OVERVIEW_ZOOMS, viewport_bounds
+
+PRICE_CATEGORY_COLORS = {
+    'Budget': '#3498db',
+    'Economy': '#2ecc71',
+    'Mid-Range': '#f39c12',
+    'Premium': '#e74c3c',
+    'Luxury': '#9b59b6'
+}
+REVIEW_ACTIVITY_COLORS = {'High': '#2ecc71', 'Medium': '#f39c12', 'Low': '#e74c3c'}
+
+MAP_COLUMNS = ['latitude', 'longitude', 'price_category', 'price', 'name', 'room_type', 'neighbourhood']
+TOP_HOST_COLUMNS = ['host_id', 'host_name', 'id', 'price', 'number_of_reviews', 'availability_365']
+
+
+def kpis(selection, cube_slice, host_index=None):
+    """Key performance indicators for the selection"""
+    totals = cube_slice.totals()
+    overall = cube_slice.cube.slice({}).totals()
+    return {
+        'count': totals['count'],
+        'total_count': cube_slice.cube.n_rows,
+        'avg_price': totals['price'] / totals['count'],
+        'overall_avg_price': overall['price'] / overall['count'],
+        'total_reviews': totals['reviews'],
+        'avg_availability': totals['availability'] / totals['count'],
+        'unique_hosts': (
+            host_index.unique(selection.rows) if host_index is not None
+            else _row_aggregate(cube_slice, 'unique_hosts', selection)
+        ),
+    }
+
+
+def unique_hosts(selection):
+    """Distinct host IDs (distinct counts cannot be rolled up from the cube)"""
+    return selection['host_id'].nunique()
+
+
+def top_hosts(selection, n=10):
+    """Hosts with the most listings: name, listings, mean price, reviews and mean availability"""
+    # Grouped by host_id: different hosts may share a name
+    return selection.frame(TOP_HOST_COLUMNS).groupby('host_id').agg({
+        'host_name': 'first',
+        'id': 'count',
+        'price': 'mean',
+        'number_of_reviews': 'sum',
+        'availability_365': 'mean'
+    }).sort_values('id', ascending=False, kind='stable').head(n).reset_index(drop=True)
+
+
+def median_price(selection, by):
+    """Median price per value of `by` (medians are not decomposable)"""
+    return selection['price'].groupby(selection[by], observed=True).median()
+
+
+def _row_aggregate(cube_slice, name, selection, **kwargs):
+    """Row-level aggregate `name`, from the slice when it supports it (SQL backend)"""
+    pushed_down = getattr(cube_slice, name, None)
+    if pushed_down is not None:
+        return pushed_down(**kwargs)
+    return ROW_AGGREGATES[name](selection, **kwargs)
+
+
+def _scatter_sample(selection, sampler, points):
+    """Up to `points` selected rows, the same ones on every rerun (stratified with a sampler)"""
+    if sampler is None:
+        return selection.sample(points, random_state=0)
+    return selection.take(sampler.sample(selection.rows, points))
+
+
+def geographic(selection, cube_slice, grid=None, zoom=10, max_points=5000):
+    """
+    Listings map plus borough and room type pies.
+
+    With a SpatialGrid, the map details the visible area at `zoom`: it
+    draws individual listings when at most `max_points` are visible and one
+    marker per grid cell (count and mean price) otherwise. Listings outside
+    that area are drawn as coarser grey cells; 'map_outside' is how many
+    listings they hold (0 without a grid).
+    """
+    outside_count = 0
+    if grid is None:
+        fig_map = _points_map(selection.frame(MAP_COLUMNS), zoom=zoom)
+    else:
+        rows = selection.positions()
+        if len(rows):
+            center = (float(selection['latitude'].mean()), float(selection['longitude'].mean()))
+        else:
+            center = (grid.lat0, grid.lon0)
+        visible, outside = grid.split(rows, viewport_bounds(center, zoom))
+        if len(visible) <= max_points:
+            fig_map = _points_map(selection.take(visible).frame(MAP_COLUMNS), zoom=zoom, center=center)
+        else:
+            fig_map = _cells_map(grid.aggregate(visible, zoom), zoom=zoom, center=center)
+        if len(outside):
+            overview = grid.aggregate(outside, zoom - OVERVIEW_ZOOMS)
+            outside_count = int(overview['listings'].sum())
+            _add_overview(fig_map, overview)
+
+    # Neighbourhood distribution
+    neighbourhood_counts = cube_slice.rollup('neighbourhood_group')['count'].sort_values(ascending=False)
+
+    fig_neighbourhood = go.Figure(data=[go.Pie(
+        labels=neighbourhood_counts.index,
+        values=neighbourhood_counts.values,
+        hole=0.4,
+        marker_colors=['#FF5A5F', '#00A699', '#FC642D', '#484848', '#767676']
+    )])
+    fig_neighbourhood.update_layout(
+        title="Listings by Borough",
+        height=250,
+        margin=dict(t=40, b=0, l=0, r=0)
+    )
+
+    # Room type distribution
+    room_counts = cube_slice.rollup('room_type')['count'].sort_values(ascending=False)
+
+    fig_room = go.Figure(data=[go.Pie(
+        labels=room_counts.index,
+        values=room_counts.values,
+        hole=0.4,
+        marker_colors=['#FF5A5F', '#00A699', '#FC642D']
+    )])
+    fig_room.update_layout(
+        title="Listings by Room Type",
+        height=250,
+        margin=dict(t=40, b=0, l=0, r=0)
+    )
+
+    return {'map': fig_map, 'map_outside': outside_count, 'boroughs': fig_neighbourhood, 'room_types': fig_room}
+
+
+def _points_map(listings, zoom, center=None):
+    """One marker per listing, coloured by price category"""
+    import plotly.express as px
+
+    # Interactive map
+    fig_map = px.scatter_mapbox(
+        listings,
+        lat='latitude',
+        lon='longitude',
+        color='price_category',
+        size='price',
+        hover_name='name',
+        hover_data={
+            'price': ':$,.2f',
+            'room_type': True,
+            'neighbourhood': True,
+            'latitude': False,
+            'longitude': False
+        },
+        color_discrete_map=PRICE_CATEGORY_COLORS,
+        zoom=zoom,
+        center=None if center is None else {'lat': center[0], 'lon': center[1]},
+        height=500,
+        title="Listings Map by Price Category"
+    )
+    fig_map.update_layout(mapbox_style="open-street-map")
+    fig_map.update_layout(margin={"r":0,"t":40,"l":0,"b":0})
+    return fig_map
+
+
+def _cells_map(cells, zoom, center):
+    """One marker per grid cell, sized by listing count and coloured by mean price"""
+    import plotly.express as px
+
+    fig_map = px.scatter_mapbox(
+        cells,
+        lat='latitude',
+        lon='longitude',
+        size='listings',
+        color='avg_price',
+        hover_data={
+            'listings': ':,',
+            'avg_price': ':$,.2f',
+            'latitude': False,
+            'longitude': False
+        },
+        labels={'listings': 'Listings', 'avg_price': 'Avg Price ($)'},
+        color_continuous_scale='YlOrRd',
+        zoom=zoom,
+        center={'lat': center[0], 'lon': center[1]},
+        height=500,
+        title=f"Listings Map: {int(cells['listings'].sum()):,} listings in {len(cells):,} grid cells"
+    )
+    fig_map.update_layout(mapbox_style="open-street-map")
+    fig_map.update_layout(margin={"r":0,"t":40,"l":0,"b":0})
+    return fig_map
+
+
+def _add_overview(fig_map, cells):
+    """Grey markers for the grid cells outside the detailed area, sized by listing count"""
+    if cells.empty:
+        return
+    counts = cells['listings'].to_numpy()
+    fig_map.add_trace(go.Scattermapbox(
+        lat=cells['latitude'],
+        lon=cells['longitude'],
+        mode='markers',
+        marker=dict(size=6 + 14 * np.sqrt(counts / counts.max()), color='#767676', opacity=0.5),
+        customdata=np.column_stack([counts, cells['avg_price'].to_numpy()]),
+        hovertemplate='%{customdata[0]:,} listings outside the view<br>Avg $%{customdata[1]:,.2f}<extra></extra>',
+        name='Outside the view',
+        showlegend=False
+    ))
+
+
+def pricing(selection, cube_slice):
+    """Price distribution, box plot, price categories and borough averages"""
+    # Histogram and box plot are binned / summarized here, so the browser
+    # receives a fixed-size payload (see dashboard/binning.py)
+    prices = selection['price']
+
+    # Price distribution histogram
+    bins = histogram(prices)
+    fig_price_dist = go.Figure(data=[go.Bar(
+        x=(bins['left'] + bins['right']) / 2,
+        y=bins['count'],
+        width=bins['right'] - bins['left'],
+        customdata=bins[['left', 'right']].to_numpy(),
+        hovertemplate='$%{customdata[0]:,.0f} - $%{customdata[1]:,.0f}<br>%{y:,} listings<extra></extra>',
+        marker_color='#FF5A5F'
+    )])
+    fig_price_dist.update_layout(
+        title="Price Distribution",
+        xaxis_title="Price per Night ($)",
+        yaxis_title="Number of Listings",
+        bargap=0,
+        height=400,
+        showlegend=False
+    )
+
+    # Price by room type box plot
+    fig_price_room = go.Figure()
+    colors = ['#FF5A5F', '#00A699', '#FC642D']
+    for i, stats in enumerate(box_stats(prices, selection['room_type']).itertuples()):
+        color = colors[i % len(colors)]
+        fig_price_room.add_trace(go.Box(
+            x=[stats.group],
+            q1=[stats.q1],
+            median=[stats.median],
+            q3=[stats.q3],
+            lowerfence=[stats.lowerfence],
+            upperfence=[stats.upperfence],
+            mean=[stats.mean],
+            name=stats.group,
+            marker_color=color
+        ))
+        if len(stats.outliers):
+            fig_price_room.add_trace(go.Scatter(
+                x=[stats.group] * len(stats.outliers),
+                y=stats.outliers,
+                mode='markers',
+                marker=dict(color=color, size=4),
+                name=stats.group,
+                hovertemplate='$%{y:,.0f}<extra>outlier</extra>'
+            ))
+    fig_price_room.update_layout(
+        title="Price Distribution by Room Type",
+        xaxis_title="Room Type",
+        yaxis_title="Price per Night ($)",
+        height=400,
+        showlegend=False
+    )
+
+    # Price category counts
+    price_cat_counts = cube_slice.rollup('price_category')['count']
+
+    fig_price_cat = go.Figure(data=[go.Bar(
+        x=price_cat_counts.index,
+        y=price_cat_counts.values,
+        marker_color=['#3498db', '#2ecc71', '#f39c12', '#e74c3c', '#9b59b6'],
+        text=price_cat_counts.values,
+        textposition='outside'
+    )])
+    fig_price_cat.update_layout(
+        title="Listings by Price Category",
+        xaxis_title="Price Category",
+        yaxis_title="Number of Listings",
+        height=400
+    )
+
+    # Average price by neighbourhood
+    avg_price_neighbourhood = mean(cube_slice.rollup('neighbourhood_group'), 'price').sort_values(ascending=False)
+
+    fig_avg_price = go.Figure(data=[go.Bar(
+        y=avg_price_neighbourhood.index,
+        x=avg_price_neighbourhood.values,
+        orientation='h',
+        marker_color='#FF5A5F',
+        text=[f'${x:.2f}' for x in avg_price_neighbourhood.values],
+        textposition='outside'
+    )])
+    fig_avg_price.update_layout(
+        title="Average Price by Borough",
+        xaxis_title="Average Price ($)",
+        yaxis_title="Borough",
+        height=400
+    )
+
+    return {
+        'distribution': fig_price_dist,
+        'by_room_type': fig_price_room,
+        'categories': fig_price_cat,
+        'by_borough': fig_avg_price,
+    }
+
+
+def reviews(selection, cube_slice, sampler=None, points=SCATTER_POINTS):
+    """Review activity, activity by room type, volume tiers and reviews vs price"""
+    import plotly.express as px
+
+    # Review activity distribution
+    review_activity_counts = cube_slice.rollup('review_activity')['count'].sort_values(ascending=False)
+
+    fig_review_activity = go.Figure(data=[go.Pie(
+        labels=review_activity_counts.index,
+        values=review_activity_counts.values,
+        hole=0.4,
+        marker_colors=['#e74c3c', '#f39c12', '#2ecc71'],
+        textinfo='label+percent',
+        textposition='outside'
+    )])
+    fig_review_activity.update_layout(
+        title="Review Activity Levels",
+        height=400
+    )
+
+    # Reviews by room type
+    review_room_cross = cube_slice.rollup(['room_type', 'review_activity'])['count'].reset_index()
+
+    fig_review_room = px.bar(
+        review_room_cross,
+        x='room_type',
+        y='count',
+        color='review_activity',
+        title="Review Activity by Room Type",
+        labels={'count': 'Number of Listings', 'room_type': 'Room Type'},
+        color_discrete_map=REVIEW_ACTIVITY_COLORS,
+        barmode='group'
+    )
+    fig_review_room.update_layout(height=400)
+
+    # Review volume tier distribution
+    review_tier_counts = cube_slice.rollup('review_volume_tier')['count']
+
+    fig_review_tier = go.Figure(data=[go.Bar(
+        x=review_tier_counts.index,
+        y=review_tier_counts.values,
+        marker_color=['#3498db', '#2ecc71', '#f39c12', '#e74c3c'],
+        text=review_tier_counts.values,
+        textposition='outside'
+    )])
+    fig_review_tier.update_layout(
+        title="Review Volume Tiers",
+        xaxis_title="Tier",
+        yaxis_title="Number of Listings",
+        height=400
+    )
+
+    # Scatter: Reviews vs Price (sampled for performance)
+    sample = _scatter_sample(selection, sampler, points)
+    fig_reviews_price = px.scatter(
+        sample.frame(['number_of_reviews', 'price', 'review_activity']),
+        x='number_of_reviews',
+        y='price',
+        color='review_activity',
+        title="Reviews vs Price Relationship",
+        labels={'number_of_reviews': 'Total Reviews', 'price': 'Price ($)'},
+        color_discrete_map=REVIEW_ACTIVITY_COLORS,
+        opacity=0.6,
+        height=400
+    )
+
+    return {
+        'activity': fig_review_activity,
+        'activity_by_room_type': fig_review_room,
+        'volume_tiers': fig_review_tier,
+        'reviews_vs_price': fig_reviews_price,
+        'scatter_points': (len(sample), len(selection)),
+    }
+
+
+def hosts(selection, cube_slice, host_index=None):
+    """Host experience, rental duration, top hosts and new vs established"""
+    # Host experience distribution
+    host_exp_counts = cube_slice.rollup('host_experience')['count'].sort_values(ascending=False)
+
+    fig_host_exp = go.Figure(data=[go.Pie(
+        labels=host_exp_counts.index,
+        values=host_exp_counts.values,
+        hole=0.4,
+        marker_colors=['#3498db', '#2ecc71', '#f39c12'],
+        textinfo='label+percent',
+        textposition='outside'
+    )])
+    if host_index is not None:
+        # Distinct hosts per level, from the host dimension
+        host_counts = host_index.experience(selection.rows).reindex(host_exp_counts.index, fill_value=0)
+        fig_host_exp.update_traces(
+            customdata=host_counts.values,
+            hovertemplate='%{label}<br>%{value:,} listings<br>%{customdata:,} hosts<extra></extra>'
+        )
+    fig_host_exp.update_layout(
+        title="Host Experience Levels",
+        height=400
+    )
+
+    # Rental duration type distribution
+    rental_duration_counts = cube_slice.rollup('rental_duration_type')['count']
+
+    fig_rental_duration = go.Figure(data=[go.Bar(
+        x=rental_duration_counts.index,
+        y=rental_duration_counts.values,
+        marker_color=['#3498db', '#2ecc71', '#f39c12', '#e74c3c'],
+        text=rental_duration_counts.values,
+        textposition='outside'
+    )])
+    fig_rental_duration.update_layout(
+        title="Rental Duration Strategy",
+        xaxis_title="Duration Type",
+        yaxis_title="Number of Listings",
+        height=400
+    )
+
+    # Top hosts analysis
+    if host_index is not None:
+        hosts_table = host_index.top(selection.rows, n=10)
+    else:
+        hosts_table = _row_aggregate(cube_slice, 'top_hosts', selection, n=10)
+
+    hosts_table.columns = ['Host Name', 'Total Listings', 'Avg Price', 'Total Reviews', 'Avg Availability']
+    hosts_table['Avg Price'] = hosts_table['Avg Price'].apply(lambda x: f'${x:.2f}')
+    hosts_table['Avg Availability'] = hosts_table['Avg Availability'].apply(lambda x: f'{x:.0f} days')
+
+    # Host experience vs pricing
+    avg_price_by_exp = mean(cube_slice.rollup('host_experience'), 'price').sort_values(ascending=False)
+
+    fig_price_exp = go.Figure(data=[go.Bar(
+        y=avg_price_by_exp.index,
+        x=avg_price_by_exp.values,
+        orientation='h',
+        marker_color='#FF5A5F',
+        text=[f'${x:.2f}' for x in avg_price_by_exp.values],
+        textposition='outside'
+    )])
+    fig_price_exp.update_layout(
+        title="Avg Price by Host Experience",
+        xaxis_title="Average Price ($)",
+        yaxis_title="Host Experience",
+        height=350
+    )
+
+    # New vs established listings
+    totals = cube_slice.totals()
+    new_listings_pct = (totals['new_listings'] / totals['count']) * 100
+    established_pct = 100 - new_listings_pct
+
+    fig_new_listings = go.Figure(data=[go.Pie(
+        labels=['Established Listings', 'New Listings (0 Reviews)'],
+        values=[established_pct, new_listings_pct],
+        marker_colors=['#2ecc71', '#e74c3c'],
+        textinfo='label+percent',
+        hole=0.4
+    )])
+    fig_new_listings.update_layout(
+        title="New vs Established Listings",
+        height=350
+    )
+
+    return {
+        'experience': fig_host_exp,
+        'rental_duration': fig_rental_duration,
+        'top_hosts': hosts_table,
+        'price_by_experience': fig_price_exp,
+        'new_vs_established': fig_new_listings,
+    }
+
+
+def trends(selection, cube_slice, sampler=None, points=SCATTER_POINTS):
+    """Availability, price vs availability, market matrix and borough summary"""
+    import plotly.express as px
+
+    # Availability category distribution
+    avail_cat_counts = cube_slice.rollup('availability_category')['count']
+
+    fig_avail_cat = go.Figure(data=[go.Bar(
+        x=avail_cat_counts.index,
+        y=avail_cat_counts.values,
+        marker_color=['#e74c3c', '#f39c12', '#2ecc71', '#3498db'],
+        text=avail_cat_counts.values,
+        textposition='outside'
+    )])
+    fig_avail_cat.update_layout(
+        title="Availability Distribution",
+        xaxis_title="Availability Category",
+        yaxis_title="Number of Listings",
+        height=400
+    )
+
+    # Price vs Availability relationship (sampled for performance)
+    sample = _scatter_sample(selection, sampler, points)
+    fig_price_avail = px.scatter(
+        sample.frame(['availability_365', 'price', 'price_category']),
+        x='availability_365',
+        y='price',
+        color='price_category',
+        title="Price vs Availability Relationship",
+        labels={'availability_365': 'Availability (days/year)', 'price': 'Price ($)'},
+        color_discrete_map=PRICE_CATEGORY_COLORS,
+        opacity=0.6,
+        height=400
+    )
+
+    # Create heatmap of room type vs neighbourhood
+    market_matrix = cube_slice.rollup(
+        ['neighbourhood_group', 'room_type']
+    )['count'].unstack(fill_value=0)
+
+    fig_matrix = go.Figure(data=go.Heatmap(
+        z=market_matrix.values,
+        x=market_matrix.columns,
+        y=market_matrix.index,
+        colorscale='YlOrRd',
+        text=market_matrix.values,
+        texttemplate='%{text}',
+        textfont={"size": 12},
+        colorbar=dict(title="Listings")
+    ))
+    fig_matrix.update_layout(
+        title="Listings Distribution: Borough vs Room Type",
+        xaxis_title="Room Type",
+        yaxis_title="Borough",
+        height=400
+    )
+
+    # Summary statistics table
+    borough_cells = cube_slice.rollup('neighbourhood_group')
+    summary_stats = pd.DataFrame({
+        'Total Listings': borough_cells['count'],
+        'Avg Price': mean(borough_cells, 'price'),
+        'Median Price': _row_aggregate(cube_slice, 'median_price', selection, by='neighbourhood_group'),
+        'Avg Reviews': mean(borough_cells, 'reviews'),
+        'Avg Availability': mean(borough_cells, 'availability'),
+        'Avg Reviews/Month': mean(borough_cells, 'reviews_per_month')
+    }).round(2)
+    summary_stats.index.name = 'neighbourhood_group'
+    summary_stats = summary_stats.reset_index()
+
+    return {
+        'availability': fig_avail_cat,
+        'price_vs_availability': fig_price_avail,
+        'market_matrix': fig_matrix,
+        'summary': summary_stats,
+        'scatter_points': (len(sample), len(selection)),
+    }
+
+
+# Row-level aggregates on the pandas path (see _row_aggregate)
+ROW_AGGREGATES = {
+    'unique_hosts': unique_hosts,
+    'top_hosts': top_hosts,
+    'median_price': median_price,
+}
+
+# Section name -> compute function, in dashboard order
+SECTIONS = {
+    'kpis': kpis,
+    'geographic': geographic,
+    'pricing': pricing,
+    'reviews': reviews,
+    'hosts': hosts,
+    'trends': trends,
+}
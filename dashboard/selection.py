@@ -0,0 +1,67 @@
+"""
+Row selections over the shared dashboard frame.
+
+All sessions read the same immutable frame (see dashboard/refresh.py).
+Filtering it with `df.iloc[rows]` would copy every column of the matching
+rows on each rerun of each session, so memory would grow with the number
+of concurrent users. A Selection keeps only the row positions and a
+reference to the shared frame; the sections read just the columns they
+need, restricted to those rows, and nothing else is materialized.
+"""
+
+import numpy as np
+
+
+class Selection:
+    """Row positions (None for all rows) into a shared frame"""
+
+    def __init__(self, df, rows=None):
+        self.df = df
+        self.rows = None if rows is None else np.asarray(rows)
+
+    def __len__(self):
+        return len(self.df) if self.rows is None else len(self.rows)
+
+    @property
+    def is_all(self):
+        """True when every row of the frame is selected, in frame order"""
+        return self.rows is None
+
+    def positions(self):
+        """Selected row positions as an array"""
+        return np.arange(len(self.df)) if self.rows is None else self.rows
+
+    def __getitem__(self, column):
+        """One column restricted to the selection (labels are frame positions)"""
+        series = self.df[column]
+        return series if self.rows is None else series.iloc[self.rows]
+
+    def frame(self, columns):
+        """DataFrame of only `columns` for the selected rows"""
+        frame = self.df[list(columns)]
+        return frame if self.rows is None else frame.iloc[self.rows]
+
+    def take(self, positions):
+        """Selection of the given frame positions (e.g. a subset of `positions()`)"""
+        return Selection(self.df, positions)
+
+    def head(self, n):
+        """The first `n` selected rows"""
+        if self.rows is None:
+            return self.take(np.arange(min(n, len(self.df))))
+        return self.take(self.rows[:n])
+
+    def sample(self, n, random_state=None):
+        """`n` selected rows drawn without replacement"""
+        rng = np.random.default_rng(random_state)
+        positions = self.positions()
+        return self.take(np.sort(rng.choice(positions, size=min(n, len(positions)), replace=False)))
+
+
+def patched(values, n_rows, rows, new_values, fill=0):
+    """Copy of a per-row array grown to `n_rows`, with the positions in `rows` set to `new_values`"""
+    out = np.empty(n_rows, dtype=np.result_type(values, np.asarray(new_values)))
+    out[:len(values)] = values
+    out[len(values):] = fill
+    out[rows] = new_values
+    return out
@@ -0,0 +1,153 @@
+"""
+Viewport-aware spatial aggregation for the listings map.
+
+Sending every listing to `scatter_mapbox` serializes tens of thousands of
+markers per rerun. Instead, a square grid over latitude/longitude is built
+once per data snapshot at several zoom-matched resolutions. At low zoom the
+map shows one marker per occupied cell (listing count and mean price); once
+few enough listings fall inside the visible area, it switches back to
+individual points. Listings outside the visible area are still sent, as
+cells of a coarser level (OVERVIEW_ZOOMS levels out), so panning or
+zooming out shows where they are instead of an empty map.
+
+New listings from a data refresh are appended to the existing grid
+(updated()): only their cells are computed, as long as they fall inside
+the area the grid was laid out over.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+from dashboard.selection import patched
+
+TILE_SIZE = 256  # Web Mercator tile size in pixels
+CELL_PIXELS = 24  # On-screen size of one grid cell
+ZOOM_LEVELS = range(8, 16)
+OVERVIEW_ZOOMS = 3  # How much coarser the cells for listings outside the view are
+
+
+class SpatialGrid:
+    """Per-row grid cell IDs for each zoom level of the listings map"""
+
+    def __init__(self, df, zoom_levels=ZOOM_LEVELS, cell_pixels=CELL_PIXELS):
+        self.lat = df['latitude'].to_numpy(dtype='float64', na_value=np.nan)
+        self.lon = df['longitude'].to_numpy(dtype='float64', na_value=np.nan)
+        self.price = df['price'].to_numpy(dtype='float64', na_value=np.nan)
+        self.located = ~(np.isnan(self.lat) | np.isnan(self.lon))
+
+        self.lat0 = np.nanmin(self.lat) if self.located.any() else 0.0
+        self.lon0 = np.nanmin(self.lon) if self.located.any() else 0.0
+        lat_extent = (np.nanmax(self.lat) - self.lat0) if self.located.any() else 0.0
+        lon_extent = (np.nanmax(self.lon) - self.lon0) if self.located.any() else 0.0
+
+        self.levels = {}
+        for zoom in zoom_levels:
+            size = cell_degrees(zoom, cell_pixels)
+            n_cols = int(lon_extent // size) + 1
+            n_rows = int(lat_extent // size) + 1
+            dtype = np.int32 if n_rows * n_cols < np.iinfo(np.int32).max else np.int64
+            level = {'size': size, 'n_cols': n_cols}
+            level['cell'] = self._cells(level, self.lat, self.lon)[0].astype(dtype)
+            self.levels[zoom] = level
+
+    def updated(self, df, rows):
+        """
+        Grid for `df` where only the positions in `rows` changed.
+
+        `df` keeps every position of the frame this grid was built from and
+        may append new ones (all of which must be in `rows`). Returns None
+        when one of those listings lies outside the grid's area, so the
+        caller lays out a new grid instead. This grid is left unchanged.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        changes = df.iloc[rows]
+        lat = changes['latitude'].to_numpy(dtype='float64', na_value=np.nan)
+        lon = changes['longitude'].to_numpy(dtype='float64', na_value=np.nan)
+        located = ~(np.isnan(lat) | np.isnan(lon))
+
+        grid = copy.copy(self)
+        grid.levels = {}
+        for zoom, level in self.levels.items():
+            cells, fits = self._cells(level, lat, lon)
+            if not fits.all() or cells.max(initial=-1) > np.iinfo(level['cell'].dtype).max:
+                return None
+            cells = cells.astype(level['cell'].dtype)
+            grid.levels[zoom] = {**level, 'cell': patched(level['cell'], len(df), rows, cells)}
+        grid.lat = patched(self.lat, len(df), rows, lat)
+        grid.lon = patched(self.lon, len(df), rows, lon)
+        grid.price = patched(self.price, len(df), rows, changes['price'].to_numpy(dtype='float64', na_value=np.nan))
+        grid.located = patched(self.located, len(df), rows, located, fill=False)
+        return grid
+
+    def level_for(self, zoom):
+        """Closest prebuilt zoom level"""
+        return min(self.levels, key=lambda level: abs(level - zoom))
+
+    def visible(self, rows, bounds):
+        """Positions from `rows` (None means all) whose coordinates fall inside `bounds`"""
+        return self.split(rows, bounds)[0]
+
+    def split(self, rows, bounds):
+        """Positions from `rows` (None means all) inside `bounds`, and the others"""
+        rows = np.arange(len(self.lat)) if rows is None else np.asarray(rows)
+        lat_min, lat_max, lon_min, lon_max = bounds
+        lat, lon = self.lat[rows], self.lon[rows]
+        inside = (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+        return rows[inside], rows[~inside]
+
+    def aggregate(self, rows, zoom):
+        """
+        Listing count and mean price per occupied cell for `rows`.
+
+        Returns a DataFrame with one row per cell: latitude/longitude of the
+        cell centre, listings and avg_price.
+        """
+        level = self.levels[self.level_for(zoom)]
+        rows = np.asarray(rows)
+        cells = level['cell'][rows]
+        rows, cells = rows[cells >= 0], cells[cells >= 0]
+
+        occupied, inverse = np.unique(cells, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(occupied))
+        prices = self.price[rows]
+        priced = ~np.isnan(prices)
+        price_sums = np.bincount(inverse[priced], weights=prices[priced], minlength=len(occupied))
+        price_counts = np.bincount(inverse[priced], minlength=len(occupied))
+
+        size, n_cols = level['size'], level['n_cols']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg_price = price_sums / price_counts
+        return pd.DataFrame({
+            'latitude': self.lat0 + (occupied // n_cols + 0.5) * size,
+            'longitude': self.lon0 + (occupied % n_cols + 0.5) * size,
+            'listings': counts,
+            'avg_price': avg_price,
+        })
+
+
+    def _cells(self, level, lat, lon):
+        """Cell ID per coordinate at one level (-1 where missing), and whether it fits the grid's columns"""
+        size, n_cols = level['size'], level['n_cols']
+        rows = np.floor((np.nan_to_num(lat, nan=self.lat0) - self.lat0) / size)
+        cols = np.floor((np.nan_to_num(lon, nan=self.lon0) - self.lon0) / size)
+        located = ~(np.isnan(lat) | np.isnan(lon))
+        fits = (rows >= 0) & (cols >= 0) & (cols < n_cols)
+        return np.where(located, rows * n_cols + cols, -1).astype(np.int64), fits | ~located
+
+
+def cell_degrees(zoom, cell_pixels=CELL_PIXELS):
+    """Longitude span of `cell_pixels` screen pixels at a Web Mercator zoom"""
+    return 360.0 / (TILE_SIZE * 2 ** zoom) * cell_pixels
+
+
+def viewport_bounds(center, zoom, width=900, height=500):
+    """
+    Approximate (lat_min, lat_max, lon_min, lon_max) visible on a map of
+    `width` x `height` pixels centred on `center` (lat, lon) at `zoom`.
+    """
+    lat, lon = center
+    lon_span = 360.0 / (TILE_SIZE * 2 ** zoom) * width
+    lat_span = 360.0 / (TILE_SIZE * 2 ** zoom) * height * np.cos(np.radians(lat))
+    return (lat - lat_span / 2, lat + lat_span / 2, lon - lon_span / 2, lon + lon_span / 2)
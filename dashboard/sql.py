@@ -0,0 +1,250 @@
+"""
+SQLite query backend for the dashboard (optional; pandas stays the default).
+
+The listings are loaded once per data version into a file-backed SQLite
+database with an index on every sidebar filter column, on price and on the
+last_review date (stored as a YYYYMMDD key, NULL when never reviewed). The
+sidebar selection becomes a WHERE clause, and the section aggregates
+(value counts, crosstabs, top hosts, per-borough summaries) run as GROUP BY
+queries, so only the small result tables come back into Python. The
+selection itself returns row positions, like FilterIndex, for the charts
+that still plot individual listings.
+
+SQLSlice answers `rollup()` and `totals()` in the same shape as CubeSlice,
+so the section functions work unchanged on either backend.
+"""
+
+import glob
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+from dashboard.cube import FILTER_DIMS, MEASURES, VIEW_DIMS
+from etl.star import UNKNOWN_DATE_KEY, date_key
+
+SQL_DIR = 'transformed'
+DB_PATTERN = 'listings-{}.sqlite'
+TABLE = 'listings'
+INDEXED_COLUMNS = FILTER_DIMS + ['price', 'date_key']
+ROW_COLUMNS = ['id', 'host_id', 'host_name']
+KEEP_DATABASES = 2
+
+
+class SQLBackend:
+    """One SQLite database per data version, queried through per-thread connections"""
+
+    def __init__(self, df, token, directory=SQL_DIR):
+        self.n_rows = len(df)
+        self.dims = [dim for dim in FILTER_DIMS + VIEW_DIMS if dim in df.columns]
+        self.levels = {dim: _levels(df[dim]) for dim in self.dims}
+        self.columns = self.dims + [
+            col for col in ROW_COLUMNS + [col for col in MEASURES.values() if col]
+            if col in df.columns and col not in self.dims
+        ]
+        # Review date key derived from last_review, for the date range filter
+        self.derived = ['date_key'] if 'last_review' in df.columns else []
+        self.path = os.path.join(directory, DB_PATTERN.format(str(token)[:16]))
+        self._local = threading.local()
+        if not self._is_built():
+            self._build(df)
+
+    def select(self, selections, price_range=None, review_range=None, include_unreviewed=True):
+        """Sorted row positions for a selection (None when nothing is filtered out)"""
+        where, params = _where(selections, price_range, review_range, include_unreviewed)
+        if where == '1':
+            return None
+        rows = self._query(f"SELECT pos FROM {TABLE} WHERE {where} ORDER BY pos", params)
+        return np.fromiter((row[0] for row in rows), dtype=np.intp, count=len(rows))
+
+    def apply(self, df, selections, price_range=None, review_range=None, include_unreviewed=True):
+        """Rows of `df` matching the selection (the frame itself when unfiltered)"""
+        rows = self.select(selections, price_range, review_range, include_unreviewed)
+        if rows is None or len(rows) == self.n_rows:
+            return df
+        return df.iloc[rows]
+
+    def slice(self, selections, price_range=None, review_range=None, include_unreviewed=True):
+        """Aggregates for one sidebar selection (see SQLSlice)"""
+        return SQLSlice(self, selections, price_range, review_range, include_unreviewed)
+
+    def close(self):
+        """Close the calling thread's connection"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _query(self, sql, params=()):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Read-only: a missing file raises instead of creating an empty database
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.connection = connection
+        return connection.execute(sql, params).fetchall()
+
+    def _is_built(self):
+        if not os.path.exists(self.path):
+            return False
+        # The connection's own context manager only ends a transaction; closing() closes it
+        with closing(sqlite3.connect(self.path)) as connection:
+            try:
+                count = connection.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+                columns = [row[1] for row in connection.execute(f"PRAGMA table_info({TABLE})")]
+            except sqlite3.DatabaseError:
+                return False
+        # A database built by an older version may lack newer columns
+        return count == self.n_rows and columns == ['pos'] + self.columns + self.derived
+
+    def _build(self, df):
+        """Write the listings to a new database file, then move it into place"""
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        partial = f"{self.path}.partial"
+        if os.path.exists(partial):
+            os.remove(partial)
+
+        values = [_python_values(df[col]) for col in self.columns]
+        definitions = ', '.join(f'"{col}" {_sql_type(df[col])}' for col in self.columns)
+        if self.derived:
+            keys = date_key(df['last_review'])
+            values.append([None if key == UNKNOWN_DATE_KEY else key for key in keys.tolist()])
+            definitions += ', "date_key" INTEGER'
+        with closing(sqlite3.connect(partial)) as connection, connection:
+            connection.execute(f"CREATE TABLE {TABLE} (pos INTEGER PRIMARY KEY, {definitions})")
+            connection.executemany(
+                f"INSERT INTO {TABLE} VALUES ({', '.join('?' * (len(values) + 1))})",
+                ((pos, *row) for pos, row in enumerate(zip(*values)))
+            )
+            for col in INDEXED_COLUMNS:
+                if col in self.columns + self.derived:
+                    connection.execute(f'CREATE INDEX idx_{TABLE}_{col} ON {TABLE} ("{col}")')
+            connection.execute("ANALYZE")
+        os.replace(partial, self.path)
+
+        # Keep the newest databases: a session may still be on the previous version
+        pattern = os.path.join(directory, DB_PATTERN.format('*'))
+        for old in sorted(glob.glob(pattern), key=os.path.getmtime)[:-KEEP_DATABASES]:
+            os.remove(old)
+
+
+class SQLSlice:
+    """Aggregate queries for one sidebar selection, shaped like CubeSlice results"""
+
+    def __init__(self, backend, selections, price_range=None, review_range=None, include_unreviewed=True):
+        self.cube = backend
+        self.where, self.params = _where(selections, price_range, review_range, include_unreviewed)
+
+    def rollup(self, by=()):
+        """
+        Measure sums grouped by the columns in `by`, as in CubeSlice.rollup().
+
+        Only listings with a price are aggregated, groups with a missing key
+        are dropped, and groups come in category order.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        measures = ', '.join(
+            f'COUNT(*) AS "{name}"' if col is None else f'TOTAL("{col}") AS "{name}"'
+            for name, col in MEASURES.items()
+        )
+        keys = ', '.join(f'"{col}"' for col in by)
+        sql = f"SELECT {keys + ', ' if by else ''}{measures} FROM {TABLE} WHERE {self.where} AND price IS NOT NULL"
+        if by:
+            sql += f" GROUP BY {keys}"
+        frame = pd.DataFrame(self.cube._query(sql, self.params), columns=by + list(MEASURES))
+        frame = frame.astype({name: 'float64' for name in MEASURES})
+
+        if not by:
+            return frame.set_axis(['total'])
+
+        frame = frame.dropna(subset=by)
+        frame = frame[frame['count'] > 0]
+        # Same group order as the cube: category order, filter columns first
+        dims = [dim for dim in self.cube.dims if dim in by]
+        order = [frame[dim].map({value: code for code, value in enumerate(self.cube.levels[dim])}) for dim in dims]
+        frame = frame.iloc[np.lexsort([codes.to_numpy() for codes in reversed(order)])] if len(frame) else frame
+        frame['count'] = frame['count'].astype('int64')
+        return frame.set_index(by[0] if len(by) == 1 else by)
+
+    def totals(self):
+        """Measure sums over the whole selection as a Series"""
+        return self.rollup(()).iloc[0]
+
+    def unique_hosts(self):
+        """Distinct host IDs in the selection"""
+        return self.cube._query(f"SELECT COUNT(DISTINCT host_id) FROM {TABLE} WHERE {self.where}", self.params)[0][0]
+
+    def top_hosts(self, n=10):
+        """Hosts with the most listings: name, listings, mean price, reviews, mean availability"""
+        rows = self.cube._query(
+            f"SELECT MIN(host_name), COUNT(id) AS listings, AVG(price), TOTAL(number_of_reviews), AVG(availability_365) "
+            f"FROM {TABLE} WHERE {self.where} "
+            f"GROUP BY host_id ORDER BY listings DESC, host_id LIMIT ?",
+            self.params + [n]
+        )
+        return pd.DataFrame(rows, columns=['host_name', 'id', 'price', 'number_of_reviews', 'availability_365'])
+
+    def median_price(self, by):
+        """Median price per value of `by` (window functions; SQLite has no MEDIAN)"""
+        rows = self.cube._query(
+            f"""
+            WITH ranked AS (
+                SELECT "{by}" AS key, price,
+                       ROW_NUMBER() OVER (PARTITION BY "{by}" ORDER BY price) AS rank,
+                       COUNT(*) OVER (PARTITION BY "{by}") AS n
+                FROM {TABLE}
+                WHERE {self.where} AND price IS NOT NULL AND "{by}" IS NOT NULL
+            )
+            SELECT key, AVG(price) FROM ranked WHERE rank IN ((n + 1) / 2, (n + 2) / 2) GROUP BY key
+            """,
+            self.params
+        )
+        return pd.Series(dict(rows), name='price', dtype='float64').rename_axis(by)
+
+
+def _where(selections, price_range=None, review_range=None, include_unreviewed=True):
+    """SQL condition and parameters for a sidebar selection"""
+    clauses, params = [], []
+    for col, value in selections.items():
+        if value in (None, 'All'):
+            continue
+        clauses.append(f'"{col}" = ?')
+        params.append(str(value))
+    if price_range is not None:
+        clauses.append("price BETWEEN ? AND ?")
+        params.extend(float(bound) for bound in price_range)
+    if review_range is not None:
+        in_range = "date_key BETWEEN ? AND ?"
+        clauses.append(f"({in_range} OR date_key IS NULL)" if include_unreviewed else in_range)
+        params.extend(int(key) for key in date_key(pd.Series(review_range)))
+    return ' AND '.join(clauses) or '1', params
+
+
+def _levels(series):
+    """Group order of a column: categories, else sorted distinct values"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.categories.tolist()
+    return sorted(series.dropna().unique().tolist())
+
+
+def _python_values(series):
+    """Column as a list of Python scalars with None for missing values"""
+    if pd.api.types.is_bool_dtype(series):
+        return series.astype(int).tolist()
+    if pd.api.types.is_integer_dtype(series):
+        return series.astype('int64').tolist()
+    if pd.api.types.is_float_dtype(series):
+        values = series.to_numpy(dtype='float64', na_value=np.nan).tolist()
+        return [None if np.isnan(value) else value for value in values]
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _sql_type(series):
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(series):
+        return 'REAL'
+    return 'TEXT'
@@ -0,0 +1,87 @@
+"""
+Warm startup snapshot for the dashboard.
+
+A cold start reads the Parquet snapshot (or parses the CSV), applies the
+compact schema and builds the sidebar filter index before the first paint.
+The warm snapshot is a single pickle of the finished frame and its
+FilterIndex, which already holds the filter options, the price min/max and
+the 99th-percentile slider cap, so a restart only has to unpickle it.
+
+The snapshot records the content hash of the data file it was built from
+and is ignored once that file changes (the dashboard then loads cold and
+writes a fresh one). It is only ever read from the local `transformed/`
+directory the ETL writes to, never from user input.
+
+Usage:
+    python -m dashboard.warm
+"""
+
+import argparse
+import os
+import pickle
+import time
+
+from dashboard.data import load_frame
+from dashboard.filters import FilterIndex
+from etl.storage import CSV_PATH, SNAPSHOT_PATH, file_digest, partial_path, snapshot_fingerprint
+
+WARM_PATH = os.environ.get('DASHBOARD_WARM_SNAPSHOT', 'transformed/dashboard_warm.pickle')
+# Bumped whenever the pickled structures change shape
+FORMAT = 3
+
+
+def write_warm(df, digest, filter_index=None, path=WARM_PATH):
+    """Pickle the dashboard frame and filter index for data with content hash `digest`"""
+    payload = {
+        'format': FORMAT,
+        'digest': digest,
+        'frame': df,
+        'filter_index': filter_index if filter_index is not None else FilterIndex(df),
+    }
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    partial = partial_path(path)
+    with open(partial, 'wb') as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(partial, path)
+    return path
+
+
+def read_warm(digest, path=WARM_PATH):
+    """(frame, filter index) from the warm snapshot, or None if missing, stale or unreadable"""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            payload = pickle.load(f)
+    except Exception:
+        # Written by another version of the code, or truncated
+        return None
+    if payload.get('format') != FORMAT or payload.get('digest') != digest:
+        return None
+    return payload['frame'], payload['filter_index']
+
+
+def build(snapshot_path=SNAPSHOT_PATH, csv_path=CSV_PATH, path=WARM_PATH):
+    """Build the warm snapshot from the current data file; returns (rows, seconds)"""
+    started = time.perf_counter()
+    fingerprint = snapshot_fingerprint(snapshot_path, csv_path)
+    if fingerprint is None:
+        raise FileNotFoundError(f"Neither {snapshot_path} nor {csv_path} exists")
+    df = load_frame(snapshot_path, csv_path)
+    write_warm(df, file_digest(fingerprint[0]), path=path)
+    return len(df), time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prebuild the dashboard's warm startup snapshot")
+    parser.add_argument('--snapshot', default=SNAPSHOT_PATH)
+    parser.add_argument('--csv', default=CSV_PATH)
+    parser.add_argument('--output', default=WARM_PATH)
+    args = parser.parse_args()
+
+    rows, seconds = build(args.snapshot, args.csv, args.output)
+    print(f"Warm snapshot: {rows:,} listings written to {args.output} in {seconds:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,15 +3,29 @@ DSA 2040A - Interactive Airbnb Analytics Dashboard
 Student: [Your Name] - [Your ID]
 """
 
+import time
+SCRIPT_STARTED = time.perf_counter()  # Before imports, for the startup time
+
+import functools
+import os
+import uuid
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from dashboard.data import FullFrame
+from dashboard.export import EXPORT_FORMATS, export
+from dashboard.cache import ResultsCache, filter_key
+from dashboard.perf import PerfMonitor
+from dashboard.refresh import LiveDataset
+from dashboard.sampling import PREVIEW_POINTS, REFINED_POINTS, SCATTER_POINTS
+from dashboard.sections import SECTIONS
+from dashboard.selection import Selection
 import warnings
 warnings.filterwarnings('ignore')
 
+# 'pandas' (in-memory filter index and cube) or 'sqlite' (see dashboard/sql.py)
+QUERY_BACKEND = os.environ.get('DASHBOARD_QUERY_BACKEND', 'pandas')
+
 # Page configuration
 st.set_page_config(
     page_title="Airbnb NYC Analytics",
@@ -49,22 +63,211 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-# Cache data loading for performance
-@st.cache_data
+# Dataset shared by all sessions, refreshed in the background when the ETL
+# writes a new snapshot (see dashboard/refresh.py)
+@st.cache_resource
+def load_dataset():
+    """Live dataset: current snapshot version plus a file watcher"""
+    return LiveDataset()
+
 def load_data():
-    """Load the transformed dataset"""
+    """Current dataset version with its filter index, cube, map grid, search index, host dimension and sampler"""
     try:
-        df = pd.read_csv('transformed/transformed_full.csv')
-        # Convert date column if exists
-        if 'last_review' in df.columns:
-            df['last_review'] = pd.to_datetime(df['last_review'], errors='coerce')
-        return df
+        # Dashboard columns only, with compact dtypes (see dashboard/data.py)
+        return load_dataset().current()
     except FileNotFoundError:
         st.error("❌ Data file not found! Please ensure 'transformed/transformed_full.csv' exists.")
         return None
 
-# Load data
-df = load_data()
+@st.cache_resource
+def load_results_cache():
+    """Section results shared by all sessions (LRU, cleared on new data)"""
+    return ResultsCache(maxsize=64)
+
+@st.cache_resource
+def load_export_cache():
+    """Prepared download files shared by all sessions (LRU, cleared on new data)"""
+    return ResultsCache(maxsize=8)
+
+@st.cache_resource
+def load_perf_monitor():
+    """Rerun timings shared by all sessions (see dashboard/perf.py)"""
+    return PerfMonitor()
+
+# ========== SECTION RENDERERS ==========
+# Each renderer receives a `load(**options)` callable returning the section's
+# cached results, so only the section being viewed has to be computed
+# (see dashboard/sections.py).
+
+def scatter_options(refined=False):
+    """Sampling options for the sections with a scatter plot"""
+    if not progressive:
+        points = SCATTER_POINTS
+    else:
+        points = REFINED_POINTS if refined else PREVIEW_POINTS
+    return {'sampler': dataset.sampler, 'points': points}
+
+def plot_scatter(results, figure, load):
+    """
+    Sampled scatter plot with its sample size.
+
+    In progressive mode the preview is drawn right away and queued to be
+    redrawn with the larger sample once the rest of the page is out.
+    """
+    chart = st.empty()
+    caption = st.empty()
+    draw_scatter(chart, caption, results, figure)
+    shown, selected = results['scatter_points']
+    if progressive and shown < min(selected, REFINED_POINTS):
+        refinements.append((chart, caption, figure, load))
+
+def draw_scatter(chart, caption, results, figure):
+    chart.plotly_chart(results[figure], use_container_width=True)
+    shown, selected = results['scatter_points']
+    if shown < selected:
+        caption.caption(f"Stratified sample of {shown:,} of {selected:,} listings")
+    else:
+        caption.caption(f"All {selected:,} listings")
+
+def render_geographic(load):
+    """TAB 1: Geographic Analysis"""
+    st.subheader("Geographic Distribution of Listings")
+    
+    # Grid cells while many listings are in view, individual points once zoomed in
+    zoom = st.select_slider(
+        "Map zoom",
+        options=list(range(9, 16)),
+        value=10,
+        help="Zoom in to switch from aggregated grid cells to individual listings"
+    )
+    geographic = load(grid=dataset.spatial_grid, zoom=zoom)
+    
+    col1, col2 = st.columns([2, 1])
+    
+    with col1:
+        st.plotly_chart(geographic['map'], use_container_width=True)
+        if geographic['map_outside']:
+            st.caption(f"{geographic['map_outside']:,} listings outside this view are shown as grey grid cells; "
+                       "zoom out or pan to see them")
+    
+    with col2:
+        st.plotly_chart(geographic['boroughs'], use_container_width=True)
+        st.plotly_chart(geographic['room_types'], use_container_width=True)
+
+def render_pricing(load):
+    """TAB 2: Pricing Insights"""
+    st.subheader("Pricing Analysis & Distribution")
+    pricing = load()
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.plotly_chart(pricing['distribution'], use_container_width=True)
+    
+    with col2:
+        st.plotly_chart(pricing['by_room_type'], use_container_width=True)
+    
+    # Price category breakdown
+    st.markdown("### Price Category Analysis")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.plotly_chart(pricing['categories'], use_container_width=True)
+    
+    with col2:
+        st.plotly_chart(pricing['by_borough'], use_container_width=True)
+
+def render_reviews(load):
+    """TAB 3: Review Analytics"""
+    st.subheader("Review Performance & Guest Engagement")
+    reviews = load(**scatter_options())
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.plotly_chart(reviews['activity'], use_container_width=True)
+    
+    with col2:
+        st.plotly_chart(reviews['activity_by_room_type'], use_container_width=True)
+    
+    # Review volume analysis
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.plotly_chart(reviews['volume_tiers'], use_container_width=True)
+    
+    with col2:
+        plot_scatter(reviews, 'reviews_vs_price', load)
+
+def render_hosts(load):
+    """TAB 4: Host Intelligence"""
+    st.subheader("Host Performance & Market Share")
+    hosts = load(host_index=dataset.host_index)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.plotly_chart(hosts['experience'], use_container_width=True)
+    
+    with col2:
+        st.plotly_chart(hosts['rental_duration'], use_container_width=True)
+    
+    # Top hosts analysis
+    st.markdown("### Top 10 Hosts by Listing Count")
+    st.dataframe(hosts['top_hosts'], use_container_width=True, hide_index=True)
+    
+    # Host experience vs pricing
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.plotly_chart(hosts['price_by_experience'], use_container_width=True)
+    
+    with col2:
+        st.plotly_chart(hosts['new_vs_established'], use_container_width=True)
+
+def render_trends(load):
+    """TAB 5: Market Trends"""
+    st.subheader("Market Trends & Availability Analysis")
+    trends = load(**scatter_options())
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.plotly_chart(trends['availability'], use_container_width=True)
+    
+    with col2:
+        plot_scatter(trends, 'price_vs_availability', load)
+    
+    # Market composition
+    st.markdown("### Market Composition Matrix")
+    st.plotly_chart(trends['market_matrix'], use_container_width=True)
+    
+    # Summary statistics table
+    st.markdown("### Summary Statistics by Neighbourhood Group")
+    st.dataframe(trends['summary'], use_container_width=True, hide_index=True)
+
+# Tab label -> (section name, renderer)
+SECTION_VIEWS = {
+    "🗺️ Geographic Analysis": ('geographic', render_geographic),
+    "💰 Pricing Insights": ('pricing', render_pricing),
+    "⭐ Review Analytics": ('reviews', render_reviews),
+    "🏢 Host Intelligence": ('hosts', render_hosts),
+    "📈 Market Trends": ('trends', render_trends),
+}
+
+# Rerun instrumentation: every section below is timed as one lap; memory is
+# sampled only while a session has the performance panel open
+perf_monitor = load_perf_monitor()
+perf_session = st.session_state.setdefault('perf_session', uuid.uuid4().hex[:8])
+perf_monitor.trace_memory(perf_session, st.session_state.get('perf_panel', False))
+perf_run = perf_monitor.start_run(started=SCRIPT_STARTED, session=perf_session)
+perf_run.lap('startup')  # Imports and page setup (cold on the first run only)
+
+# Load data (one version for the whole rerun, even if a refresh lands meanwhile)
+dataset = load_data()
+df = dataset.df if dataset is not None else None
+perf_run.lap('load')
 
 if df is not None:
     # ========== HEADER ==========
@@ -76,8 +279,10 @@ if df is not None:
     st.sidebar.header("🔍 Filters")
     st.sidebar.markdown("Customize your analysis:")
     
+    filter_index = dataset.filter_index
+    
     # Neighbourhood filter
-    neighbourhoods = ['All'] + sorted(df['neighbourhood_group'].dropna().unique().tolist())
+    neighbourhoods = ['All'] + filter_index.options('neighbourhood_group')
     selected_neighbourhood = st.sidebar.selectbox(
         "Neighbourhood Group",
         neighbourhoods,
@@ -85,7 +290,7 @@ if df is not None:
     )
     
     # Room type filter
-    room_types = ['All'] + sorted(df['room_type'].dropna().unique().tolist())
+    room_types = ['All'] + filter_index.options('room_type')
     selected_room_type = st.sidebar.selectbox(
         "Room Type",
         room_types,
@@ -93,8 +298,8 @@ if df is not None:
     )
     
     # Price range filter
-    price_min = float(df['price'].min())
-    price_max = float(df['price'].quantile(0.99))  # Use 99th percentile to avoid outliers
+    price_min = filter_index.price_min
+    price_max = filter_index.price_cap  # Use 99th percentile to avoid outliers
     selected_price_range = st.sidebar.slider(
         "Price Range ($)",
         min_value=price_min,
@@ -103,508 +308,208 @@ if df is not None:
         help="Filter by nightly price"
     )
     
+    # Review date filter: answered from the last_review month partitions
+    # when they match the loaded data, else from the listings sorted by date
+    review_range = None
+    include_unreviewed = True
+    if filter_index.n_reviewed:
+        review_bounds = (filter_index.review_min, filter_index.review_max)
+        selected_review_dates = st.sidebar.date_input(
+            "Last Review Between",
+            value=review_bounds,
+            min_value=review_bounds[0],
+            max_value=review_bounds[1],
+            help="Filter by the date of each listing's most recent review"
+        )
+        include_unreviewed = st.sidebar.checkbox(
+            "Include never-reviewed listings",
+            value=True
+        )
+        # Until both ends are picked the date input holds only the start date
+        if len(selected_review_dates) == 2 and (
+            tuple(selected_review_dates) != review_bounds or not include_unreviewed
+        ):
+            review_range = tuple(selected_review_dates)
+    
     # Host experience filter
-    host_exp_options = ['All'] + sorted(df['host_experience'].dropna().unique().tolist())
+    host_exp_options = ['All'] + filter_index.options('host_experience')
     selected_host_exp = st.sidebar.selectbox(
         "Host Experience",
         host_exp_options,
         help="Filter by host experience level"
     )
     
-    # Apply filters
-    filtered_df = df.copy()
-    
-    if selected_neighbourhood != 'All':
-        filtered_df = filtered_df[filtered_df['neighbourhood_group'] == selected_neighbourhood]
-    
-    if selected_room_type != 'All':
-        filtered_df = filtered_df[filtered_df['room_type'] == selected_room_type]
-    
-    filtered_df = filtered_df[
-        (filtered_df['price'] >= selected_price_range[0]) & 
-        (filtered_df['price'] <= selected_price_range[1])
-    ]
+    selections = {
+        'neighbourhood_group': selected_neighbourhood,
+        'room_type': selected_room_type,
+        'host_experience': selected_host_exp,
+    }
+    if QUERY_BACKEND == 'sqlite':
+        # Selection and aggregates pushed down to SQL; only positions and
+        # small result tables come back
+        rows = dataset.sql_backend.select(
+            selections, price_range=selected_price_range,
+            review_range=review_range, include_unreviewed=include_unreviewed
+        )
+        cube_slice = dataset.sql_backend.slice(
+            selections, selected_price_range, review_range, include_unreviewed
+        )
+    else:
+        # Apply filters (bitmap intersection on the prebuilt index)
+        review_partitions = dataset.review_partitions if review_range is not None else None
+        if review_partitions is not None:
+            # Only the months overlapping the range are read (see dashboard/partitions.py)
+            rows = review_partitions.select(
+                review_range, include_unreviewed,
+                rows=filter_index.select(selections, price_range=selected_price_range)
+            )
+        else:
+            rows = filter_index.select(
+                selections, price_range=selected_price_range,
+                review_range=review_range, include_unreviewed=include_unreviewed
+            )
+        
+        # Aggregates for the same selection, answered from the cube (the cube
+        # has no date axis, so a review range sums the selected rows instead)
+        cube_slice = dataset.cube.slice(
+            selections, selected_price_range,
+            rows=rows if review_range is not None else None
+        )
+    # Positions into the shared frame: sessions never copy the filtered rows
+    # (see dashboard/selection.py)
+    selection = Selection(df, rows)
+    perf_run.lap('filters')
+    
+    # Section results are memoized per filter state (shared across sessions)
+    results_cache = load_results_cache()
+    results_cache.bind(dataset.token)
+    filter_state = filter_key(
+        selections, selected_price_range,
+        review=None if review_range is None else (*map(str, review_range), include_unreviewed)
+    )
     
-    if selected_host_exp != 'All':
-        filtered_df = filtered_df[filtered_df['host_experience'] == selected_host_exp]
+    def section_results(name, **options):
+        """Cached aggregates and figures for one dashboard section"""
+        results = results_cache.get_or_compute(
+            (name, filter_state, tuple(sorted(options.items()))),
+            lambda: SECTIONS[name](selection, cube_slice, **options)
+        )
+        # Aggregation and Plotly figure building (near zero on a cache hit)
+        perf_run.lap(f'compute.{name}')
+        return results
     
     st.sidebar.markdown("---")
-    st.sidebar.markdown(f"**Showing:** {len(filtered_df):,} / {len(df):,} listings")
+    st.sidebar.markdown(f"**Showing:** {len(selection):,} / {len(df):,} listings")
+    change = dataset.change
+    st.sidebar.caption(
+        f"Data loaded {dataset.loaded_at:%H:%M:%S}"
+        + (f" (+{change['inserted']:,} new, {change['updated']:,} updated listings)"
+           if change['mode'] == 'incremental' else "")
+    )
+    if load_dataset().last_error:
+        st.sidebar.caption(f"⚠️ Data refresh failed, retrying: {load_dataset().last_error}")
+    cache_stats = results_cache.stats()
+    st.sidebar.caption(
+        f"Results cache: {cache_stats['hits']:,} hits / {cache_stats['misses']:,} misses "
+        f"({cache_stats['size']}/{cache_stats['maxsize']} entries)"
+    )
     
     # Reset filters button
     if st.sidebar.button("🔄 Reset All Filters"):
         st.experimental_rerun()
     
+    # Section rendering mode
+    lazy_sections = st.sidebar.toggle(
+        "Render one section at a time",
+        value=True,
+        help="Compute only the selected section instead of all five tabs on every interaction"
+    )
+    
+    # Debug panel, filled in at the end of the run
+    show_perf = st.sidebar.toggle(
+        "Performance panel",
+        value=False,
+        key='perf_panel',
+        help="Show per-section timings and peak memory for this and previous reruns"
+    )
+    perf_panel = st.sidebar.container()
+    
+    # Scatter plots: small preview first, larger sample at the end of the run
+    progressive = st.sidebar.toggle(
+        "Progressive scatter plots",
+        value=False,
+        help=f"Draw {PREVIEW_POINTS:,} points right away, then refine to up to {REFINED_POINTS:,} "
+             f"(instead of a fixed {SCATTER_POINTS:,})"
+    )
+    refinements = []
+    perf_run.lap('sidebar')
+    
     # ========== KEY METRICS ==========
     st.header("📊 Key Performance Indicators")
     
+    kpi = section_results('kpis', host_index=dataset.host_index)
+    filtered = kpi['count'] != kpi['total_count']
+    
     col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
         st.metric(
             label="Total Listings",
-            value=f"{len(filtered_df):,}",
-            delta=f"{len(filtered_df) - len(df):,}" if len(filtered_df) != len(df) else None
+            value=f"{kpi['count']:,.0f}",
+            delta=f"{kpi['count'] - kpi['total_count']:,.0f}" if filtered else None
         )
     
     with col2:
-        avg_price = filtered_df['price'].mean()
         st.metric(
             label="Avg Price/Night",
-            value=f"${avg_price:.2f}",
-            delta=f"${avg_price - df['price'].mean():.2f}" if len(filtered_df) != len(df) else None
+            value=f"${kpi['avg_price']:.2f}",
+            delta=f"${kpi['avg_price'] - kpi['overall_avg_price']:.2f}" if filtered else None
         )
     
     with col3:
-        total_reviews = filtered_df['number_of_reviews'].sum()
         st.metric(
             label="Total Reviews",
-            value=f"{total_reviews:,}",
+            value=f"{kpi['total_reviews']:,.0f}",
             delta=None
         )
     
     with col4:
-        avg_availability = filtered_df['availability_365'].mean()
         st.metric(
             label="Avg Availability",
-            value=f"{avg_availability:.0f} days",
+            value=f"{kpi['avg_availability']:.0f} days",
             delta=None
         )
     
     with col5:
-        unique_hosts = filtered_df['host_id'].nunique()
         st.metric(
             label="Unique Hosts",
-            value=f"{unique_hosts:,}",
+            value=f"{kpi['unique_hosts']:,}",
             delta=None
         )
     
     st.markdown("---")
+    perf_run.lap('render.kpis')
     
     # ========== MAIN VISUALIZATIONS ==========
     
-    # Tab layout for different analysis sections
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "🗺️ Geographic Analysis", 
-        "💰 Pricing Insights", 
-        "⭐ Review Analytics",
-        "🏢 Host Intelligence",
-        "📈 Market Trends"
-    ])
-    
-    # ========== TAB 1: GEOGRAPHIC ANALYSIS ==========
-    with tab1:
-        st.subheader("Geographic Distribution of Listings")
-        
-        col1, col2 = st.columns([2, 1])
-        
-        with col1:
-            # Interactive map
-            fig_map = px.scatter_mapbox(
-                filtered_df,
-                lat='latitude',
-                lon='longitude',
-                color='price_category',
-                size='price',
-                hover_name='name',
-                hover_data={
-                    'price': ':$,.2f',
-                    'room_type': True,
-                    'neighbourhood': True,
-                    'latitude': False,
-                    'longitude': False
-                },
-                color_discrete_map={
-                    'Budget': '#3498db',
-                    'Economy': '#2ecc71',
-                    'Mid-Range': '#f39c12',
-                    'Premium': '#e74c3c',
-                    'Luxury': '#9b59b6'
-                },
-                zoom=10,
-                height=500,
-                title="Listings Map by Price Category"
-            )
-            fig_map.update_layout(mapbox_style="open-street-map")
-            fig_map.update_layout(margin={"r":0,"t":40,"l":0,"b":0})
-            st.plotly_chart(fig_map, use_container_width=True)
-        
-        with col2:
-            # Neighbourhood distribution
-            neighbourhood_counts = filtered_df['neighbourhood_group'].value_counts()
-            
-            fig_neighbourhood = go.Figure(data=[go.Pie(
-                labels=neighbourhood_counts.index,
-                values=neighbourhood_counts.values,
-                hole=0.4,
-                marker_colors=['#FF5A5F', '#00A699', '#FC642D', '#484848', '#767676']
-            )])
-            fig_neighbourhood.update_layout(
-                title="Listings by Borough",
-                height=250,
-                margin=dict(t=40, b=0, l=0, r=0)
-            )
-            st.plotly_chart(fig_neighbourhood, use_container_width=True)
-            
-            # Room type distribution
-            room_counts = filtered_df['room_type'].value_counts()
-            
-            fig_room = go.Figure(data=[go.Pie(
-                labels=room_counts.index,
-                values=room_counts.values,
-                hole=0.4,
-                marker_colors=['#FF5A5F', '#00A699', '#FC642D']
-            )])
-            fig_room.update_layout(
-                title="Listings by Room Type",
-                height=250,
-                margin=dict(t=40, b=0, l=0, r=0)
-            )
-            st.plotly_chart(fig_room, use_container_width=True)
-    
-    # ========== TAB 2: PRICING INSIGHTS ==========
-    with tab2:
-        st.subheader("Pricing Analysis & Distribution")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Price distribution histogram
-            fig_price_dist = px.histogram(
-                filtered_df,
-                x='price',
-                nbins=50,
-                title="Price Distribution",
-                labels={'price': 'Price per Night ($)', 'count': 'Number of Listings'},
-                color_discrete_sequence=['#FF5A5F']
-            )
-            fig_price_dist.update_layout(height=400, showlegend=False)
-            st.plotly_chart(fig_price_dist, use_container_width=True)
-        
-        with col2:
-            # Price by room type box plot
-            fig_price_room = px.box(
-                filtered_df,
-                x='room_type',
-                y='price',
-                title="Price Distribution by Room Type",
-                labels={'price': 'Price per Night ($)', 'room_type': 'Room Type'},
-                color='room_type',
-                color_discrete_sequence=['#FF5A5F', '#00A699', '#FC642D']
-            )
-            fig_price_room.update_layout(height=400, showlegend=False)
-            st.plotly_chart(fig_price_room, use_container_width=True)
-        
-        # Price category breakdown
-        st.markdown("### Price Category Analysis")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Price category counts
-            price_cat_counts = filtered_df['price_category'].value_counts().sort_index()
-            
-            fig_price_cat = go.Figure(data=[go.Bar(
-                x=price_cat_counts.index,
-                y=price_cat_counts.values,
-                marker_color=['#3498db', '#2ecc71', '#f39c12', '#e74c3c', '#9b59b6'],
-                text=price_cat_counts.values,
-                textposition='outside'
-            )])
-            fig_price_cat.update_layout(
-                title="Listings by Price Category",
-                xaxis_title="Price Category",
-                yaxis_title="Number of Listings",
-                height=400
-            )
-            st.plotly_chart(fig_price_cat, use_container_width=True)
-        
-        with col2:
-            # Average price by neighbourhood
-            avg_price_neighbourhood = filtered_df.groupby('neighbourhood_group')['price'].mean().sort_values(ascending=False)
-            
-            fig_avg_price = go.Figure(data=[go.Bar(
-                y=avg_price_neighbourhood.index,
-                x=avg_price_neighbourhood.values,
-                orientation='h',
-                marker_color='#FF5A5F',
-                text=[f'${x:.2f}' for x in avg_price_neighbourhood.values],
-                textposition='outside'
-            )])
-            fig_avg_price.update_layout(
-                title="Average Price by Borough",
-                xaxis_title="Average Price ($)",
-                yaxis_title="Borough",
-                height=400
-            )
-            st.plotly_chart(fig_avg_price, use_container_width=True)
-    
-    # ========== TAB 3: REVIEW ANALYTICS ==========
-    with tab3:
-        st.subheader("Review Performance & Guest Engagement")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Review activity distribution
-            review_activity_counts = filtered_df['review_activity'].value_counts()
-            
-            fig_review_activity = go.Figure(data=[go.Pie(
-                labels=review_activity_counts.index,
-                values=review_activity_counts.values,
-                hole=0.4,
-                marker_colors=['#e74c3c', '#f39c12', '#2ecc71'],
-                textinfo='label+percent',
-                textposition='outside'
-            )])
-            fig_review_activity.update_layout(
-                title="Review Activity Levels",
-                height=400
-            )
-            st.plotly_chart(fig_review_activity, use_container_width=True)
-        
-        with col2:
-            # Reviews by room type
-            review_room_cross = filtered_df.groupby(['room_type', 'review_activity']).size().reset_index(name='count')
-            
-            fig_review_room = px.bar(
-                review_room_cross,
-                x='room_type',
-                y='count',
-                color='review_activity',
-                title="Review Activity by Room Type",
-                labels={'count': 'Number of Listings', 'room_type': 'Room Type'},
-                color_discrete_map={'High': '#2ecc71', 'Medium': '#f39c12', 'Low': '#e74c3c'},
-                barmode='group'
-            )
-            fig_review_room.update_layout(height=400)
-            st.plotly_chart(fig_review_room, use_container_width=True)
-        
-        # Review volume analysis
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Review volume tier distribution
-            review_tier_counts = filtered_df['review_volume_tier'].value_counts().sort_index()
-            
-            fig_review_tier = go.Figure(data=[go.Bar(
-                x=review_tier_counts.index,
-                y=review_tier_counts.values,
-                marker_color=['#3498db', '#2ecc71', '#f39c12', '#e74c3c'],
-                text=review_tier_counts.values,
-                textposition='outside'
-            )])
-            fig_review_tier.update_layout(
-                title="Review Volume Tiers",
-                xaxis_title="Tier",
-                yaxis_title="Number of Listings",
-                height=400
-            )
-            st.plotly_chart(fig_review_tier, use_container_width=True)
-        
-        with col2:
-            # Scatter: Reviews vs Price
-            fig_reviews_price = px.scatter(
-                filtered_df.sample(min(1000, len(filtered_df))),  # Sample for performance
-                x='number_of_reviews',
-                y='price',
-                color='review_activity',
-                title="Reviews vs Price Relationship",
-                labels={'number_of_reviews': 'Total Reviews', 'price': 'Price ($)'},
-                color_discrete_map={'High': '#2ecc71', 'Medium': '#f39c12', 'Low': '#e74c3c'},
-                opacity=0.6,
-                height=400
-            )
-            st.plotly_chart(fig_reviews_price, use_container_width=True)
-    
-    # ========== TAB 4: HOST INTELLIGENCE ==========
-    with tab4:
-        st.subheader("Host Performance & Market Share")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Host experience distribution
-            host_exp_counts = filtered_df['host_experience'].value_counts()
-            
-            fig_host_exp = go.Figure(data=[go.Pie(
-                labels=host_exp_counts.index,
-                values=host_exp_counts.values,
-                hole=0.4,
-                marker_colors=['#3498db', '#2ecc71', '#f39c12'],
-                textinfo='label+percent',
-                textposition='outside'
-            )])
-            fig_host_exp.update_layout(
-                title="Host Experience Levels",
-                height=400
-            )
-            st.plotly_chart(fig_host_exp, use_container_width=True)
-        
-        with col2:
-            # Rental duration type distribution
-            rental_duration_counts = filtered_df['rental_duration_type'].value_counts().sort_index()
-            
-            fig_rental_duration = go.Figure(data=[go.Bar(
-                x=rental_duration_counts.index,
-                y=rental_duration_counts.values,
-                marker_color=['#3498db', '#2ecc71', '#f39c12', '#e74c3c'],
-                text=rental_duration_counts.values,
-                textposition='outside'
-            )])
-            fig_rental_duration.update_layout(
-                title="Rental Duration Strategy",
-                xaxis_title="Duration Type",
-                yaxis_title="Number of Listings",
-                height=400
-            )
-            st.plotly_chart(fig_rental_duration, use_container_width=True)
-        
-        # Top hosts analysis
-        st.markdown("### Top 10 Hosts by Listing Count")
-        
-        top_hosts = filtered_df.groupby('host_name').agg({
-            'id': 'count',
-            'price': 'mean',
-            'number_of_reviews': 'sum',
-            'availability_365': 'mean'
-        }).sort_values('id', ascending=False).head(10).reset_index()
-        
-        top_hosts.columns = ['Host Name', 'Total Listings', 'Avg Price', 'Total Reviews', 'Avg Availability']
-        top_hosts['Avg Price'] = top_hosts['Avg Price'].apply(lambda x: f'${x:.2f}')
-        top_hosts['Avg Availability'] = top_hosts['Avg Availability'].apply(lambda x: f'{x:.0f} days')
-        
-        st.dataframe(top_hosts, use_container_width=True, hide_index=True)
-        
-        # Host experience vs pricing
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            avg_price_by_exp = filtered_df.groupby('host_experience')['price'].mean().sort_values(ascending=False)
-            
-            fig_price_exp = go.Figure(data=[go.Bar(
-                y=avg_price_by_exp.index,
-                x=avg_price_by_exp.values,
-                orientation='h',
-                marker_color='#FF5A5F',
-                text=[f'${x:.2f}' for x in avg_price_by_exp.values],
-                textposition='outside'
-            )])
-            fig_price_exp.update_layout(
-                title="Avg Price by Host Experience",
-                xaxis_title="Average Price ($)",
-                yaxis_title="Host Experience",
-                height=350
-            )
-            st.plotly_chart(fig_price_exp, use_container_width=True)
-        
-        with col2:
-            # New vs established listings
-            new_listings_pct = (filtered_df['is_new_listing'].sum() / len(filtered_df)) * 100
-            established_pct = 100 - new_listings_pct
-            
-            fig_new_listings = go.Figure(data=[go.Pie(
-                labels=['Established Listings', 'New Listings (0 Reviews)'],
-                values=[established_pct, new_listings_pct],
-                marker_colors=['#2ecc71', '#e74c3c'],
-                textinfo='label+percent',
-                hole=0.4
-            )])
-            fig_new_listings.update_layout(
-                title="New vs Established Listings",
-                height=350
-            )
-            st.plotly_chart(fig_new_listings, use_container_width=True)
-    
-    # ========== TAB 5: MARKET TRENDS ==========
-    with tab5:
-        st.subheader("Market Trends & Availability Analysis")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Availability category distribution
-            avail_cat_counts = filtered_df['availability_category'].value_counts().sort_index()
-            
-            fig_avail_cat = go.Figure(data=[go.Bar(
-                x=avail_cat_counts.index,
-                y=avail_cat_counts.values,
-                marker_color=['#e74c3c', '#f39c12', '#2ecc71', '#3498db'],
-                text=avail_cat_counts.values,
-                textposition='outside'
-            )])
-            fig_avail_cat.update_layout(
-                title="Availability Distribution",
-                xaxis_title="Availability Category",
-                yaxis_title="Number of Listings",
-                height=400
-            )
-            st.plotly_chart(fig_avail_cat, use_container_width=True)
-        
-        with col2:
-            # Price vs Availability relationship
-            fig_price_avail = px.scatter(
-                filtered_df.sample(min(1000, len(filtered_df))),
-                x='availability_365',
-                y='price',
-                color='price_category',
-                title="Price vs Availability Relationship",
-                labels={'availability_365': 'Availability (days/year)', 'price': 'Price ($)'},
-                color_discrete_map={
-                    'Budget': '#3498db',
-                    'Economy': '#2ecc71',
-                    'Mid-Range': '#f39c12',
-                    'Premium': '#e74c3c',
-                    'Luxury': '#9b59b6'
-                },
-                opacity=0.6,
-                height=400
-            )
-            st.plotly_chart(fig_price_avail, use_container_width=True)
-        
-        # Market composition
-        st.markdown("### Market Composition Matrix")
-        
-        # Create heatmap of room type vs neighbourhood
-        market_matrix = pd.crosstab(
-            filtered_df['neighbourhood_group'],
-            filtered_df['room_type']
+    if lazy_sections:
+        # Only the selected section is computed and sent to the browser
+        selected_view = st.radio(
+            "Section",
+            list(SECTION_VIEWS),
+            horizontal=True,
+            label_visibility="collapsed"
         )
-        
-        fig_matrix = go.Figure(data=go.Heatmap(
-            z=market_matrix.values,
-            x=market_matrix.columns,
-            y=market_matrix.index,
-            colorscale='YlOrRd',
-            text=market_matrix.values,
-            texttemplate='%{text}',
-            textfont={"size": 12},
-            colorbar=dict(title="Listings")
-        ))
-        fig_matrix.update_layout(
-            title="Listings Distribution: Borough vs Room Type",
-            xaxis_title="Room Type",
-            yaxis_title="Borough",
-            height=400
-        )
-        st.plotly_chart(fig_matrix, use_container_width=True)
-        
-        # Summary statistics table
-        st.markdown("### Summary Statistics by Neighbourhood Group")
-        
-        summary_stats = filtered_df.groupby('neighbourhood_group').agg({
-            'id': 'count',
-            'price': ['mean', 'median'],
-            'number_of_reviews': 'mean',
-            'availability_365': 'mean',
-            'reviews_per_month': 'mean'
-        }).round(2)
-        
-        summary_stats.columns = ['Total Listings', 'Avg Price', 'Median Price', 
-                                 'Avg Reviews', 'Avg Availability', 'Avg Reviews/Month']
-        summary_stats = summary_stats.reset_index()
-        
-        st.dataframe(summary_stats, use_container_width=True, hide_index=True)
+        name, render = SECTION_VIEWS[selected_view]
+        render(functools.partial(section_results, name))
+        # Remaining widgets and figure serialization to the browser
+        perf_run.lap(f'render.{name}')
+    else:
+        # Tab layout: every section is computed on each rerun
+        for tab, (name, render) in zip(st.tabs(list(SECTION_VIEWS)), SECTION_VIEWS.values()):
+            with tab:
+                render(functools.partial(section_results, name))
+            perf_run.lap(f'render.{name}')
     
     # ========== DATA EXPLORER ==========
     st.markdown("---")
@@ -615,12 +520,10 @@ if df is not None:
     search_term = st.text_input("🔎 Search listings by name or neighbourhood:", "")
     
     if search_term:
-        search_df = filtered_df[
-            filtered_df['name'].str.contains(search_term, case=False, na=False) |
-            filtered_df['neighbourhood'].str.contains(search_term, case=False, na=False)
-        ]
+        # Candidates from the trigram index, limited to the filtered rows
+        search = Selection(df, dataset.search_index.search(search_term, rows=selection.rows))
     else:
-        search_df = filtered_df
+        search = selection
     
     # Select columns to display
     display_columns = ['name', 'neighbourhood_group', 'neighbourhood', 'room_type', 
@@ -628,23 +531,43 @@ if df is not None:
                       'availability_365', 'host_experience']
     
     st.dataframe(
-        search_df[display_columns].head(100),
+        search.head(100).frame(display_columns),
         use_container_width=True,
         hide_index=True
     )
     
-    st.markdown(f"**Showing:** {min(100, len(search_df))} of {len(search_df):,} listings")
+    st.markdown(f"**Showing:** {min(100, len(search))} of {len(search):,} listings")
     
     # Download filtered data
     st.markdown("### 📥 Download Filtered Data")
     
-    csv = search_df.to_csv(index=False).encode('utf-8')
-    st.download_button(
-        label="Download as CSV",
-        data=csv,
-        file_name=f"airbnb_filtered_data_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
-        mime="text/csv",
-    )
+    # The file is only built on request, in chunks straight from the loaded
+    # frame plus the transformed columns the dashboard leaves on disk (read
+    # back chunk by chunk, for the exported rows only). The bytes live in a small cache shared by
+    # all sessions (the same selection is exported once); a session only
+    # keeps the cache key.
+    export_format = st.radio("Format", list(EXPORT_FORMATS), horizontal=True)
+    export_state = (dataset.token, filter_state, search_term, export_format)
+    export_cache = load_export_cache()
+    export_cache.bind(dataset.token)
+    
+    if st.button("Prepare Download"):
+        export_cache.get_or_compute(
+            export_state,
+            lambda: export(FullFrame(df), None if search.is_all else search.positions(), export_format)
+        )
+        st.session_state['export'] = export_state
+    
+    prepared = export_cache.get(export_state) if st.session_state.get('export') == export_state else None
+    if prepared is not None:
+        extension, mime = EXPORT_FORMATS[export_format]
+        st.download_button(
+            label=f"Download as {export_format}",
+            data=prepared,
+            file_name=f"airbnb_filtered_data_{pd.Timestamp.now().strftime('%Y%m%d')}.{extension}",
+            mime=mime,
+        )
+    perf_run.lap('explorer')
     
     # ========== FOOTER ==========
     st.markdown("---")
@@ -655,6 +578,30 @@ if df is not None:
         <p style='font-size: 12px;'>Student: [Your Name] | ID: [Your ID] | © 2025</p>
     </div>
     """, unsafe_allow_html=True)
+    
+    # ========== PROGRESSIVE REFINEMENT ==========
+    # The previews are already on screen. A new interaction stops this run,
+    # so refining never delays the response to it.
+    for chart, caption, figure, load in refinements:
+        draw_scatter(chart, caption, load(**scatter_options(refined=True)), figure)
+        perf_run.lap(f'refine.{figure}')
+    
+    # ========== PERFORMANCE PANEL ==========
+    perf_monitor.finish(perf_run)
+    if show_perf:
+        with perf_panel.expander("⏱️ Performance", expanded=True):
+            startup = perf_monitor.startup
+            st.caption(
+                f"Process startup: {startup.get('startup', 0):,.0f} ms imports and setup, "
+                f"{startup.get('load', 0):,.0f} ms data load"
+                + (f" ({dataset.change['source']})" if dataset.number == 1 and 'source' in dataset.change else "")
+            )
+            st.caption(f"This run: {perf_run.total_ms:,.0f} ms")
+            st.dataframe(perf_run.table(), use_container_width=True, hide_index=True)
+            st.caption(f"Across the last {min(perf_monitor.runs, perf_monitor.history):,} reruns (all sessions)")
+            st.dataframe(perf_monitor.summary(), use_container_width=True, hide_index=True)
+            if perf_monitor.log_path:
+                st.caption(f"Logged to `{perf_monitor.log_path}`")
 
 else:
     st.error("Unable to load data. Please check that the transformed data file exists.")
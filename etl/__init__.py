@@ -0,0 +1,5 @@
+"""
+DSA 2040A - Airbnb ETL helpers
+
+Importable building blocks shared by the ETL notebooks and the dashboard.
+"""
@@ -0,0 +1,124 @@
+"""
+Summary charts of the transformed listings.
+
+The transform notebook's four sample visualizations as functions that draw
+onto a given Axes, so the notebook (pyplot, shown inline) and the pipeline
+runner (a standalone Figure per worker process, no pyplot state) render the
+same PNGs. CHARTS maps each chart to its drawing function, the columns it
+reads and its figure size; save_chart() loads only those columns from the
+snapshot.
+"""
+
+import os
+
+import pandas as pd
+
+from etl.storage import SNAPSHOT_PATH, read_snapshot
+
+CHART_DIR = 'transformed'
+DPI = 300
+
+
+def draw_price_categories(ax, df):
+    """Bar chart of listings per price category with count and share labels"""
+    price_counts = df['price_category'].value_counts().sort_index()
+    colors = ['#3498db', '#2ecc71', '#f39c12', '#e74c3c', '#9b59b6']
+    bars = ax.bar(price_counts.index, price_counts.values, color=colors, alpha=0.8, edgecolor='black')
+
+    ax.set_xlabel('Price Category', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Number of Listings', fontsize=12, fontweight='bold')
+    ax.set_title('Distribution of Listings by Price Category', fontsize=14, fontweight='bold', pad=20)
+    ax.grid(axis='y', alpha=0.3)
+    _label_bars(ax, bars, len(df))
+
+
+def draw_review_activity(ax, df):
+    """Stacked percentage bars of review activity per room type"""
+    review_room_cross = pd.crosstab(df['room_type'], df['review_activity'], normalize='index') * 100
+    review_room_cross.plot(kind='bar', stacked=True, ax=ax,
+                           color=['#e74c3c', '#f39c12', '#2ecc71'],
+                           edgecolor='black', linewidth=0.5)
+
+    ax.set_xlabel('Room Type', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Percentage (%)', fontsize=12, fontweight='bold')
+    ax.set_title('Review Activity Distribution by Room Type', fontsize=14, fontweight='bold', pad=20)
+    ax.legend(title='Review Activity', title_fontsize=11, fontsize=10)
+    ax.set_xticklabels(ax.get_xticklabels(), rotation=45, ha='right')
+    ax.grid(axis='y', alpha=0.3)
+
+
+def draw_host_experience(ax, df):
+    """Pie chart of listings per host experience level"""
+    host_exp = df['host_experience'].value_counts()
+    wedges, texts, autotexts = ax.pie(host_exp.values,
+                                      labels=host_exp.index,
+                                      autopct='%1.1f%%',
+                                      startangle=90,
+                                      colors=['#3498db', '#2ecc71', '#f39c12'],
+                                      explode=[0.05] * len(host_exp),
+                                      shadow=True,
+                                      textprops={'fontsize': 11, 'fontweight': 'bold'})
+
+    ax.set_title('Distribution of Host Experience Levels', fontsize=14, fontweight='bold', pad=20)
+    for i, text in enumerate(texts):
+        text.set_text(f"{text.get_text()}\n({host_exp.values[i]:,})")
+
+
+def draw_availability_categories(ax, df):
+    """Bar chart of listings per availability category with count and share labels"""
+    avail_counts = df['availability_category'].value_counts().sort_index()
+    colors = ['#e74c3c', '#f39c12', '#2ecc71', '#3498db']
+    bars = ax.bar(avail_counts.index, avail_counts.values, color=colors, alpha=0.8, edgecolor='black')
+
+    ax.set_xlabel('Availability Category', fontsize=12, fontweight='bold')
+    ax.set_ylabel('Number of Listings', fontsize=12, fontweight='bold')
+    ax.set_title('Distribution of Listings by Availability Category', fontsize=14, fontweight='bold', pad=20)
+    ax.grid(axis='y', alpha=0.3)
+    _label_bars(ax, bars, len(df))
+
+
+# Chart name (PNG file stem) -> (drawing function, columns read, figure size)
+CHARTS = {
+    'price_category_distribution': (draw_price_categories, ['price_category'], (10, 6)),
+    'review_activity_by_roomtype': (draw_review_activity, ['room_type', 'review_activity'], (12, 6)),
+    'host_experience_distribution': (draw_host_experience, ['host_experience'], (10, 6)),
+    'availability_category_distribution': (draw_availability_categories, ['availability_category'], (10, 6)),
+}
+
+
+def chart_path(name, directory=CHART_DIR):
+    """PNG path of a chart"""
+    return os.path.join(directory, f'{name}.png')
+
+
+def save_chart(name, snapshot_path=SNAPSHOT_PATH, path=None, dpi=DPI):
+    """
+    Render one chart from the snapshot's columns to a PNG; returns the path.
+
+    Uses a standalone Figure (no pyplot figure manager), so charts can be
+    rendered concurrently in worker processes.
+    """
+    import seaborn as sns
+    from matplotlib.figure import Figure
+
+    draw, columns, figsize = CHARTS[name]
+    path = path or chart_path(name)
+    df = read_snapshot(snapshot_path, columns=columns)
+    with sns.axes_style('whitegrid'):
+        fig = Figure(figsize=figsize)
+        draw(fig.add_subplot(), df)
+        fig.tight_layout()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return path
+
+
+# ========== HELPERS ==========
+
+def _label_bars(ax, bars, total):
+    """Count and percentage of `total` above each bar"""
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width() / 2., height,
+                f'{int(height):,}\n({height / total * 100:.1f}%)',
+                ha='center', va='bottom', fontsize=10, fontweight='bold')
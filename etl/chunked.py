@@ -0,0 +1,428 @@
+"""
+Out-of-core (chunked) ETL pipeline.
+
+Runs the same extract, clean, standardize, enrich and categorize steps as
+the notebooks, but never holds more than one chunk of listings in memory:
+
+1. Extract: raw and incremental CSVs are read in chunks and upserted into
+   the id-indexed ListingStore. The raw file is hashed only when its size
+   or mtime changed, and only reloaded when its content did.
+2. Transform, pass 1: only the price and its group columns are read, and
+   per-group price counts are accumulated. Their size depends on the number
+   of distinct (room type, neighbourhood, price) values, not on the row
+   count, and they give the exact group and overall medians.
+3. Transform, pass 2: the store's segments go through etl.transform with
+   those medians. Each segment's result is kept (transformed/parts), so a
+   rerun only transforms the segments an increment wrote, plus those whose
+   imputed prices changed; the CSV and Parquet outputs are then assembled
+   from the parts.
+
+transform_file() runs the two transform passes over a validated CSV
+instead (the notebooks' `data/validated_data.csv`, exported with
+--validated).
+
+Usage:
+    python -m etl.chunked --chunk-rows 50000
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from etl import transform
+from etl.schema import CATEGORY_COLUMNS, ID_COLUMNS, apply_schema
+from etl.storage import CSV_PATH, SNAPSHOT_PATH, file_digest, partial_path
+from etl.upsert import STORE_DIR, ListingStore
+
+CHUNK_ROWS = 50_000
+
+RAW_PATH = 'data/raw_data.csv'
+INCREMENTAL_PATH = 'data/incremental_data.csv'
+VALIDATED_PATH = 'data/validated_data.csv'
+# Transformed rows of each store segment, reused by transform_store()
+PARTS_DIR = 'transformed/parts'
+PARTS_STATE = 'state.json'
+PART_PATTERN = 'part-{:05d}.parquet'
+
+
+def iter_csv(path, chunk_rows=CHUNK_ROWS, columns=None):
+    """DataFrames of at most `chunk_rows` rows from a CSV file"""
+    usecols = None if columns is None else (lambda col: col in set(columns))
+    yield from pd.read_csv(path, chunksize=chunk_rows, usecols=usecols)
+
+
+# ========== EXTRACT ==========
+
+def extract(raw_path=RAW_PATH, incremental_path=INCREMENTAL_PATH, output_path=None,
+            store_path=STORE_DIR, chunk_rows=CHUNK_ROWS):
+    """
+    Merge the raw and incremental listings through the upsert store.
+
+    The raw file is loaded on the first run and again whenever its content
+    changed since (the store records its digest, and hashes the file again
+    only when its size or mtime changed). Returns the summed inserted /
+    updated / unchanged counts of the incremental batch, whether the raw
+    file was (re)loaded, the segments written and the number of listings.
+    The store is exported to the validated CSV at `output_path` only when
+    one is given; transform_store() reads the segments directly.
+    """
+    store = ListingStore(store_path)
+    reloaded = not store.base_is_current(raw_path)
+    if reloaded:
+        store.load_base(iter_csv(raw_path, chunk_rows), file_digest(raw_path), source=raw_path)
+
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    segments = []
+    for chunk in iter_csv(incremental_path, chunk_rows):
+        result = store.upsert(chunk, source=incremental_path)
+        for key in counts:
+            counts[key] += result[key]
+        if result['segment'] is not None:
+            segments.append(result['segment'])
+
+    counts['raw_reloaded'] = reloaded
+    counts['segments'] = store.segments() if reloaded else segments
+    counts['rows'] = len(store)
+    store.write_state()
+    if output_path is not None:
+        _write_csv(store.iter_segments(), output_path)
+    return counts
+
+
+# ========== TRANSFORM ==========
+
+class PriceCounts:
+    """
+    Mergeable per-group price counts for exact streaming medians.
+
+    Feed chunks with `add()`; `medians()` then returns the same group
+    medians as `groupby(...).median()` over the whole file, and
+    `overall_median()` the median of the price column after group
+    imputation.
+    """
+
+    def __init__(self, by=transform.PRICE_GROUP):
+        self.by = list(by)
+        self.counts = None
+        self.missing = None
+        self.ungrouped = None
+
+    def add(self, chunk):
+        grouped = chunk.dropna(subset=self.by)
+        counts = grouped.groupby(self.by, observed=True)['price'].value_counts()
+        missing = grouped['price'].isnull().groupby(
+            [grouped[col] for col in self.by], observed=True
+        ).sum()
+        # Prices of rows without a group key still count toward the overall median
+        ungrouped = chunk.loc[chunk[self.by].isnull().any(axis=1), 'price'].value_counts()
+
+        self.counts = _add_counts(self.counts, counts)
+        self.missing = _add_counts(self.missing, missing)
+        self.ungrouped = _add_counts(self.ungrouped, ungrouped)
+
+    def medians(self):
+        """Exact median price per group (groups with no known price omitted)"""
+        if self.counts is None or not len(self.counts):
+            return pd.Series(dtype='float64')
+        counts = self.counts.sort_index()
+        medians = {
+            key: _median_from_counts(group.index.get_level_values(-1).to_numpy(), group.to_numpy())
+            for key, group in counts.groupby(level=self.by, observed=True)
+        }
+        index = pd.MultiIndex.from_tuples(list(medians), names=self.by)
+        return pd.Series(list(medians.values()), index=index, name='price')
+
+    def overall_median(self, medians=None):
+        """Median of the price column once missing prices get their group median"""
+        medians = self.medians() if medians is None else medians
+        values = [] if self.counts is None else [self.counts.groupby(level=-1).sum()]
+        if self.ungrouped is not None:
+            values.append(self.ungrouped)
+        if self.missing is not None:
+            imputed = self.missing[self.missing > 0]
+            imputed = pd.Series(
+                imputed.to_numpy(), index=medians.reindex(imputed.index).to_numpy()
+            ).dropna()
+            values.append(imputed.groupby(level=0).sum())
+        values = [series for series in values if len(series)]
+        if not values:
+            return np.nan
+        combined = pd.concat(values).groupby(level=0).sum().sort_index()
+        return _median_from_counts(combined.index.to_numpy(), combined.to_numpy())
+
+
+def stable_types(chunk):
+    """
+    Chunk with dtypes that do not depend on the chunk's own values.
+
+    Category levels of the free-text columns and the downcast width of the
+    IDs differ from chunk to chunk, so Parquet gets them as plain strings
+    and int64; readers re-apply the compact schema after loading. Also used
+    for the per-month partitions (see etl/partitions.py).
+    """
+    chunk = chunk.copy()
+    for col in CATEGORY_COLUMNS:
+        if col in chunk.columns:
+            chunk[col] = chunk[col].astype(str)
+    for col in ID_COLUMNS:
+        if col in chunk.columns:
+            chunk[col] = chunk[col].astype('int64')
+    return chunk
+
+
+def transform_file(input_path=VALIDATED_PATH, csv_path=CSV_PATH, snapshot_path=SNAPSHOT_PATH,
+                   chunk_rows=CHUNK_ROWS, now=None):
+    """
+    Transform a validated CSV chunk by chunk into the CSV and Parquet outputs.
+
+    Returns the rows written, chunk count and the price statistics used.
+    """
+    now = pd.Timestamp.now() if now is None else now
+
+    # Pass 1: exact group medians from price counts
+    prices = PriceCounts()
+    for chunk in iter_csv(input_path, chunk_rows, columns=transform.PRICE_GROUP + ['price']):
+        prices.add(chunk)
+    medians = prices.medians()
+    overall_median = prices.overall_median(medians)
+
+    # Pass 2: transform and append
+    rows, chunks = _write_outputs((
+        apply_schema(
+            transform.transform(chunk, now=now, medians=medians, overall_median=overall_median),
+            inplace=True
+        )
+        for chunk in iter_csv(input_path, chunk_rows)
+    ), csv_path, snapshot_path)
+
+    return {
+        'rows': rows,
+        'chunks': chunks,
+        'groups': len(medians),
+        'overall_median': overall_median,
+    }
+
+
+def transform_store(store_path=STORE_DIR, csv_path=CSV_PATH, snapshot_path=SNAPSHOT_PATH,
+                    parts_dir=PARTS_DIR, now=None):
+    """
+    Transform the listings of the upsert store into the CSV and Parquet outputs.
+
+    Every store segment keeps its transformed rows in `parts_dir`. A segment
+    is transformed again only when it is new, when `now` changed (the review
+    recency columns depend on it) or when a median its missing prices were
+    imputed with changed; the other parts are reused, so a small increment
+    transforms little more than its own segment. The outputs are then
+    assembled from the parts' live rows, in store order.
+
+    Returns the rows written, the segments transformed out of the total and
+    the price statistics used.
+    """
+    now = pd.Timestamp.now() if now is None else now
+    store = ListingStore(store_path)
+
+    # Exact group medians from the price columns of the live rows only
+    prices = PriceCounts()
+    for part in store.iter_segments(columns=transform.PRICE_GROUP + ['price']):
+        prices.add(part)
+    medians = prices.medians()
+    overall_median = prices.overall_median(medians)
+
+    state = _read_json(os.path.join(parts_dir, PARTS_STATE)) or {}
+    previous = state.get('parts', {}) if state.get('now') == now.isoformat() else {}
+    parts = {}
+    for segment in store.segments():
+        entry = previous.get(str(segment))
+        path = os.path.join(parts_dir, PART_PATTERN.format(segment))
+        if (entry is None or entry['segment'] != store.segment_version(segment) or not os.path.exists(path)
+                or not _imputation_current(entry['imputed'], medians, overall_median)):
+            rows = store.read_segment(segment)
+            result = apply_schema(
+                transform.transform(rows, now=now, medians=medians, overall_median=overall_median),
+                inplace=True
+            )
+            os.makedirs(parts_dir, exist_ok=True)
+            result.to_parquet(partial_path(path), engine='pyarrow', index=False)
+            os.replace(partial_path(path), path)
+            entry = {'segment': store.segment_version(segment), 'transformed': True,
+                     'imputed': _imputation(rows, medians, overall_median)}
+        else:
+            entry = {**entry, 'transformed': False}
+        parts[str(segment)] = entry
+
+    def live_rows():
+        for segment in parts:
+            part = pd.read_parquet(os.path.join(parts_dir, PART_PATTERN.format(int(segment))), engine='pyarrow')
+            yield part[store.is_live(part[store.key], int(segment))]
+
+    rows, _ = _write_outputs(live_rows(), csv_path, snapshot_path)
+
+    # Parts of segments that no longer exist (a reloaded or compacted store)
+    kept = {PART_PATTERN.format(int(segment)) for segment in parts}
+    for name in os.listdir(parts_dir) if os.path.isdir(parts_dir) else []:
+        if name.startswith('part-') and name not in kept:
+            os.remove(os.path.join(parts_dir, name))
+    _write_json({'now': now.isoformat(), 'parts': parts}, os.path.join(parts_dir, PARTS_STATE))
+
+    return {
+        'rows': rows,
+        'segments': len(parts),
+        'transformed_segments': sum(entry['transformed'] for entry in parts.values()),
+        'groups': len(medians),
+        'overall_median': overall_median,
+    }
+
+
+def run(chunk_rows=CHUNK_ROWS, raw_path=RAW_PATH, incremental_path=INCREMENTAL_PATH,
+        validated_path=None, store_path=STORE_DIR, csv_path=CSV_PATH,
+        snapshot_path=SNAPSHOT_PATH, parts_dir=PARTS_DIR):
+    """Extract then transform, one segment or chunk at a time"""
+    started = time.perf_counter()
+    extracted = extract(raw_path, incremental_path, validated_path, store_path, chunk_rows)
+    extract_seconds = time.perf_counter() - started
+    transformed = transform_store(store_path, csv_path, snapshot_path, parts_dir)
+    return {
+        'extract': extracted,
+        'transform': transformed,
+        'extract_seconds': round(extract_seconds, 3),
+        'transform_seconds': round(time.perf_counter() - started - extract_seconds, 3),
+    }
+
+
+# ========== HELPERS ==========
+
+def _write_outputs(frames, csv_path, snapshot_path):
+    """
+    Append transformed DataFrames to the CSV and the Parquet snapshot.
+
+    The snapshot replaces the previous one only once complete (see
+    write_snapshot); nothing is written when there are no frames. Returns
+    the rows and frames written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(os.path.dirname(csv_path) or '.', exist_ok=True)
+    partial = partial_path(snapshot_path)
+    writer = None
+    rows = chunks = 0
+    try:
+        for chunk in frames:
+            chunk.to_csv(csv_path, index=False, mode='w' if chunks == 0 else 'a', header=chunks == 0)
+
+            table = pa.Table.from_pandas(stable_types(chunk), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(partial, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(chunk)
+            chunks += 1
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is not None:
+        os.replace(partial, snapshot_path)
+    return rows, chunks
+
+
+def _imputation(rows, medians, overall_median):
+    """
+    The medians the missing prices of `rows` were filled with.
+
+    Groups filled from their own median with that median, groups without
+    one (filled with the overall median), and the overall median when any
+    row used it.
+    """
+    keys = rows.loc[rows['price'].isnull(), transform.PRICE_GROUP].drop_duplicates()
+    complete = keys.dropna()
+    found = medians.reindex(pd.MultiIndex.from_frame(complete)) if len(complete) else pd.Series(dtype='float64')
+    known = found.notna().to_numpy()
+    return {
+        'medians': [[*key, value] for key, value in zip(complete[known].values.tolist(), found[known].tolist())],
+        'fallback': complete[~known].values.tolist(),
+        'overall': overall_median if len(keys) > known.sum() else None,
+    }
+
+
+def _imputation_current(imputed, medians, overall_median):
+    """Whether imputing again with these medians gives the prices recorded by _imputation()"""
+    if imputed['overall'] is not None and imputed['overall'] != overall_median:
+        return False
+    for *key, value in imputed['medians']:
+        if medians.get(tuple(key)) != value:
+            return False
+    return all(pd.isna(medians.get(tuple(key))) for key in imputed['fallback'])
+
+
+def _read_json(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _write_json(data, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(partial_path(path), 'w') as f:
+        json.dump(data, f)
+    os.replace(partial_path(path), path)
+
+
+def _write_csv(frames, path):
+    """Append DataFrames to one CSV (header from the first); returns rows written"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    rows = 0
+    for i, frame in enumerate(frames):
+        frame.to_csv(path, index=False, mode='w' if i == 0 else 'a', header=i == 0)
+        rows += len(frame)
+    return rows
+
+
+def _add_counts(total, counts):
+    if total is None:
+        return counts
+    return total.add(counts, fill_value=0)
+
+
+def _median_from_counts(values, counts):
+    """Median of a multiset given sorted distinct values and their counts"""
+    total = counts.sum()
+    if total == 0:
+        return np.nan
+    cumulative = np.cumsum(counts)
+    lower = values[np.searchsorted(cumulative, (total - 1) // 2 + 1)]
+    upper = values[np.searchsorted(cumulative, total // 2 + 1)]
+    return (lower + upper) / 2
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the ETL pipeline in bounded-size chunks")
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='Listings per chunk')
+    parser.add_argument('--raw', default=RAW_PATH)
+    parser.add_argument('--incremental', default=INCREMENTAL_PATH)
+    parser.add_argument('--validated', default=None, metavar='PATH',
+                        help=f'Also export the merged listings as CSV (e.g. {VALIDATED_PATH})')
+    parser.add_argument('--store', default=STORE_DIR)
+    parser.add_argument('--csv', default=CSV_PATH)
+    parser.add_argument('--snapshot', default=SNAPSHOT_PATH)
+    parser.add_argument('--parts', default=PARTS_DIR)
+    args = parser.parse_args()
+
+    summary = run(args.chunk_rows, args.raw, args.incremental, args.validated,
+                  args.store, args.csv, args.snapshot, args.parts)
+    extracted, transformed = summary['extract'], summary['transform']
+    print(f"Extract: {extracted['rows']:,} listings "
+          f"({'raw file reloaded; ' if extracted['raw_reloaded'] else ''}"
+          f"incremental: {extracted['inserted']:,} inserted, {extracted['updated']:,} updated, "
+          f"{extracted['unchanged']:,} unchanged) in {summary['extract_seconds']:.2f}s")
+    print(f"Transform: {transformed['rows']:,} rows, {transformed['transformed_segments']} of "
+          f"{transformed['segments']} store segments transformed, "
+          f"{transformed['groups']:,} price groups, overall median ${transformed['overall_median']:.2f} "
+          f"in {summary['transform_seconds']:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+Parallel transform across CPU cores, partitioned by neighbourhood.
+
+Every transform step is row-local except the price imputation, whose group
+and overall medians are computed once over the whole dataset before the
+data is split. Neighbourhoods are packed into roughly equal-sized
+partitions (never splitting one), each partition runs through
+etl.transform in a worker process, and the results are put back in the
+original row order, so the output is identical to the serial path.
+
+Usage:
+    python -m etl.parallel --workers 4 --check
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from etl import transform
+
+PARTITION_COLUMNS = ['neighbourhood_group', 'neighbourhood']
+VALIDATED_PATH = 'data/validated_data.csv'
+
+
+def price_statistics(df):
+    """Group medians and post-imputation overall median over the full dataset"""
+    medians = transform.group_medians(df)
+    overall_median = transform.impute_price(df, medians).median()
+    return medians, overall_median
+
+
+def partition(df, n_partitions, by=PARTITION_COLUMNS):
+    """
+    Row positions of `df` split into about `n_partitions` groups.
+
+    Each neighbourhood group gets a share of the partitions proportional to
+    its row count, and its neighbourhoods are assigned whole, largest first,
+    to its currently smallest partition. Returns a list of (label,
+    positions) pairs with positions in ascending order.
+    """
+    group_col, key_col = by
+    keys = df[by].astype(object).fillna('(missing)')
+    parts = []
+    for group, rows in keys.groupby(group_col, sort=True).indices.items():
+        codes, names = pd.factorize(keys[key_col].to_numpy()[rows])
+        sizes = np.bincount(codes, minlength=len(names))
+        k = int(min(len(names), max(1, round(n_partitions * len(rows) / len(df)))))
+
+        loads = np.zeros(k, dtype=np.int64)
+        assigned = np.empty(len(names), dtype=np.int64)
+        for key in np.argsort(-sizes, kind='stable'):
+            assigned[key] = int(np.argmin(loads))
+            loads[assigned[key]] += sizes[key]
+
+        bins = assigned[codes]
+        for number in range(k):
+            positions = np.sort(rows[bins == number])
+            count = np.count_nonzero(assigned == number)
+            label = f"{group} {number + 1}/{k} ({count} neighbourhood{'s' if count != 1 else ''})"
+            parts.append((label, positions))
+    return parts
+
+
+def _transform_partition(part, now, medians, overall_median):
+    """Worker: transform one partition and time it"""
+    started = time.perf_counter()
+    result = transform.transform(part, now=now, medians=medians, overall_median=overall_median)
+    return result, time.perf_counter() - started, os.getpid()
+
+
+def transform_parallel(df, workers=None, now=None, partitions_per_worker=4):
+    """
+    Transform validated data in a process pool.
+
+    Returns the transformed frame (same rows, order and dtypes as
+    `transform.transform(df, now=now)`) and a per-partition timing report.
+    """
+    workers = workers or os.cpu_count() or 1
+    now = pd.Timestamp.now() if now is None else now
+    medians, overall_median = price_statistics(df)
+    parts = partition(df, workers * partitions_per_worker)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_transform_partition, df.iloc[positions], now, medians, overall_median)
+            for _, positions in parts
+        ]
+        outputs = [future.result() for future in futures]
+
+    # Recombine in original row order; IDs are downcast over the whole result
+    order = np.argsort(np.concatenate([positions for _, positions in parts]), kind='stable')
+    result = pd.concat([output[0] for output in outputs]).iloc[order]
+    for col in transform.ID_COLUMNS:
+        result[col] = pd.to_numeric(result[col], downcast='integer')
+
+    report = pd.DataFrame([
+        {'partition': label, 'rows': len(positions), 'seconds': round(seconds, 4), 'worker': pid}
+        for (label, positions), (_, seconds, pid) in zip(parts, outputs)
+    ])
+    return result, report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transform validated listings across CPU cores")
+    parser.add_argument('--input', default=VALIDATED_PATH)
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--check', action='store_true', help='Also run the serial path and compare')
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.input)
+    now = pd.Timestamp.now()
+
+    started = time.perf_counter()
+    result, report = transform_parallel(df, workers=args.workers, now=now)
+    parallel_seconds = time.perf_counter() - started
+
+    print(report.to_string(index=False))
+    print(f"\nParallel: {len(result):,} rows in {parallel_seconds:.2f}s "
+          f"({len(report)} partitions, {report['worker'].nunique()} workers)")
+
+    if args.check:
+        started = time.perf_counter()
+        expected = transform.transform(df, now=now)
+        print(f"Serial: {time.perf_counter() - started:.2f}s")
+        pd.testing.assert_frame_equal(result, expected)
+        print("✓ Parallel output identical to serial")
+
+
+if __name__ == '__main__':
+    main()
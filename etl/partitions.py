@@ -0,0 +1,224 @@
+"""
+Time-partitioned copy of the transformed listings, by last_review month.
+
+Questions about review recency ("listings reviewed since March", "the most
+recent 4,116 listings") otherwise mean reading and sorting the whole
+snapshot. The partitioned layout writes one Parquet file per last_review
+month, Hive-style, plus one for listings that were never reviewed:
+
+    transformed/partitions/
+        last_review_month=2019-05/part-0.parquet
+        ...
+        last_review_month=never/part-0.parquet
+        schema.parquet
+        manifest.json
+
+The manifest lists every partition with its row count, a content digest
+and the min / max of the STATS_COLUMNS, and the content digest of the
+snapshot the partitions were written from, so a reader can tell whether
+they are current. schema.parquet holds no rows, only the columns and
+dtypes, for results that select no partition at all. read_partitions() compares the
+requested date range with those stats and opens only the partitions that
+overlap it, then trims the rows of the two boundary months; latest() reads
+months newest first and stops once it has enough rows.
+
+Usage:
+    python -m etl.partitions
+"""
+
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from etl.chunked import stable_types
+from etl.schema import apply_schema
+from etl.storage import SNAPSHOT_PATH, file_digest, partial_path, read_snapshot, write_snapshot
+
+PARTITION_DIR = 'transformed/partitions'
+PARTITION_COLUMN = 'last_review'
+PARTITION_NAME = 'last_review_month'
+NEVER = 'never'  # Partition of the listings without a review
+MANIFEST = 'manifest.json'
+SCHEMA = 'schema.parquet'
+
+# Columns whose min / max are recorded per partition
+STATS_COLUMNS = ['last_review', 'price', 'number_of_reviews', 'availability_365']
+
+
+def partition_keys(dates):
+    """Partition name per row: the month as YYYY-MM, NEVER where the date is missing"""
+    dates = pd.to_datetime(pd.Series(dates))
+    return dates.dt.strftime('%Y-%m').fillna(NEVER).to_numpy(dtype=object)
+
+
+def write_partitions(df, directory=PARTITION_DIR, source=None):
+    """
+    Write `df` as one Parquet file per last_review month plus the manifest.
+
+    `source` is the content digest of the snapshot `df` was read from
+    (recorded in the manifest; see etl.storage.file_digest). The partitions are written to a side directory that replaces
+    `directory` once complete, so readers never see a mix of old and new
+    months. Returns the manifest.
+    """
+    partial = partial_path(directory)
+    if os.path.exists(partial):
+        shutil.rmtree(partial)
+
+    keys = partition_keys(df[PARTITION_COLUMN])
+    frame = stable_types(df)
+    write_snapshot(frame.iloc[:0], os.path.join(partial, SCHEMA))
+    partitions = []
+    for key, rows in sorted(pd.Series(keys).groupby(keys).indices.items(), key=lambda item: _sort_key(item[0])):
+        part = frame.iloc[rows]
+        relative = os.path.join(f'{PARTITION_NAME}={key}', 'part-0.parquet')
+        path = write_snapshot(part, os.path.join(partial, relative))
+        partitions.append({
+            'name': key,
+            'path': relative,
+            'rows': len(part),
+            'digest': file_digest(path),
+            'min': {col: _scalar(part[col].min()) for col in STATS_COLUMNS if col in part.columns},
+            'max': {col: _scalar(part[col].max()) for col in STATS_COLUMNS if col in part.columns},
+        })
+
+    manifest = {
+        'column': PARTITION_COLUMN,
+        'rows': int(len(df)),
+        'source': source,
+        'created': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'partitions': partitions,
+    }
+    with open(os.path.join(partial, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Swap the complete directory into place
+    previous = f'{directory}.previous'
+    if os.path.exists(previous):
+        shutil.rmtree(previous)
+    if os.path.exists(directory):
+        os.replace(directory, previous)
+    os.replace(partial, directory)
+    if os.path.exists(previous):
+        shutil.rmtree(previous)
+    return manifest
+
+
+def read_manifest(directory=PARTITION_DIR):
+    """The partition manifest written by write_partitions()"""
+    with open(os.path.join(directory, MANIFEST)) as f:
+        return json.load(f)
+
+
+def prune(manifest, start=None, end=None, include_unreviewed=True):
+    """
+    Manifest entries of the partitions that can hold rows in the range.
+
+    `start` / `end` are inclusive dates (None for open-ended); the NEVER
+    partition is kept only with `include_unreviewed`.
+    """
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+    kept = []
+    for entry in manifest['partitions']:
+        if entry['name'] == NEVER:
+            if include_unreviewed:
+                kept.append(entry)
+            continue
+        low, high = pd.Timestamp(entry['min'][PARTITION_COLUMN]), pd.Timestamp(entry['max'][PARTITION_COLUMN])
+        if (start is None or high >= start) and (end is None or low <= end):
+            kept.append(entry)
+    return kept
+
+
+def read_partitions(directory=PARTITION_DIR, start=None, end=None, include_unreviewed=True, columns=None):
+    """
+    Listings reviewed between `start` and `end` (inclusive), plus the
+    never-reviewed ones with `include_unreviewed`.
+
+    Only the partitions overlapping the range are read. Rows come back in
+    partition (month) order with the compact schema applied.
+    """
+    if columns is not None and PARTITION_COLUMN not in columns:
+        read_columns = list(columns) + [PARTITION_COLUMN]
+    else:
+        read_columns = columns
+    entries = prune(read_manifest(directory), start, end, include_unreviewed)
+    df = _read_entries(directory, entries, read_columns)
+
+    dates = df[PARTITION_COLUMN]
+    keep = dates.isna().to_numpy() if include_unreviewed else np.zeros(len(df), dtype=bool)
+    in_range = dates.notna()
+    if start is not None:
+        in_range &= dates >= pd.Timestamp(start)
+    if end is not None:
+        in_range &= dates <= pd.Timestamp(end)
+    df = df[keep | in_range.to_numpy()].reset_index(drop=True)
+    if columns is not None:
+        df = df[list(columns)]
+    return apply_schema(df, inplace=True)
+
+
+def latest(n, directory=PARTITION_DIR, columns=None):
+    """
+    The `n` most recently reviewed listings, newest first.
+
+    Reads months newest first and stops as soon as `n` rows are covered;
+    never-reviewed listings are only read if the reviewed ones run out.
+    """
+    entries, rows = [], 0
+    for entry in sorted(read_manifest(directory)['partitions'], key=lambda entry: _sort_key(entry['name']), reverse=True):
+        if entries and rows >= n:
+            break
+        entries.append(entry)
+        rows += entry['rows']
+    df = _read_entries(directory, entries, columns)
+    df = df.sort_values(PARTITION_COLUMN, ascending=False, kind='stable').head(n).reset_index(drop=True)
+    return apply_schema(df, inplace=True)
+
+
+# ========== HELPERS ==========
+
+def _read_entries(directory, entries, columns):
+    """The partitions of `entries` as one frame (no rows, snapshot dtypes, for none)"""
+    if not entries:
+        return read_snapshot(os.path.join(directory, SCHEMA), columns=columns)
+    frames = [read_snapshot(os.path.join(directory, entry['path']), columns=columns) for entry in entries]
+    return pd.concat(frames, ignore_index=True)
+
+
+def _sort_key(name):
+    """Months in date order with the NEVER partition first"""
+    return (name != NEVER, name)
+
+
+def _scalar(value):
+    """JSON-serializable min / max (ISO date strings for timestamps)"""
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.date().isoformat()
+    return value.item() if hasattr(value, 'item') else value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the transformed listings partitioned by last_review month")
+    parser.add_argument('--snapshot', default=SNAPSHOT_PATH)
+    parser.add_argument('--output', default=PARTITION_DIR)
+    args = parser.parse_args()
+
+    manifest = write_partitions(read_snapshot(args.snapshot), args.output, source=file_digest(args.snapshot))
+    partitions = manifest['partitions']
+    reviewed = [entry for entry in partitions if entry['name'] != NEVER]
+    never = sum(entry['rows'] for entry in partitions if entry['name'] == NEVER)
+    print(f"{manifest['rows']:,} listings in {len(partitions)} partitions → {args.output}")
+    if reviewed:
+        print(f"  {len(reviewed)} months, {reviewed[0]['name']} to {reviewed[-1]['name']}; "
+              f"{never:,} never-reviewed listings")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+"""
+Headless ETL pipeline with content-hash stage caching.
+
+The notebooks re-read the inputs and rewrite every output on each run, even
+when nothing changed. Here each step is a Stage that declares the files it
+reads and writes, which gives the dependency graph:
+
+    quality  (raw + incremental CSVs -> data/quality_report.json)
+    extract  (raw + incremental CSVs -> data/store/, stood for by its state.json)
+      └─ transform  (changed store segments -> transformed_full.csv + .parquet)
+           ├─ star  (-> transformed/star/*.parquet)
+           ├─ partitions  (-> transformed/partitions/, by last_review month)
+           └─ chart.<name> x 4  (-> transformed/<name>.png)
+
+A stage's fingerprint hashes the contents of its input files, the source
+of the modules that implement it and its parameters. The manifest keeps
+each stage's last fingerprint and the digests of the outputs it wrote; a
+stage is skipped when its fingerprint is unchanged and its outputs are
+still those files. Because inputs are compared by content, a stage that
+rewrites an identical file does not invalidate the stages after it.
+
+A stage becomes ready as soon as the stages producing its inputs have
+finished, and ready stages run concurrently in a process pool (the quality
+report next to the extract, the star schema, partitions and the four
+chart renders after the transform). File digests are cached in the manifest by size and
+mtime, so unchanged files are not re-read to be hashed.
+
+Usage:
+    python -m etl.pipeline --workers 4
+    python -m etl.pipeline --force transform
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+from etl.charts import CHARTS, chart_path, save_chart
+from etl.chunked import CHUNK_ROWS, INCREMENTAL_PATH, PARTS_DIR, RAW_PATH, extract, transform_store
+from etl.partitions import MANIFEST, PARTITION_DIR, write_partitions
+from etl.quality import REPORT_PATH, profile_csv, write_report
+from etl.star import STAR_DIR, TABLES, write_star
+from etl.storage import CSV_PATH, SNAPSHOT_PATH, file_digest, partial_path, read_snapshot
+from etl.upsert import STATE_FILE, STORE_DIR
+
+MANIFEST_PATH = 'data/pipeline_manifest.json'
+
+
+class Stage:
+    """One pipeline step: `func(**params)` reads `inputs` and writes `outputs`"""
+
+    def __init__(self, name, func, inputs, outputs, params=None, code=()):
+        self.name = name
+        self.func = func
+        self.inputs = [os.path.normpath(path) for path in inputs]
+        self.outputs = [os.path.normpath(path) for path in outputs]
+        self.params = params or {}
+        # Modules whose source is part of the fingerprint (the stage function's own always is)
+        self.code = sorted({func.__module__, *code})
+
+
+def pipeline_stages(raw_path=RAW_PATH, incremental_path=INCREMENTAL_PATH, parts_dir=PARTS_DIR,
+                    store_path=STORE_DIR, csv_path=CSV_PATH, snapshot_path=SNAPSHOT_PATH,
+                    report_path=REPORT_PATH, star_dir=STAR_DIR, partition_dir=PARTITION_DIR,
+                    chunk_rows=CHUNK_ROWS, today=None):
+    """
+    The extract -> validate -> transform stages and their outputs.
+
+    days_since_review is counted up to `today` (default: the current date),
+    so the transform's fingerprint changes once a day.
+    """
+    today = str((pd.Timestamp.today() if today is None else pd.Timestamp(today)).date())
+    store_state = os.path.join(store_path, STATE_FILE)
+    stages = [
+        Stage('quality', _quality, [raw_path, incremental_path], [report_path],
+              {'raw_path': raw_path, 'incremental_path': incremental_path, 'output_path': report_path,
+               'chunk_rows': chunk_rows},
+              code=['etl.quality', 'etl.chunked']),
+        Stage('extract', _extract, [raw_path, incremental_path], [store_state],
+              {'raw_path': raw_path, 'incremental_path': incremental_path, 'store_path': store_path,
+               'chunk_rows': chunk_rows},
+              code=['etl.chunked', 'etl.upsert', 'etl.schema']),
+        Stage('transform', _transform, [store_state], [csv_path, snapshot_path],
+              {'store_path': store_path, 'csv_path': csv_path, 'snapshot_path': snapshot_path,
+               'parts_dir': parts_dir, 'today': today},
+              code=['etl.chunked', 'etl.transform', 'etl.schema', 'etl.storage', 'etl.upsert']),
+        Stage('star', _star, [snapshot_path], [os.path.join(star_dir, f'{name}.parquet') for name in TABLES],
+              {'snapshot_path': snapshot_path, 'directory': star_dir},
+              code=['etl.star', 'etl.storage']),
+        # The manifest records every partition's digest, so it stands for the whole directory
+        Stage('partitions', _partitions, [snapshot_path], [os.path.join(partition_dir, MANIFEST)],
+              {'snapshot_path': snapshot_path, 'directory': partition_dir},
+              code=['etl.partitions', 'etl.chunked', 'etl.schema', 'etl.storage']),
+    ]
+    for name in CHARTS:
+        path = chart_path(name, os.path.dirname(csv_path))
+        stages.append(Stage(f'chart.{name}', _chart, [snapshot_path], [path],
+                            {'name': name, 'snapshot_path': snapshot_path, 'path': path},
+                            code=['etl.charts', 'etl.storage']))
+    return stages
+
+
+def dependencies(stages):
+    """Names of the stages each stage waits for (the producers of its inputs)"""
+    producers = {}
+    for stage in stages:
+        for path in stage.outputs:
+            if path in producers:
+                raise ValueError(f"{path} is written by both {producers[path]} and {stage.name}")
+            producers[path] = stage.name
+    return {stage.name: {producers[path] for path in stage.inputs if path in producers} for stage in stages}
+
+
+def run(stages, workers=None, manifest_path=MANIFEST_PATH, force=()):
+    """
+    Run the stages that are out of date, concurrently where the graph allows.
+
+    `force` names stages to run even when cached (True for all of them).
+    Returns a DataFrame with each stage's status ('ran' or 'cached'),
+    seconds, worker process and summary, in completion order.
+    """
+    upstream = dependencies(stages)
+    manifest = _load_manifest(manifest_path)
+    digests = FileDigests(manifest['files'])
+    pending = {stage.name: stage for stage in stages}
+    done, running, report = set(), {}, []
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        while pending or running:
+            # Start (or skip) every stage whose inputs are final; skipping may ready more
+            ready = [name for name in pending if upstream[name] <= done]
+            while ready:
+                for name in ready:
+                    stage = pending.pop(name)
+                    fingerprint = stage_fingerprint(stage, digests)
+                    forced = force is True or name in force
+                    if not forced and _is_current(stage, fingerprint, manifest['stages'].get(name), digests):
+                        report.append({'stage': name, 'status': 'cached', 'seconds': 0.0,
+                                       'worker': None, 'summary': ''})
+                        done.add(name)
+                    else:
+                        future = pool.submit(_run_stage, stage.func, stage.params)
+                        running[future] = (stage, fingerprint)
+                ready = [name for name in pending if upstream[name] <= done]
+            if not running:
+                if pending:
+                    raise ValueError(f"Stages waiting on each other: {sorted(pending)}")
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, fingerprint = running.pop(future)
+                summary, seconds, pid = future.result()
+                manifest['stages'][stage.name] = {
+                    'fingerprint': fingerprint,
+                    'outputs': {path: digests.digest(path) for path in stage.outputs},
+                    'seconds': round(seconds, 4),
+                    'finished': pd.Timestamp.now().isoformat(timespec='seconds'),
+                }
+                _save_manifest(manifest, manifest_path)
+                report.append({'stage': stage.name, 'status': 'ran', 'seconds': round(seconds, 4),
+                               'worker': pid, 'summary': summary})
+                done.add(stage.name)
+
+    _save_manifest(manifest, manifest_path)
+    report = pd.DataFrame(report, columns=['stage', 'status', 'seconds', 'worker', 'summary'])
+    report['worker'] = report['worker'].astype('Int64')
+    return report
+
+
+def stage_fingerprint(stage, digests):
+    """BLAKE2b hex digest of the stage's input contents, code and parameters"""
+    for path in stage.inputs:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{stage.name}: input {path} does not exist")
+    parts = {
+        'inputs': {path: digests.digest(path) for path in stage.inputs},
+        'code': {module: digests.digest(importlib.util.find_spec(module).origin) for module in stage.code},
+        'function': f'{stage.func.__module__}.{stage.func.__qualname__}',
+        'params': stage.params,
+    }
+    text = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+class FileDigests:
+    """Content digests of files, reused while a file's size and mtime are unchanged"""
+
+    def __init__(self, entries=None):
+        self.entries = {} if entries is None else entries
+
+    def digest(self, path):
+        stat = os.stat(path)
+        entry = self.entries.get(path)
+        if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+            entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': file_digest(path)}
+            self.entries[path] = entry
+        return entry['digest']
+
+
+# ========== STAGES ==========
+
+def _quality(raw_path, incremental_path, output_path, chunk_rows):
+    raw = profile_csv(raw_path, chunk_rows=chunk_rows)
+    incremental = profile_csv(incremental_path, chunk_rows=chunk_rows)
+    # Overlap of the batch with the raw listings it is merged into
+    write_report([raw.report(), incremental.report(existing_keys=raw.keys.values())], output_path)
+    return f"{raw.rows:,} raw + {incremental.rows:,} incremental rows profiled"
+
+
+def _extract(raw_path, incremental_path, store_path, chunk_rows):
+    counts = extract(raw_path, incremental_path, None, store_path, chunk_rows)
+    return (f"{counts['rows']:,} listings ({'raw reloaded, ' if counts['raw_reloaded'] else ''}"
+            f"{counts['inserted']:,} inserted, "
+            f"{counts['updated']:,} updated, {counts['unchanged']:,} unchanged)")
+
+
+def _transform(store_path, csv_path, snapshot_path, parts_dir, today):
+    result = transform_store(store_path, csv_path, snapshot_path, parts_dir, now=pd.Timestamp(today))
+    return f"{result['rows']:,} rows ({result['transformed_segments']} of {result['segments']} segments transformed)"
+
+
+def _star(snapshot_path, directory):
+    paths = write_star(read_snapshot(snapshot_path), directory)
+    return f"{len(paths)} tables"
+
+
+def _partitions(snapshot_path, directory):
+    manifest = write_partitions(read_snapshot(snapshot_path), directory, source=file_digest(snapshot_path))
+    return f"{manifest['rows']:,} rows in {len(manifest['partitions'])} partitions"
+
+
+def _chart(name, snapshot_path, path):
+    return save_chart(name, snapshot_path, path)
+
+
+# ========== HELPERS ==========
+
+def _run_stage(func, params):
+    """Worker: run one stage and time it"""
+    started = time.perf_counter()
+    summary = func(**params)
+    return summary, time.perf_counter() - started, os.getpid()
+
+
+def _is_current(stage, fingerprint, entry, digests):
+    """Whether the manifest entry matches the fingerprint and the outputs are the files it wrote"""
+    if entry is None or entry['fingerprint'] != fingerprint:
+        return False
+    return all(
+        os.path.exists(path) and digests.digest(path) == entry['outputs'].get(path)
+        for path in stage.outputs
+    )
+
+
+def _load_manifest(path):
+    if not os.path.exists(path):
+        return {'files': {}, 'stages': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_manifest(manifest, path):
+    """Write the manifest next to `path` and rename it over, like the snapshots"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    partial = partial_path(path)
+    with open(partial, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(partial, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the ETL stages that are out of date")
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--force', nargs='*', default=None, metavar='STAGE',
+                        help='Run these stages even when cached (all stages when none are named)')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='Listings per chunk')
+    parser.add_argument('--raw', default=RAW_PATH)
+    parser.add_argument('--incremental', default=INCREMENTAL_PATH)
+    parser.add_argument('--manifest', default=MANIFEST_PATH)
+    parser.add_argument('--list', action='store_true', help='Print the stages and their dependencies')
+    args = parser.parse_args()
+
+    stages = pipeline_stages(raw_path=args.raw, incremental_path=args.incremental, chunk_rows=args.chunk_rows)
+    if args.list:
+        for name, upstream in dependencies(stages).items():
+            print(f"{name}: after {', '.join(sorted(upstream))}" if upstream else f"{name}: inputs only")
+        return
+
+    force = () if args.force is None else (args.force or True)
+    started = time.perf_counter()
+    report = run(stages, workers=args.workers, manifest_path=args.manifest, force=force)
+    elapsed = time.perf_counter() - started
+
+    print(report.to_string(index=False))
+    ran = report['status'] == 'ran'
+    print(f"\n{ran.sum()} ran, {(~ran).sum()} cached in {elapsed:.2f}s "
+          f"(stage time {report['seconds'].sum():.2f}s)")
+
+
+if __name__ == '__main__':
+    main()
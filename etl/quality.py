@@ -0,0 +1,297 @@
+"""
+Single-pass data-quality profiler for the extracted listings.
+
+The extract notebook used to scan each dataset once per check (missing
+values twice, duplicate IDs, duplicate rows, a Python set for overlapping
+IDs, separate min/max/threshold checks). QualityProfile.add() computes all
+of them from one chunk at a time:
+
+- missing values per column (one isna() pass, reused for the row hashes)
+- the dtype each column was parsed with, to spot inconsistent columns
+- occurrence counts of the listing id and of a hash of every row, for
+  duplicate IDs, fully duplicated rows and overlap with existing IDs
+- min / max, zero, below-range, above-range and non-numeric counts for the
+  columns in RANGE_CHECKS
+
+Partial profiles of different chunks merge exactly, so a file of any size
+can be profiled in bounded-size chunks (or in parallel) with cost linear in
+its rows; the id and row-hash counts only grow with the distinct values.
+report() returns a JSON-serializable dict.
+
+Usage:
+    python -m etl.quality data/raw_data.csv data/incremental_data.csv --output data/quality_report.json
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from etl.chunked import CHUNK_ROWS, iter_csv
+from etl.upsert import KEY, STORE_DIR, ListingStore
+
+REPORT_PATH = 'data/quality_report.json'
+
+# Valid (inclusive) range per column; values outside are counted as violations
+RANGE_CHECKS = {
+    'price': (0, 10_000),
+    'minimum_nights': (1, 365),
+    'availability_365': (0, 365),
+}
+
+# Row-hash value of a missing cell, whatever dtype the column was read as
+NULL_HASH = np.uint64(0x9E3779B97F4A7C15)
+HASH_MULTIPLIER = np.uint64(1_000_003)
+
+
+class QualityProfile:
+    """Mergeable data-quality statistics for one dataset"""
+
+    def __init__(self, name=None, key=KEY, range_checks=RANGE_CHECKS):
+        self.name = name
+        self.key = key
+        self.range_checks = range_checks
+        self.rows = 0
+        self.chunks = 0
+        self.missing = pd.Series(dtype='int64')
+        self.dtypes = {}
+        self.ranges = {}
+        self.keys = _Counts()
+        self.row_hashes = _Counts()
+
+    def add(self, chunk):
+        """Profile one chunk of rows; returns self"""
+        missing = chunk.isna()
+        self.missing = self.missing.add(missing.sum(), fill_value=0).astype('int64')
+        for col in chunk.columns:
+            self.dtypes.setdefault(col, set()).add(str(chunk[col].dtype))
+
+        if self.key in chunk.columns:
+            keys = pd.to_numeric(chunk[self.key], errors='coerce').dropna()
+            self.keys.add(keys.to_numpy(dtype='int64'))
+        self.row_hashes.add(_row_hashes(chunk, missing))
+
+        for col, (low, high) in self.range_checks.items():
+            if col in chunk.columns:
+                self.ranges[col] = _merge_ranges(self.ranges.get(col), _range_stats(chunk[col], low, high))
+
+        self.rows += len(chunk)
+        self.chunks += 1
+        return self
+
+    def merge(self, other):
+        """Combine with the profile of other rows of the same dataset; returns self"""
+        self.missing = self.missing.add(other.missing, fill_value=0).astype('int64')
+        for col, dtypes in other.dtypes.items():
+            self.dtypes.setdefault(col, set()).update(dtypes)
+        for col, stats in other.ranges.items():
+            self.ranges[col] = _merge_ranges(self.ranges.get(col), stats)
+        self.keys.merge(other.keys)
+        self.row_hashes.merge(other.row_hashes)
+        self.rows += other.rows
+        self.chunks += other.chunks
+        return self
+
+    def shared_keys(self, other):
+        """Distinct key values present in both profiles"""
+        return np.intersect1d(self.keys.values(), other.keys.values(), assume_unique=True)
+
+    def report(self, existing_keys=None):
+        """
+        Quality report as a JSON-serializable dict.
+
+        With `existing_keys` (e.g. the IDs already in the listing store) it
+        also counts how many of this dataset's IDs are already known.
+        """
+        key_values, key_counts = self.keys.values(), self.keys.counts()
+        repeated = key_counts > 1
+        columns = list(self.dtypes)
+        report = {
+            'dataset': self.name,
+            'rows': int(self.rows),
+            'columns': len(columns),
+            'chunks': int(self.chunks),
+            'missing': {
+                col: {
+                    'count': int(self.missing.get(col, 0)),
+                    'pct': round(100 * float(self.missing.get(col, 0)) / self.rows, 2) if self.rows else 0.0,
+                }
+                for col in columns
+            },
+            'dtypes': {col: sorted(dtypes) for col, dtypes in self.dtypes.items()},
+            'inconsistent_dtypes': [col for col, dtypes in self.dtypes.items() if len(dtypes) > 1],
+            'duplicates': {
+                'key': self.key,
+                'distinct_keys': int(len(key_values)),
+                'duplicate_keys': int(repeated.sum()),
+                'rows_with_duplicate_key': int(key_counts[repeated].sum()),
+                'duplicate_rows': int(self.rows - len(self.row_hashes.values())),
+            },
+            'ranges': {
+                col: {'valid_range': list(self.range_checks[col]), **_range_report(stats)}
+                for col, stats in self.ranges.items()
+            },
+        }
+        if existing_keys is not None:
+            existing = np.unique(np.asarray(existing_keys, dtype='int64'))
+            report['overlap'] = {
+                'existing_keys': int(len(existing)),
+                'overlapping_keys': int(np.isin(key_values, existing, assume_unique=True).sum()),
+            }
+        return report
+
+
+def profile_frame(df, name=None, chunk_rows=CHUNK_ROWS):
+    """Profile an in-memory DataFrame in slices of `chunk_rows` rows"""
+    profile = QualityProfile(name)
+    for start in range(0, len(df), chunk_rows):
+        profile.add(df.iloc[start:start + chunk_rows])
+    return profile
+
+
+def profile_csv(path, name=None, chunk_rows=CHUNK_ROWS):
+    """Profile a CSV file without loading more than one chunk"""
+    profile = QualityProfile(name or os.path.splitext(os.path.basename(path))[0])
+    for chunk in iter_csv(path, chunk_rows):
+        profile.add(chunk)
+    return profile
+
+
+def write_report(reports, path=REPORT_PATH):
+    """Write quality reports (a list of report dicts) as JSON"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'created': pd.Timestamp.now().isoformat(timespec='seconds'), 'datasets': reports}, f, indent=2)
+    return path
+
+
+# ========== HELPERS ==========
+
+class _Counts:
+    """Occurrence counts of 64-bit values, compacted as chunks are added"""
+
+    def __init__(self):
+        self._values = None
+        self._counts = None
+        self._pending = []
+        self._pending_size = 0
+
+    def add(self, values, counts=None):
+        values = np.asarray(values)
+        self._pending.append((values, np.ones(len(values), dtype='int64') if counts is None else counts))
+        self._pending_size += len(values)
+        # Amortized: sort again only once the new values outnumber the distinct ones
+        if self._pending_size > max(0 if self._values is None else len(self._values), CHUNK_ROWS):
+            self._compact()
+
+    def merge(self, other):
+        if other._values is not None:
+            self.add(other._values, other._counts)
+        for values, counts in other._pending:
+            self.add(values, counts)
+
+    def values(self):
+        self._compact()
+        return np.empty(0, dtype='int64') if self._values is None else self._values
+
+    def counts(self):
+        self._compact()
+        return np.empty(0, dtype='int64') if self._counts is None else self._counts
+
+    def _compact(self):
+        if not self._pending:
+            return
+        parts = self._pending if self._values is None else [(self._values, self._counts)] + self._pending
+        values, inverse = np.unique(np.concatenate([part[0] for part in parts]), return_inverse=True)
+        counts = np.bincount(inverse, weights=np.concatenate([part[1] for part in parts]), minlength=len(values))
+        self._values, self._counts = values, counts.astype('int64')
+        self._pending, self._pending_size = [], 0
+
+
+def _row_hashes(chunk, missing):
+    """
+    64-bit hash per row that does not depend on how the chunk was parsed.
+
+    Numbers are hashed as float64 and missing cells as NULL_HASH, so a
+    column read as int in one chunk and as float (or all-empty) in another
+    still gives equal rows equal hashes.
+    """
+    combined = np.zeros(len(chunk), dtype=np.uint64)
+    for col in chunk.columns:
+        series = chunk[col]
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            hashes = pd.util.hash_array(series.to_numpy(dtype='float64', na_value=np.nan))
+        else:
+            # Hash each distinct value once (text columns repeat a lot); a
+            # column that is all missing in this chunk has no uniques at all
+            codes, uniques = pd.factorize(series)
+            hashes = np.full(len(series), NULL_HASH, dtype=np.uint64)
+            present = codes >= 0
+            if len(uniques):
+                hashes[present] = pd.util.hash_array(np.asarray(uniques, dtype=object))[codes[present]]
+        hashes[missing[col].to_numpy()] = NULL_HASH
+        combined = combined * HASH_MULTIPLIER ^ hashes
+    return combined
+
+
+def _range_stats(series, low, high):
+    """Partial range statistics of one chunk's column"""
+    values = pd.to_numeric(series, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    present = ~np.isnan(values)
+    return {
+        'min': values[present].min() if present.any() else None,
+        'max': values[present].max() if present.any() else None,
+        'zero': int((values == 0).sum()),
+        'below': int((values < low).sum()),
+        'above': int((values > high).sum()),
+        'non_numeric': int(series.notna().sum() - present.sum()),
+    }
+
+
+def _merge_ranges(left, right):
+    if left is None:
+        return right
+    extremes = {
+        'min': min((v for v in (left['min'], right['min']) if v is not None), default=None),
+        'max': max((v for v in (left['max'], right['max']) if v is not None), default=None),
+    }
+    return {**{name: left[name] + right[name] for name in ('zero', 'below', 'above', 'non_numeric')}, **extremes}
+
+
+def _range_report(stats):
+    return {
+        'min': None if stats['min'] is None else float(stats['min']),
+        'max': None if stats['max'] is None else float(stats['max']),
+        **{name: int(stats[name]) for name in ('zero', 'below', 'above', 'non_numeric')},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile listing CSVs for data-quality issues in one pass")
+    parser.add_argument('paths', nargs='+', help='CSV files to profile')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='Rows per chunk')
+    parser.add_argument('--store', default=STORE_DIR, help='Listing store to check ID overlap against')
+    parser.add_argument('--output', default=REPORT_PATH)
+    args = parser.parse_args()
+
+    # Each file's overlap is with what the store held before that file was applied
+    store = ListingStore(args.store)
+    reports = [
+        profile_csv(path, chunk_rows=args.chunk_rows).report(
+            existing_keys=None if store.is_empty else store.existing_keys(path))
+        for path in args.paths
+    ]
+    write_report(reports, args.output)
+    for report in reports:
+        duplicates = report['duplicates']
+        print(f"{report['dataset']}: {report['rows']:,} rows, "
+              f"{sum(1 for col in report['missing'].values() if col['count']):,} columns with missing values, "
+              f"{duplicates['rows_with_duplicate_key']:,} rows with duplicate IDs, "
+              f"{duplicates['duplicate_rows']:,} duplicate rows")
+    print(f"Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+Compact column schema for the listings dataset.
+
+Shared by the transform notebook (before saving) and the dashboard (after
+loading) so every column has a compact dtype: categoricals for the
+low-cardinality labels, integer IDs, and float32 / small integers for the
+measures. `memory_report()` compares the footprint before and after.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Ordered levels for the derived label columns (lowest to highest)
+CATEGORY_LEVELS = {
+    'price_category': ['Budget', 'Economy', 'Mid-Range', 'Premium', 'Luxury'],
+    'review_activity': ['Low', 'Medium', 'High'],
+    'availability_category': ['Low', 'Medium', 'High', 'Full'],
+    'host_experience': ['Beginner', 'Experienced', 'Professional'],
+    'rental_duration_type': ['Short-Stay', 'Weekly', 'Monthly', 'Long-Term'],
+    'review_volume_tier': ['Low', 'Medium', 'High', 'Very High'],
+}
+
+# Unordered labels whose levels come from the data
+CATEGORY_COLUMNS = ['neighbourhood_group', 'neighbourhood', 'room_type', 'host_name']
+
+# Identifiers (downcast only as far as the values allow)
+ID_COLUMNS = ['id', 'host_id']
+
+# Target dtypes for the measures; integers widen automatically on overflow
+NUMERIC_DTYPES = {
+    'latitude': 'float32',
+    'longitude': 'float32',
+    'price': 'float32',
+    'reviews_per_month': 'float32',
+    'days_since_review': 'float32',
+    'minimum_nights': 'int16',
+    'availability_365': 'int16',
+    'calculated_host_listings_count': 'int16',
+    'number_of_reviews': 'int32',
+    'number_of_reviews_ltm': 'int32',
+}
+
+BOOL_COLUMNS = ['has_been_reviewed', 'is_new_listing']
+
+DATE_COLUMNS = ['last_review']
+
+
+def apply_schema(df, inplace=False):
+    """
+    Cast every known column of `df` to its compact dtype.
+
+    Columns missing from `df` are skipped, and columns that already have the
+    target dtype are left untouched, so the function is cheap to re-apply.
+    """
+    if not inplace:
+        df = df.copy()
+
+    for col in ID_COLUMNS:
+        if col in df.columns:
+            df[col] = _compact_integer(pd.to_numeric(df[col]), 'int64', downcast=True)
+
+    for col, dtype in NUMERIC_DTYPES.items():
+        if col not in df.columns:
+            continue
+        if dtype.startswith('int'):
+            df[col] = _compact_integer(df[col], dtype)
+        elif df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+
+    for col, levels in CATEGORY_LEVELS.items():
+        if col in df.columns:
+            dtype = pd.CategoricalDtype(levels, ordered=True)
+            if df[col].dtype != dtype:
+                df[col] = df[col].astype(dtype)
+
+    for col in BOOL_COLUMNS:
+        if col in df.columns and not pd.api.types.is_bool_dtype(df[col]):
+            df[col] = df[col].astype(str).str.lower().eq('true')
+
+    for col in DATE_COLUMNS:
+        if col in df.columns and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+
+    return df
+
+
+def memory_usage_mb(df):
+    """Deep memory footprint of a frame in megabytes"""
+    return df.memory_usage(deep=True, index=False).sum() / 1024**2
+
+
+def memory_report(before, after):
+    """
+    Per-column memory comparison between two versions of the same frame.
+
+    Returns a DataFrame with dtype and MB before/after for every column of
+    `after`, plus a final 'TOTAL' row.
+    """
+    usage_before = before.memory_usage(deep=True, index=False) / 1024**2
+    usage_after = after.memory_usage(deep=True, index=False) / 1024**2
+
+    report = pd.DataFrame({
+        'Column': after.columns,
+        'Dtype_Before': [str(before[col].dtype) if col in before.columns else '' for col in after.columns],
+        'Dtype_After': [str(after[col].dtype) for col in after.columns],
+        'MB_Before': [usage_before.get(col, np.nan) for col in after.columns],
+        'MB_After': [usage_after[col] for col in after.columns],
+    })
+    total = pd.DataFrame([{
+        'Column': 'TOTAL',
+        'Dtype_Before': '',
+        'Dtype_After': '',
+        'MB_Before': usage_before.sum(),
+        'MB_After': usage_after.sum(),
+    }])
+    report = pd.concat([report, total], ignore_index=True)
+    report['Saved_Pct'] = (1 - report['MB_After'] / report['MB_Before']) * 100
+    return report.round(3)
+
+
+def _compact_integer(series, dtype, downcast=False):
+    """Cast to `dtype`, widening to int64 if values do not fit"""
+    if series.isna().any():
+        return series
+    if downcast:
+        return pd.to_numeric(series, downcast='integer')
+    info = np.iinfo(dtype)
+    if series.min() < info.min or series.max() > info.max:
+        dtype = 'int64'
+    if series.dtype == dtype:
+        return series
+    return series.astype(dtype)
@@ -0,0 +1,163 @@
+"""
+Star-schema output of the transformed listings.
+
+The wide dataset repeats the host, neighbourhood and room type labels on
+every listing. The star schema stores each of them once, in a dimension
+table with an integer surrogate key, and the listings fact table keeps the
+keys next to the listing's measures and listing-level labels:
+
+- dim_host: one row per host_id (hosts who share a name stay separate),
+  with precomputed host-level aggregates
+- dim_neighbourhood: borough and neighbourhood
+- dim_room_type: room type
+- dim_date: calendar attributes of the last_review dates; the key is the
+  date as YYYYMMDD and 0 stands for "never reviewed"
+- fact_listings: listing id, the four keys and everything else
+
+Keys are assigned in sorted order of the natural key, so the same data
+always gets the same keys. Each table is written as its own Parquet file.
+
+Usage:
+    python -m etl.star
+"""
+
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from etl.storage import SNAPSHOT_PATH, read_snapshot, write_snapshot
+
+STAR_DIR = 'transformed/star'
+TABLES = ['fact_listings', 'dim_host', 'dim_neighbourhood', 'dim_room_type', 'dim_date']
+
+# Natural key columns of each dimension, moved out of the fact table
+DIMENSIONS = {
+    'dim_host': ('host_key', ['host_id']),
+    'dim_neighbourhood': ('neighbourhood_key', ['neighbourhood_group', 'neighbourhood']),
+    'dim_room_type': ('room_type_key', ['room_type']),
+}
+# Host attributes: stored once in dim_host instead of on every listing
+HOST_ATTRIBUTES = ['host_name', 'calculated_host_listings_count', 'host_experience']
+# Precomputed per host: (output column, (fact column, aggregation))
+HOST_AGGREGATES = {
+    'listings': ('id', 'size'),
+    'avg_price': ('price', 'mean'),
+    'total_reviews': ('number_of_reviews', 'sum'),
+    'avg_availability': ('availability_365', 'mean'),
+}
+DATE_COLUMN = 'last_review'
+UNKNOWN_DATE_KEY = 0
+
+
+def build_star(df):
+    """Fact and dimension tables (dict of DataFrames, see TABLES) for a transformed frame"""
+    fact = df.copy()
+    tables = {}
+    for name, (key, columns) in DIMENSIONS.items():
+        if name == 'dim_host':
+            table, keys = host_dimension(df)
+        else:
+            table, keys = dimension(df, columns, key)
+        tables[name] = table
+        fact[key] = keys
+
+    date_keys = date_key(df[DATE_COLUMN])
+    tables['dim_date'] = date_dimension(date_keys)
+    fact['date_key'] = date_keys
+
+    moved = [col for _, columns in DIMENSIONS.values() for col in columns] + HOST_ATTRIBUTES + [DATE_COLUMN]
+    fact = fact.drop(columns=[col for col in moved if col in fact.columns])
+    keys = [key for key, _ in DIMENSIONS.values()] + ['date_key']
+    others = [col for col in fact.columns if col not in keys and col != 'id']
+    tables['fact_listings'] = fact[['id'] + keys + others]
+    return {name: tables[name] for name in TABLES}
+
+
+def dimension(df, columns, key):
+    """(distinct values of `columns` with a 1-based surrogate key, each row's key)"""
+    groups = df.groupby(columns, sort=True, observed=True, dropna=False)
+    keys = (groups.ngroup().to_numpy() + 1).astype('int32')
+    table = groups.size().reset_index()[columns]
+    table.insert(0, key, np.arange(1, len(table) + 1, dtype='int32'))
+    return table, keys
+
+
+def host_dimension(df):
+    """(dim_host with attributes and precomputed aggregates per host_id, each row's host_key)"""
+    table, keys = dimension(df, ['host_id'], 'host_key')
+    attributes = [col for col in HOST_ATTRIBUTES if col in df.columns]
+    aggregates = {name: spec for name, spec in HOST_AGGREGATES.items() if spec[0] in df.columns}
+    stats = df.groupby(keys, sort=True).agg(
+        **{col: (col, 'first') for col in attributes},
+        **aggregates
+    )
+    return pd.concat([table, stats.reset_index(drop=True)], axis=1), keys
+
+
+def date_key(dates):
+    """YYYYMMDD integer key per date, UNKNOWN_DATE_KEY where missing"""
+    dates = pd.to_datetime(dates)
+    keys = dates.dt.year * 10000 + dates.dt.month * 100 + dates.dt.day
+    return keys.fillna(UNKNOWN_DATE_KEY).astype('int32').to_numpy()
+
+
+def date_dimension(keys):
+    """Calendar attributes for the distinct date keys (one row with missing values for key 0)"""
+    keys = np.unique(keys)
+    dates = pd.to_datetime(pd.Series(keys.astype(str)).where(keys != UNKNOWN_DATE_KEY), format='%Y%m%d')
+    return pd.DataFrame({
+        'date_key': keys.astype('int32'),
+        'date': dates,
+        'year': dates.dt.year.astype('Int16'),
+        'quarter': dates.dt.quarter.astype('Int8'),
+        'month': dates.dt.month.astype('Int8'),
+        'month_name': dates.dt.month_name(),
+        'day_of_week': dates.dt.day_name(),
+        'is_weekend': (dates.dt.dayofweek >= 5).where(dates.notna()).astype('boolean'),
+    })
+
+
+def denormalize(star):
+    """Wide listings frame rebuilt from the star tables (fact joined to every dimension)"""
+    wide = star['fact_listings']
+    for name, (key, columns) in DIMENSIONS.items():
+        dim = star[name]
+        if name == 'dim_host':
+            dim = dim[[key] + columns + [col for col in HOST_ATTRIBUTES if col in dim.columns]]
+        wide = wide.merge(dim, on=key, how='left')
+    dates = star['dim_date'][['date_key', 'date']].rename(columns={'date': DATE_COLUMN})
+    wide = wide.merge(dates, on='date_key', how='left')
+    return wide.drop(columns=[key for key, _ in DIMENSIONS.values()] + ['date_key'])
+
+
+def write_star(df, directory=STAR_DIR):
+    """Write the star tables as Parquet files in `directory`; returns {table: path}"""
+    return {
+        name: write_snapshot(table, os.path.join(directory, f'{name}.parquet'))
+        for name, table in build_star(df).items()
+    }
+
+
+def read_star(directory=STAR_DIR, tables=TABLES):
+    """Star tables from `directory` as a dict of DataFrames"""
+    return {name: read_snapshot(os.path.join(directory, f'{name}.parquet')) for name in tables}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the star-schema tables from the transformed snapshot")
+    parser.add_argument('--snapshot', default=SNAPSHOT_PATH)
+    parser.add_argument('--output', default=STAR_DIR)
+    args = parser.parse_args()
+
+    import pyarrow.parquet as pq
+
+    paths = write_star(read_snapshot(args.snapshot), args.output)
+    for name, path in paths.items():
+        rows = pq.read_metadata(path).num_rows
+        print(f"{name}: {rows:,} rows, {os.path.getsize(path) / 1024:.0f} KB → {path}")
+
+
+if __name__ == '__main__':
+    main()
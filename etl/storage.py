@@ -0,0 +1,105 @@
+"""
+Storage helpers for the transformed listings dataset.
+
+The transform stage writes the dataset twice: the human-readable CSV and a
+typed columnar snapshot (Parquet). The snapshot keeps categoricals, datetimes
+and booleans as their real types, so readers can skip CSV parsing and date
+conversion and load only the columns they need.
+"""
+
+import hashlib
+import os
+
+import pandas as pd
+
+CSV_PATH = 'transformed/transformed_full.csv'
+SNAPSHOT_PATH = 'transformed/transformed_full.parquet'
+
+DATE_COLUMNS = ['last_review']
+# Bounded row groups let readers fetch the rows they need (the export's extra columns)
+ROW_GROUP_ROWS = 50_000
+
+
+def write_snapshot(df, path=SNAPSHOT_PATH, row_group_rows=ROW_GROUP_ROWS):
+    """
+    Write the transformed dataset as a typed Parquet snapshot.
+
+    The file is written next to `path` and renamed over it, so a running
+    dashboard never reads a half-written snapshot.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    partial = partial_path(path)
+    df.to_parquet(partial, engine='pyarrow', index=False, row_group_size=row_group_rows)
+    os.replace(partial, path)
+    return path
+
+
+def partial_path(path):
+    """Temporary name a file is written under before replacing `path`"""
+    return f"{path}.partial"
+
+
+def read_snapshot(path=SNAPSHOT_PATH, columns=None):
+    """Read the Parquet snapshot, optionally restricted to `columns`"""
+    if columns is not None:
+        available = _snapshot_columns(path)
+        columns = [col for col in columns if col in available]
+    return pd.read_parquet(path, engine='pyarrow', columns=columns)
+
+
+def read_csv(path=CSV_PATH, columns=None):
+    """Read the CSV export, parsing the date columns it contains"""
+    usecols = None if columns is None else (lambda col: col in set(columns))
+    df = pd.read_csv(path, usecols=usecols)
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    return df
+
+
+def load_listings(columns=None, snapshot_path=SNAPSHOT_PATH, csv_path=CSV_PATH):
+    """
+    Load the transformed listings, preferring the columnar snapshot.
+
+    Falls back to the CSV only when no snapshot exists. Raises
+    FileNotFoundError when neither file is present.
+    """
+    if os.path.exists(snapshot_path):
+        return read_snapshot(snapshot_path, columns=columns)
+    return read_csv(csv_path, columns=columns)
+
+
+def listing_columns(snapshot_path=SNAPSHOT_PATH, csv_path=CSV_PATH):
+    """Column names, in file order, of the file load_listings() would read"""
+    if os.path.exists(snapshot_path):
+        return _snapshot_columns(snapshot_path)
+    return pd.read_csv(csv_path, nrows=0).columns.tolist()
+
+
+def snapshot_fingerprint(snapshot_path=SNAPSHOT_PATH, csv_path=CSV_PATH):
+    """
+    (path, size, mtime) of the file load_listings() would read.
+
+    Changes whenever the ETL rewrites the dataset; None when no file exists.
+    """
+    path = snapshot_path if os.path.exists(snapshot_path) else csv_path
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return path, stat.st_size, stat.st_mtime_ns
+
+
+def file_digest(path, block_size=1 << 20):
+    """BLAKE2b hex digest of a file's contents"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _snapshot_columns(path):
+    """Column names stored in a Parquet file, read from its footer"""
+    import pyarrow.parquet as pq
+
+    return pq.read_schema(path).names
@@ -0,0 +1,376 @@
+"""
+Incremental upsert store for the extracted listings.
+
+Instead of concatenating the full history with every new batch and dropping
+duplicate IDs, listings are kept in a directory of Parquet segments plus a
+small index (listing id -> row hash, segment). Applying a batch only looks
+up its IDs in the index, writes the inserted and changed rows as one new
+segment and records their index entries as a delta file next to it; rows
+already in the store are never re-read, and the full index is rewritten
+only once every INDEX_DELTAS batches, when the deltas are folded into it.
+
+Reading the store returns, for every id, the row from the segment the index
+points to, ordered by segment and then by position within the batch.
+
+The store also records the content digest of the base file it was loaded
+from (the raw listings), with the file's size and mtime. base_is_current()
+hashes the file again only when those changed; when its content changed,
+load_base() clears the store and loads it again, so edits to the base are
+never masked by the listings already stored.
+
+Batches applied with a `source` (the file they were read from) have their
+segments recorded, so existing_keys() can tell which listings the store
+held apart from that file's batches, however often it was applied.
+"""
+
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from etl.storage import file_digest, partial_path
+
+STORE_DIR = 'data/store'
+KEY = 'id'
+INDEX_FILE = 'index.parquet'
+INDEX_DELTA_PATTERN = 'index-{:05d}.parquet'
+BASE_FILE = 'base.json'
+STATE_FILE = 'state.json'
+SOURCES_FILE = 'sources.json'
+SEGMENT_PATTERN = 'segment-{:05d}.parquet'
+# Index deltas kept before they are folded into the full index
+INDEX_DELTAS = 16
+
+
+class ListingStore:
+    """Parquet segments of listing rows with an id-keyed index"""
+
+    def __init__(self, path=STORE_DIR, key=KEY):
+        self.path = path
+        self.key = key
+        self.index_path = os.path.join(path, INDEX_FILE)
+        self.base_path = os.path.join(path, BASE_FILE)
+        self.sources_path = os.path.join(path, SOURCES_FILE)
+        self.index = self._read_index()
+
+    @property
+    def base_digest(self):
+        """Content digest of the base file the store was loaded from (None if unknown)"""
+        base = self._read_base()
+        return None if base is None else base['digest']
+
+    def base_is_current(self, path):
+        """
+        Whether the file at `path` is the base the store was loaded from.
+
+        The file is hashed only when its size or mtime differ from those
+        recorded; an unchanged digest then records the new ones.
+        """
+        base = self._read_base()
+        if base is None:
+            return False
+        stat = os.stat(path)
+        if (base.get('size'), base.get('mtime_ns')) == (stat.st_size, stat.st_mtime_ns):
+            return True
+        if file_digest(path) != base['digest']:
+            return False
+        self._write_base({**base, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns})
+        return True
+
+    @property
+    def is_empty(self):
+        """True until the first batch has been applied"""
+        return len(self.index) == 0
+
+    def __len__(self):
+        return len(self.index)
+
+    def segments(self):
+        """Segment numbers present on disk, oldest first"""
+        return _numbered(self.path, SEGMENT_PATTERN)
+
+    def index_deltas(self):
+        """Numbers of the index delta files not yet folded into the full index"""
+        return _numbered(self.path, INDEX_DELTA_PATTERN)
+
+    def upsert(self, batch, source=None):
+        """
+        Apply a batch of listings keyed on `key`.
+
+        Within the batch the last row per id wins. Returns a dict with the
+        inserted, updated and unchanged row counts and the segment written
+        (None when nothing changed). The segment is recorded under
+        `source`, the path of the file the batch came from, if given.
+        """
+        batch = batch.drop_duplicates(subset=[self.key], keep='last').reset_index(drop=True)
+        batch = self._align(batch)
+        ids = batch[self.key].to_numpy(dtype='int64')
+        hashes = row_hashes(batch)
+
+        positions = self.index.index.get_indexer(ids)
+        known = positions >= 0
+        stored = np.zeros(len(batch), dtype='uint64')
+        stored[known] = self.index['row_hash'].to_numpy()[positions[known]]
+        inserted = ~known
+        updated = known & (stored != hashes)
+
+        result = {
+            'inserted': int(inserted.sum()),
+            'updated': int(updated.sum()),
+            'unchanged': int((known & ~updated).sum()),
+            'segment': None,
+        }
+        changed = inserted | updated
+        if not changed.any():
+            return result
+
+        segments = self.segments()
+        segment = segments[-1] + 1 if segments else 0
+        os.makedirs(self.path, exist_ok=True)
+        batch[changed].to_parquet(self._segment_path(segment), engine='pyarrow', index=False)
+
+        # Record the changed entries as a delta, then apply them in memory
+        delta = pd.DataFrame(
+            {'row_hash': hashes[changed], 'segment': np.full(changed.sum(), segment, dtype='int32')},
+            index=pd.Index(ids[changed], name=self.key),
+        )
+        _write_parquet(delta.reset_index(), self._delta_path(segment))
+        self.index.iloc[positions[updated], self.index.columns.get_loc('row_hash')] = hashes[updated]
+        self.index.iloc[positions[updated], self.index.columns.get_loc('segment')] = segment
+        added = delta[inserted[changed]]
+        self.index = pd.concat([self.index, added]) if len(self.index) else added
+        if len(self.index_deltas()) > INDEX_DELTAS:
+            self._write_index()
+        if source is not None:
+            sources = self._read_sources()
+            sources.setdefault(_source_key(source), []).append(segment)
+            _write_json(sources, self.sources_path)
+
+        result['segment'] = segment
+        return result
+
+    def load_base(self, batches, digest, source=None):
+        """
+        Replace the store's contents with the base listings.
+
+        `batches` are DataFrames (e.g. chunks of the raw CSV) and `digest`
+        the base file's content digest, recorded once every batch is in.
+        Returns the number of listings loaded. With `source` (the base
+        file's path) its size and mtime are recorded too, for
+        base_is_current().
+        """
+        stat = None if source is None else os.stat(source)
+        self.clear()
+        for batch in batches:
+            self.upsert(batch, source)
+        self._write_index()
+        base = {'digest': digest, 'listings': len(self)}
+        if stat is not None:
+            base.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+        self._write_base(base)
+        return len(self)
+
+    def existing_keys(self, source=None):
+        """
+        Keys the store holds apart from the batches read from `source`.
+
+        A key whose current row came from one of those batches counts only
+        if an older row of it is in a segment `source` did not write, so
+        the store's state before that file was applied is recovered even
+        after it was applied (once or many times). Without `source`, every
+        key. Sources recorded before a compact() are forgotten.
+        """
+        keys = self.index.index.to_numpy()
+        written = self._read_sources().get(_source_key(source), []) if source is not None else []
+        if not written:
+            return keys
+        by_source = self.index['segment'].isin(written).to_numpy()
+        others = [
+            pd.read_parquet(self._segment_path(segment), engine='pyarrow', columns=[self.key])[self.key].to_numpy()
+            for segment in self.segments() if segment not in written
+        ]
+        earlier = np.isin(keys[by_source], np.concatenate(others)) if others else np.zeros(by_source.sum(), bool)
+        return np.concatenate([keys[~by_source], keys[by_source][earlier]])
+
+    def clear(self):
+        """Remove every segment, the index, the base digest and the recorded sources"""
+        paths = [self.base_path, self.index_path, self.sources_path]
+        paths += [self._delta_path(number) for number in self.index_deltas()]
+        paths += [self._segment_path(number) for number in self.segments()]
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        self.index = self._empty_index()
+
+    def read(self, columns=None):
+        """Current version of every listing as one DataFrame"""
+        frames = list(self.iter_segments(columns))
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)
+
+    def iter_segments(self, columns=None):
+        """
+        Live rows one segment at a time, oldest first.
+
+        Memory stays bounded by the largest segment, so stores built from
+        chunked upserts can be streamed without loading every listing.
+        """
+        for segment in self.segments():
+            yield self.read_segment(segment, columns)
+
+    def read_segment(self, segment, columns=None):
+        """Rows of one segment the index still points to"""
+        wanted = None if columns is None else list(dict.fromkeys([self.key] + list(columns)))
+        part = pd.read_parquet(self._segment_path(segment), engine='pyarrow', columns=wanted)
+        part = part[self.is_live(part[self.key], segment)].reset_index(drop=True)
+        return part if columns is None else part[list(columns)]
+
+    def is_live(self, ids, segment):
+        """Boolean mask of the `ids` whose current row is in `segment`"""
+        return self.index['segment'].reindex(np.asarray(ids, dtype='int64')).to_numpy() == segment
+
+    def write_state(self):
+        """
+        Record the segments (with their versions) and the listing count.
+
+        The file changes exactly when the store's contents do, so it can
+        stand for the store as a pipeline stage output. Returns its path.
+        """
+        path = os.path.join(self.path, STATE_FILE)
+        state = {
+            'segments': {str(segment): self.segment_version(segment) for segment in self.segments()},
+            'listings': len(self),
+        }
+        _write_json(state, path)
+        return path
+
+    def segment_version(self, segment):
+        """(size, mtime) of a segment file: changes whenever the number is reused"""
+        stat = os.stat(self._segment_path(segment))
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def compact(self):
+        """Rewrite the live rows as a single segment and drop the old ones"""
+        old = self.segments()
+        if len(old) <= 1:
+            return
+        data = self.read()
+        segment = old[-1] + 1
+        data.to_parquet(self._segment_path(segment), engine='pyarrow', index=False)
+        self.index['segment'] = np.int32(segment)
+        self._write_index()
+        for number in old:
+            os.remove(self._segment_path(number))
+        if os.path.exists(self.sources_path):
+            os.remove(self.sources_path)
+
+    def _segment_path(self, segment):
+        return os.path.join(self.path, SEGMENT_PATTERN.format(segment))
+
+    def _delta_path(self, segment):
+        return os.path.join(self.path, INDEX_DELTA_PATTERN.format(segment))
+
+    def _empty_index(self):
+        return pd.DataFrame(
+            {'row_hash': pd.Series(dtype='uint64'), 'segment': pd.Series(dtype='int32')},
+            index=pd.Index([], dtype='int64', name=self.key),
+        )
+
+    def _read_index(self):
+        """
+        Full index with the deltas written after it applied in order.
+
+        Deltas up to the newest segment the full index already points to
+        were folded into it (a crash may have left some behind) and are
+        skipped.
+        """
+        if os.path.exists(self.index_path):
+            index = pd.read_parquet(self.index_path, engine='pyarrow').set_index(self.key)
+        else:
+            index = self._empty_index()
+        folded = int(index['segment'].max()) if len(index) else -1
+        deltas = [
+            pd.read_parquet(self._delta_path(number), engine='pyarrow').set_index(self.key)
+            for number in self.index_deltas() if number > folded
+        ]
+        if not deltas:
+            return index
+        index = pd.concat([index] + deltas)
+        return index[~index.index.duplicated(keep='last')]
+
+    def _write_index(self):
+        """Write the full index and drop the deltas folded into it"""
+        # Written aside and renamed, so a crash never leaves a truncated index
+        _write_parquet(self.index.reset_index(), self.index_path)
+        # Oldest first: any deltas a crash leaves behind are the newest, and skipped on read
+        for number in self.index_deltas():
+            os.remove(self._delta_path(number))
+
+    def _read_base(self):
+        if not os.path.exists(self.base_path):
+            return None
+        with open(self.base_path) as f:
+            return json.load(f)
+
+    def _write_base(self, base):
+        _write_json(base, self.base_path)
+
+    def _read_sources(self):
+        if not os.path.exists(self.sources_path):
+            return {}
+        with open(self.sources_path) as f:
+            return json.load(f)
+
+    def _align(self, batch):
+        """Match the column order and dtypes of the stored segments"""
+        segments = self.segments()
+        if not segments:
+            return batch
+        import pyarrow.parquet as pq
+
+        template = pq.read_schema(self._segment_path(segments[0])).empty_table().to_pandas()
+        if list(batch.columns) != list(template.columns) and set(batch.columns) == set(template.columns):
+            batch = batch[list(template.columns)]
+        for col, dtype in template.dtypes.items():
+            if col in batch.columns and batch[col].dtype != dtype:
+                try:
+                    batch[col] = batch[col].astype(dtype)
+                except (TypeError, ValueError):
+                    pass
+        return batch
+
+
+def row_hashes(df):
+    """64-bit hash of every row's values (the index is ignored)"""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype='uint64')
+
+
+def _numbered(directory, pattern):
+    """Sorted numbers of the files in `directory` named like `pattern`"""
+    prefix, suffix = pattern.split('{:05d}')
+    paths = glob.glob(os.path.join(directory, f'{prefix}*{suffix}'))
+    return sorted(int(os.path.basename(path)[len(prefix):-len(suffix)]) for path in paths)
+
+
+def _source_key(path):
+    """How a batch's source file is recorded: its absolute path"""
+    return os.path.abspath(path)
+
+
+def _write_json(data, path):
+    """Write aside and rename, like _write_parquet"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    partial = partial_path(path)
+    with open(partial, 'w') as f:
+        json.dump(data, f)
+    os.replace(partial, path)
+
+
+def _write_parquet(frame, path):
+    """Write aside and rename, so readers never see a truncated file"""
+    partial = partial_path(path)
+    frame.to_parquet(partial, engine='pyarrow', index=False)
+    os.replace(partial, path)
@@ -0,0 +1 @@
+"""Equivalence tests: the optimized ETL and dashboard paths against plain pandas."""
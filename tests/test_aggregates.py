@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.cube import MEASURES, ListingCube
+from dashboard.data import load_frame
+from dashboard.filters import FilterIndex
+from dashboard.sql import SQLBackend
+
+TRANSFORMED = 'transformed/transformed_incremental.csv'
+SELECTIONS = [
+    {},
+    {'neighbourhood_group': 'Brooklyn'},
+    {'neighbourhood_group': 'Queens', 'room_type': 'Private Room', 'host_experience': 'Multi'},
+    {'room_type': 'Houseboat'},
+]
+# Bucket edges cut by the range, ranges on edges, and one inside a single bucket
+PRICE_RANGES = [None, (50, 200), (55, 62), (60, 61), (0, 10_000)]
+ROLLUPS = [(), 'room_type', 'price_category', ('neighbourhood_group', 'review_activity')]
+
+
+@pytest.fixture(scope='module')
+def listings():
+    return load_frame('missing.parquet', TRANSFORMED)
+
+
+@pytest.fixture(scope='module')
+def backends(listings, tmp_path_factory):
+    return {
+        'cube': ListingCube(listings),
+        'sqlite': SQLBackend(listings, 'aggregates', directory=str(tmp_path_factory.mktemp('sql'))),
+    }
+
+
+def _mask(df, selections, price_range=None):
+    mask = pd.Series(True, index=df.index)
+    for col, value in selections.items():
+        mask &= df[col] == value
+    if price_range is not None:
+        mask &= df['price'].between(*price_range)
+    return mask & df['price'].notna()
+
+
+def _expected(df, by):
+    """Measure sums with pandas, shaped like CubeSlice.rollup()"""
+    by = [by] if isinstance(by, str) else list(by)
+    measures = pd.DataFrame({
+        name: np.ones(len(df)) if col is None else df[col].astype('float64').fillna(0)
+        for name, col in MEASURES.items()
+    })
+    if not by:
+        return measures.sum().to_frame('total').T
+    frame = measures.groupby([df[col] for col in by], observed=True).sum()
+    return frame[frame['count'] > 0].astype({'count': 'int64'})
+
+
+def _assert_same(actual, expected):
+    """Equal sums per group, whatever the group order and index dtypes"""
+    plain = [frame.set_axis(frame.index.to_flat_index().astype(str)).sort_index() for frame in (actual, expected)]
+    pd.testing.assert_frame_equal(*plain, check_exact=False, check_dtype=False)
+
+
+@pytest.mark.parametrize('backend', ['cube', 'sqlite'])
+@pytest.mark.parametrize('price_range', PRICE_RANGES)
+@pytest.mark.parametrize('selections', SELECTIONS)
+def test_rollup_matches_groupby(listings, backends, backend, selections, price_range):
+    aggregates = backends[backend].slice(selections, price_range)
+    selected = listings[_mask(listings, selections, price_range)]
+    for by in ROLLUPS:
+        actual = aggregates.rollup(by)
+        expected = _expected(selected, by)
+        if expected.empty:
+            assert actual.empty
+            continue
+        _assert_same(actual, expected)
+
+
+def test_cube_rows_match_groupby(listings, backends):
+    index = FilterIndex(listings)
+    selections = {'neighbourhood_group': 'Manhattan', 'host_experience': 'Single'}
+    review_range = ('2019-01-01', '2019-06-30')
+    rows = index.select(selections, (50, 200), review_range, include_unreviewed=False)
+    actual = backends['cube'].slice(selections, rows=rows).rollup('room_type')
+    _assert_same(actual, _expected(listings.iloc[rows], 'room_type'))
+
+
+def test_sql_medians_and_hosts(listings, backends):
+    selections = {'neighbourhood_group': 'Brooklyn'}
+    aggregates = backends['sqlite'].slice(selections, (50, 500))
+    selected = listings[_mask(listings, selections, (50, 500))]
+
+    expected = selected.groupby('room_type', observed=True)['price'].median()
+    actual = aggregates.median_price('room_type')
+    assert np.allclose(actual.loc[expected.index.astype(str)].to_numpy(), expected.to_numpy())
+    assert aggregates.unique_hosts() == selected['host_id'].nunique()
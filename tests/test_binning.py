@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.binning import box_stats, histogram
+from dashboard.data import load_frame
+
+TRANSFORMED = 'transformed/transformed_incremental.csv'
+
+
+@pytest.fixture(scope='module')
+def listings():
+    return load_frame('missing.parquet', TRANSFORMED)
+
+
+def _prices(listings, case):
+    """Prices with missing values, none at all, and a single value"""
+    prices = listings['price'].astype('float64')
+    prices = prices.where(np.arange(len(prices)) % 17 != 0)
+    if case == 'empty':
+        return prices.iloc[:0]
+    if case == 'single':
+        return prices.iloc[[1]]
+    return prices
+
+
+@pytest.mark.parametrize('case', ['all', 'empty', 'single'])
+@pytest.mark.parametrize('bins', [1, 50])
+def test_histogram_matches_numpy(listings, case, bins):
+    prices = _prices(listings, case)
+    actual = histogram(prices, bins=bins)
+    values = prices.dropna().to_numpy()
+    if not len(values):
+        assert actual.empty
+        return
+    counts, edges = np.histogram(values, bins=bins)
+    assert np.array_equal(actual['count'].to_numpy(), counts)
+    assert np.allclose(actual['left'].to_numpy(), edges[:-1]) and np.allclose(actual['right'].to_numpy(), edges[1:])
+    assert actual['count'].sum() == len(values)
+
+
+def test_histogram_skips_infinite_values():
+    actual = histogram(pd.Series([1.0, np.inf, -np.inf, np.nan, 3.0]), bins=2)
+    assert actual['count'].tolist() == [1, 1] and (actual['left'].iloc[0], actual['right'].iloc[-1]) == (1, 3)
+
+
+@pytest.mark.parametrize('case', ['all', 'empty', 'single'])
+def test_box_stats_match_percentiles(listings, case):
+    prices = _prices(listings, case)
+    groups = listings['room_type'].iloc[:len(prices)] if case != 'single' else listings['room_type'].iloc[[1]]
+    actual = box_stats(prices, groups, max_outliers=10).set_index('group')
+
+    frame = pd.DataFrame({'price': prices.to_numpy(), 'group': groups.to_numpy()}).dropna()
+    expected_groups = [group for group in groups.cat.categories if (frame['group'] == group).any()]
+    assert actual.index.tolist() == expected_groups
+    for group, values in frame.groupby('group', observed=True)['price']:
+        values = values.to_numpy()
+        row = actual.loc[group]
+        q1, median, q3 = np.percentile(values, [25, 50, 75])
+        assert np.allclose([row['q1'], row['median'], row['q3'], row['mean']], [q1, median, q3, values.mean()])
+        assert row['count'] == len(values)
+
+        low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        inside = values[(values >= low) & (values <= high)]
+        outside = np.sort(values[(values < low) | (values > high)])
+        assert (row['lowerfence'], row['upperfence']) == (inside.min(), inside.max())
+        assert len(row['outliers']) == min(len(outside), 10)
+        if len(outside):
+            assert set(row['outliers']) <= set(outside)
+            assert (row['outliers'][0], row['outliers'][-1]) == (outside[0], outside[-1])
+
+    if case == 'single':
+        row = actual.iloc[0]
+        value = prices.iloc[0]
+        assert (row['q1'], row['median'], row['q3'], row['lowerfence'], row['upperfence']) == (value,) * 5
+        assert len(row['outliers']) == 0
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl import transform
+from etl.chunked import PriceCounts, extract, iter_csv, transform_file, transform_store
+
+INCREMENTAL = 'data/incremental_data.csv'
+
+
+@pytest.fixture(scope='module')
+def listings():
+    return pd.read_csv(INCREMENTAL)
+
+
+@pytest.mark.parametrize('chunk_rows', [100, 1_000, 10_000])
+def test_streaming_medians_match_pandas(listings, chunk_rows):
+    prices = PriceCounts()
+    for chunk in iter_csv(INCREMENTAL, chunk_rows, columns=transform.PRICE_GROUP + ['price']):
+        prices.add(chunk)
+    medians = prices.medians()
+
+    expected = transform.group_medians(listings).dropna()
+    pd.testing.assert_series_equal(medians.sort_index(), expected.sort_index(), check_names=False)
+    imputed = transform.impute_price(listings)
+    assert np.isclose(prices.overall_median(medians), imputed.median())
+
+
+def test_missing_group_keys(listings):
+    df = listings.copy()
+    df.loc[:40, 'neighbourhood'] = np.nan
+    df.loc[41:60, 'price'] = np.nan
+    prices = PriceCounts()
+    for start in range(0, len(df), 700):
+        prices.add(df.iloc[start:start + 700])
+
+    expected = transform.group_medians(df).dropna()
+    pd.testing.assert_series_equal(prices.medians().sort_index(), expected.sort_index(), check_names=False)
+    assert np.isclose(prices.overall_median(), transform.impute_price(df).median())
+
+
+def test_store_transform_matches_csv_transform(tmp_path):
+    df = pd.read_csv(INCREMENTAL).drop_duplicates('id', keep='last').reset_index(drop=True)
+    raw, incremental = str(tmp_path / 'raw.csv'), str(tmp_path / 'incremental.csv')
+    df.iloc[:1500].to_csv(raw, index=False)
+    store, parts, now = str(tmp_path / 'store'), str(tmp_path / 'parts'), pd.Timestamp('2024-06-01')
+
+    def check(increment):
+        increment.to_csv(incremental, index=False)
+        extract(raw, incremental, str(tmp_path / 'validated.csv'), store, chunk_rows=400)
+        result = transform_store(store, str(tmp_path / 'out.csv'), str(tmp_path / 'out.parquet'), parts, now=now)
+        transform_file(str(tmp_path / 'validated.csv'), str(tmp_path / 'ref.csv'), str(tmp_path / 'ref.parquet'),
+                       chunk_rows=400, now=now)
+        pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'out.csv'), pd.read_csv(tmp_path / 'ref.csv'))
+        pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / 'out.parquet'), pd.read_parquet(tmp_path / 'ref.parquet'))
+        return result
+
+    first = check(df.iloc[1200:])
+    assert first['transformed_segments'] == first['segments'] == 6
+
+    # Updates to listings that have a price, in groups with no missing price: only the new segment
+    groups = df[df['price'].isnull()].set_index(transform.PRICE_GROUP).index
+    keep = ~df.set_index(transform.PRICE_GROUP).index.isin(groups) & df['price'].notna().to_numpy()
+    changed = df[keep].iloc[-40:].assign(price=lambda frame: frame['price'] + 1)
+    result = check(pd.concat([df.iloc[1200:], changed]))
+    assert (result['segments'], result['transformed_segments']) == (7, 1)
+
+    # Nothing new: every part is reused
+    assert check(pd.concat([df.iloc[1200:], changed]))['transformed_segments'] == 0
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.data import FullFrame, load_frame
+from dashboard.export import export
+from etl.storage import read_csv, write_snapshot
+
+TRANSFORMED = 'transformed/transformed_incremental.csv'
+
+
+@pytest.fixture(scope='module')
+def snapshot(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('snapshot') / 'transformed_full.parquet')
+    # Small row groups, so each chunk reads only some of them
+    return write_snapshot(read_csv(TRANSFORMED), path, row_group_rows=700)
+
+
+def _read(out, fmt):
+    if fmt == 'Parquet':
+        return pd.read_parquet(out)
+    return pd.read_csv(out, compression='gzip' if 'gzip' in fmt else None, parse_dates=['last_review'])
+
+
+@pytest.mark.parametrize('fmt', ['CSV', 'CSV (gzip)', 'Parquet'])
+def test_export_keeps_every_transformed_column(snapshot, fmt):
+    expected = read_csv(TRANSFORMED)
+    # A reordered frame, as after an incremental refresh
+    df = load_frame(snapshot).sample(frac=1, random_state=3).reset_index(drop=True)
+    rows = np.flatnonzero(df['room_type'] == 'Private Room')[::-1]
+
+    exported = _read(export(FullFrame(df, snapshot), rows, fmt, chunk_rows=500), fmt)
+    assert list(exported.columns) == list(expected.columns)
+    assert np.array_equal(exported['id'].to_numpy(), df['id'].to_numpy()[rows])
+    expected = expected.drop_duplicates('id', keep='last').set_index('id').loc[exported['id']].reset_index()
+    pd.testing.assert_frame_equal(exported, expected, check_dtype=False, check_categorical=False, check_exact=False)
+
+
+def test_listings_missing_from_the_file(snapshot):
+    df = load_frame(snapshot)
+    df.loc[[3, 1000], 'id'] = [-1, -2]
+    full = FullFrame(df, snapshot)
+    chunks = [full.take(np.arange(start, start + 500)) for start in (0, 500, 1000)]
+    assert all((chunk.dtypes == chunks[0].dtypes).all() for chunk in chunks)
+    assert chunks[0].loc[3, full.missing].isna().all() and chunks[2].loc[1000, full.missing].isna().all()
+    assert chunks[1][full.missing].notna().all().all()
+    assert list(export(full, np.empty(0, dtype=np.intp), 'CSV').read().decode().strip().split(',')) == full.columns
+
+
+def test_csv_fallback(tmp_path):
+    missing = str(tmp_path / 'missing.parquet')
+    df = load_frame(missing, TRANSFORMED)
+    full = FullFrame(df, missing, TRANSFORMED)
+    assert full.columns == pd.read_csv(TRANSFORMED, nrows=0).columns.tolist()
+    chunk = full.take(np.arange(10, 20))
+    expected = read_csv(TRANSFORMED).drop_duplicates('id', keep='last').set_index('id').loc[chunk['id']]
+    assert np.array_equal(chunk['minimum_nights'].to_numpy(), expected['minimum_nights'].to_numpy())
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.data import load_frame
+from dashboard.filters import FilterIndex
+from dashboard.sql import SQLBackend
+
+TRANSFORMED = 'transformed/transformed_incremental.csv'
+SELECTIONS = [
+    {'neighbourhood_group': 'All', 'room_type': 'All', 'host_experience': 'All'},
+    {'neighbourhood_group': 'Bronx', 'room_type': 'All', 'host_experience': 'All'},
+    {'neighbourhood_group': 'Manhattan', 'room_type': 'Entire Home/Apt', 'host_experience': 'Multi'},
+    {'neighbourhood_group': 'Staten Island', 'room_type': 'Hotel Room', 'host_experience': 'All'},
+]
+
+
+@pytest.fixture(scope='module')
+def listings():
+    return load_frame('missing.parquet', TRANSFORMED)
+
+
+@pytest.fixture(scope='module')
+def indexes(listings, tmp_path_factory):
+    return {
+        'bitmaps': FilterIndex(listings),
+        'sqlite': SQLBackend(listings, 'filters', directory=str(tmp_path_factory.mktemp('sql'))),
+    }
+
+
+def _mask(df, selections, price_range, review_range, include_unreviewed):
+    mask = pd.Series(True, index=df.index)
+    for col, value in selections.items():
+        if value != 'All':
+            mask &= df[col] == value
+    if price_range is not None:
+        mask &= df['price'].between(*price_range)
+    if review_range is not None:
+        dates = df['last_review']
+        in_range = dates.between(pd.Timestamp(review_range[0]), pd.Timestamp(review_range[1]))
+        mask &= in_range | dates.isna() if include_unreviewed else in_range
+    return mask.to_numpy()
+
+
+@pytest.mark.parametrize('index', ['bitmaps', 'sqlite'])
+@pytest.mark.parametrize('price_range', [None, (60, 60), (75.5, 310), (0, 100_000)])
+@pytest.mark.parametrize('review_range', [None, ('2019-01-01', '2019-06-30'), ('2019-05-21', '2019-05-21')])
+@pytest.mark.parametrize('include_unreviewed', [True, False])
+def test_select_matches_boolean_mask(listings, indexes, index, price_range, review_range, include_unreviewed):
+    for selections in SELECTIONS:
+        rows = indexes[index].select(selections, price_range, review_range, include_unreviewed)
+        mask = _mask(listings, selections, price_range, review_range, include_unreviewed)
+        if rows is None:
+            assert mask.all()
+        else:
+            assert np.array_equal(rows, np.flatnonzero(mask))
+        assert indexes[index].apply(listings, selections, price_range, review_range, include_unreviewed).equals(
+            listings[mask])
+
+
+def test_options_and_bounds(listings, indexes):
+    index = indexes['bitmaps']
+    for col in index.bitmaps:
+        assert index.options(col) == sorted(listings[col].dropna().unique().tolist())
+    assert (index.price_min, index.price_max) == (listings['price'].min(), listings['price'].max())
+    assert np.isclose(index.price_cap, listings['price'].astype('float64').quantile(0.99))
+    assert (index.review_min, index.review_max) == (listings['last_review'].min().date(),
+                                                     listings['last_review'].max().date())
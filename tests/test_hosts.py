@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.data import load_frame
+from dashboard.hosts import TOP_COLUMNS, HostIndex
+
+TRANSFORMED = 'transformed/transformed_incremental.csv'
+
+
+@pytest.fixture(scope='module')
+def listings():
+    return load_frame('missing.parquet', TRANSFORMED)
+
+
+@pytest.fixture(scope='module')
+def index(listings):
+    return HostIndex(listings)
+
+
+def _rows(listings, group):
+    if group is None:
+        return None
+    return np.flatnonzero((listings['neighbourhood_group'] == group).to_numpy())
+
+
+def _expected_top(df, n):
+    """Top hosts with a pandas groupby on host_id: most listings first, ties in host_id order"""
+    hosts = df.groupby('host_id', sort=True).agg(
+        host_name=('host_name', 'first'),
+        id=('id', 'size'),
+        price=('price', 'mean'),
+        number_of_reviews=('number_of_reviews', 'sum'),
+        availability_365=('availability_365', 'mean'),
+    )
+    return hosts.sort_values('id', ascending=False, kind='stable').head(n).reset_index(drop=True)[TOP_COLUMNS]
+
+
+@pytest.mark.parametrize('group', [None, 'Brooklyn', 'Staten Island'])
+def test_top_hosts_match_groupby(listings, index, group):
+    rows = _rows(listings, group)
+    selected = listings if rows is None else listings.iloc[rows]
+    for n in [10, len(listings)]:
+        actual = index.top(rows, n=n)
+        expected = _expected_top(selected, n)
+        pd.testing.assert_frame_equal(actual.astype({'host_name': str}), expected.astype({'host_name': str}),
+                                      check_dtype=False, check_exact=False, rtol=1e-5)
+
+
+@pytest.mark.parametrize('group', [None, 'Brooklyn', 'Staten Island'])
+def test_host_counts_match_groupby(listings, index, group):
+    rows = _rows(listings, group)
+    selected = listings if rows is None else listings.iloc[rows]
+    assert index.unique(rows) == selected['host_id'].nunique()
+    expected = selected.groupby('host_id')['host_experience'].first().value_counts()
+    actual = index.experience(rows)
+    pd.testing.assert_series_equal(actual[actual > 0].sort_index(), expected[expected > 0].sort_index(),
+                                   check_names=False, check_index_type=False, check_categorical=False)
+
+
+def test_hosts_sharing_a_name_stay_separate(listings):
+    df = listings.copy()
+    df['host_name'] = 'Same Name'
+    index = HostIndex(df)
+    assert index.unique() == df['host_id'].nunique()
+    assert index.top()['id'].tolist() == _expected_top(df, 10)['id'].tolist()
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl import parallel, transform
+
+INCREMENTAL = 'data/incremental_data.csv'
+NOW = pd.Timestamp('2024-06-01')
+
+
+@pytest.fixture(scope='module')
+def validated():
+    df = pd.read_csv(INCREMENTAL).iloc[:800].reset_index(drop=True)
+    # The largest (room type, neighbourhood) price group, with some prices missing
+    group = df.groupby(transform.PRICE_GROUP).size().idxmax()
+    rows = np.flatnonzero((df[transform.PRICE_GROUP] == group).all(axis=1).to_numpy())
+    df.loc[rows[::3], 'price'] = np.nan
+    # Listings without a price group key, one without any price
+    df.loc[[5, 6], 'neighbourhood'] = np.nan
+    df.loc[6, 'price'] = np.nan
+    return df, group, rows
+
+
+def _split(parts, df, group):
+    """Whether the rows of price group `group` landed in more than one partition"""
+    in_group = (df[transform.PRICE_GROUP] == group).all(axis=1).to_numpy()
+    return sum(in_group[positions].any() for _, positions in parts) > 1
+
+
+def test_neighbourhood_in_two_boroughs(validated):
+    df, group, rows = validated
+    df = df.copy()
+    # The same neighbourhood recorded under another borough goes to another partition
+    other = sorted(set(df['neighbourhood_group'].dropna()) - {df.loc[rows[0], 'neighbourhood_group']})[0]
+    df.loc[rows[1::2], 'neighbourhood_group'] = other
+    assert _split(parallel.partition(df, 8), df, group)
+
+    result, report = parallel.transform_parallel(df, workers=2, now=NOW, partitions_per_worker=4)
+    assert report['rows'].sum() == len(df)
+    pd.testing.assert_frame_equal(result, transform.transform(df, now=NOW))
+
+
+def test_arbitrary_partition_boundaries(validated, monkeypatch):
+    df, group, _ = validated
+    # Interleaved partitions split every price group
+    monkeypatch.setattr(parallel, 'partition', lambda df, n: [
+        (f'part {i}', np.arange(i, len(df), 3)) for i in range(3)
+    ])
+    assert _split(parallel.partition(df, 3), df, group)
+
+    result, _ = parallel.transform_parallel(df, workers=3, now=NOW)
+    pd.testing.assert_frame_equal(result, transform.transform(df, now=NOW))
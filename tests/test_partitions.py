@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.filters import FilterIndex
+from dashboard.partitions import load_review_partitions
+from etl.partitions import latest, read_partitions, write_partitions
+
+INCREMENTAL = 'data/incremental_data.csv'
+
+
+@pytest.fixture(scope='module')
+def listings():
+    return pd.read_csv(INCREMENTAL, parse_dates=['last_review'])
+
+
+@pytest.fixture(scope='module')
+def directory(listings, tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp('partitions') / 'partitions')
+    write_partitions(listings, directory, source='snapshot-digest')
+    return directory
+
+
+def _expected_ids(df, start, end, include_unreviewed):
+    dates = df['last_review']
+    keep = dates.between(pd.Timestamp(start), pd.Timestamp(end))
+    if include_unreviewed:
+        keep |= dates.isna()
+    return np.sort(df.loc[keep, 'id'].to_numpy())
+
+
+@pytest.mark.parametrize('start, end', [('2019-01-01', '2019-06-15'), ('2010-01-01', '2030-01-01'), ('2019-05-20', '2019-05-20')])
+@pytest.mark.parametrize('include_unreviewed', [True, False])
+def test_read_matches_pandas(listings, directory, start, end, include_unreviewed):
+    df = read_partitions(directory, start, end, include_unreviewed)
+    assert np.array_equal(np.sort(df['id'].to_numpy()), _expected_ids(listings, start, end, include_unreviewed))
+    assert list(df.columns) == list(listings.columns)
+
+
+def test_no_overlapping_partition(listings, directory):
+    df = read_partitions(directory, '1990-01-01', '1990-12-31', include_unreviewed=False)
+    assert df.empty and list(df.columns) == list(listings.columns)
+
+
+def test_empty_frame(listings, tmp_path):
+    directory = str(tmp_path / 'partitions')
+    manifest = write_partitions(listings.iloc[:0], directory)
+    assert manifest['partitions'] == []
+    schema = read_partitions(directory, columns=['id', 'last_review']).dtypes
+    assert read_partitions(directory, '2019-01-01', '2019-12-31').empty
+    assert latest(10, directory, columns=['id', 'last_review']).dtypes.equals(schema)
+
+
+def test_latest_matches_pandas(listings, directory):
+    expected = listings.sort_values('last_review', ascending=False, kind='stable').head(500)
+    assert np.array_equal(latest(500, directory)['last_review'].to_numpy(), expected['last_review'].to_numpy())
+
+
+def test_dashboard_positions_match_filter_index(listings, directory):
+    partitions = load_review_partitions(listings, 'snapshot-digest', directory)
+    assert load_review_partitions(listings, 'other-digest', directory) is None
+    index = FilterIndex(listings.assign(host_experience=np.where(listings['calculated_host_listings_count'] > 1, 'Multi', 'Single')))
+    selections = {'room_type': 'Private room'}
+    for review_range in [('2019-01-01', '2019-06-15'), ('2018-03-01', '2018-03-31')]:
+        for include_unreviewed in (True, False):
+            rows = partitions.select(review_range, include_unreviewed, rows=index.select(selections))
+            expected = index.select(selections, review_range=review_range, include_unreviewed=include_unreviewed)
+            assert np.array_equal(rows, expected)
@@ -0,0 +1,55 @@
+import tracemalloc
+
+from dashboard import perf
+from dashboard.perf import PerfMonitor
+
+
+def test_tracing_is_reference_counted():
+    first, second = PerfMonitor(log_path=None), PerfMonitor(log_path=None)
+    first.trace_memory('a', True)
+    first.trace_memory('a', True)
+    second.trace_memory('b', True)
+    first.trace_memory('a', False)
+    assert tracemalloc.is_tracing()
+
+    run = second.start_run()
+    data = [bytes(1024) for _ in range(1024)]
+    run.lap('allocate')
+    assert run.segments[0]['peak_mb'] >= 1 and data
+
+    second.trace_memory('b', False)
+    second.trace_memory('b', False)
+    assert not tracemalloc.is_tracing()
+
+
+def test_tracing_started_elsewhere_is_left_running():
+    tracemalloc.start()
+    try:
+        monitor = PerfMonitor(log_path=None)
+        monitor.trace_memory('a', True)
+        monitor.trace_memory('a', False)
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_abandoned_sessions_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(perf.time, 'monotonic', lambda: now[0])
+    monitor = PerfMonitor(log_path=None, tracing_ttl=60)
+    monitor.trace_memory('open', True)
+    monitor.trace_memory('abandoned', True)
+
+    now[0] += 45
+    monitor.trace_memory('open', True)
+    monitor.trace_memory('other', False)
+    assert set(monitor._tracing) == {'open', 'abandoned'}
+
+    # 'abandoned' was last seen 70s ago, 'open' only 25s ago
+    now[0] += 25
+    monitor.trace_memory('other', False)
+    assert set(monitor._tracing) == {'open'} and tracemalloc.is_tracing()
+
+    now[0] += 61
+    monitor.trace_memory('other', False)
+    assert not monitor._tracing and not tracemalloc.is_tracing()
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl.quality import QualityProfile, profile_frame
+
+INCREMENTAL = 'data/incremental_data.csv'
+
+
+def _expected(df):
+    return {
+        'missing': {col: int(count) for col, count in df.isna().sum().items()},
+        'distinct_keys': int(df['id'].nunique()),
+        'rows_with_duplicate_key': int(df['id'].duplicated(keep=False).sum()),
+        'duplicate_rows': int(df.duplicated().sum()),
+    }
+
+
+def _actual(report):
+    return {
+        'missing': {col: stats['count'] for col, stats in report['missing'].items()},
+        'distinct_keys': report['duplicates']['distinct_keys'],
+        'rows_with_duplicate_key': report['duplicates']['rows_with_duplicate_key'],
+        'duplicate_rows': report['duplicates']['duplicate_rows'],
+    }
+
+
+def test_all_missing_text_column():
+    df = pd.DataFrame({
+        'id': [1, 2, 2, 3],
+        'name': pd.Series([None, None, None, None], dtype=object),
+        'price': [10.0, 20.0, 20.0, np.nan],
+    })
+    report = profile_frame(df, chunk_rows=2).report()
+    assert _actual(report) == _expected(df)
+
+
+@pytest.mark.parametrize('chunk_rows', [10, 1_000, 100_000])
+def test_incremental_file_any_chunking(chunk_rows):
+    df = pd.read_csv(INCREMENTAL)
+    report = profile_frame(df, chunk_rows=chunk_rows).report()
+    assert _actual(report) == _expected(df)
+
+
+def test_merge_matches_single_profile():
+    df = pd.read_csv(INCREMENTAL)
+    half = len(df) // 2
+    merged = profile_frame(df.iloc[:half], chunk_rows=500).merge(profile_frame(df.iloc[half:], chunk_rows=700))
+    assert _actual(merged.report()) == _actual(profile_frame(df).report())
+
+
+def test_range_checks():
+    df = pd.DataFrame({'id': [1, 2, 3, 4], 'price': [0, 50, 20_000, np.nan]})
+    ranges = QualityProfile(range_checks={'price': (1, 10_000)}).add(df).report()['ranges']['price']
+    assert (ranges['min'], ranges['max']) == (0, 20_000)
+    assert (ranges['zero'], ranges['below'], ranges['above']) == (1, 1, 1)
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.data import load_frame
+from dashboard.refresh import DatasetVersion, LiveDataset
+from dashboard.spatial import SpatialGrid
+from etl.upsert import row_hashes
+
+TRANSFORMED = 'transformed/transformed_incremental.csv'
+BUILT = ['filter_index', 'cube', 'spatial_grid', 'search_index']
+
+
+@pytest.fixture(scope='module')
+def frames():
+    """(current frame, changed snapshot in a different row order)"""
+    df = load_frame('missing.parquet', TRANSFORMED)
+    rng = np.random.default_rng(7)
+    old = df.iloc[np.sort(rng.choice(len(df), size=len(df) - 300, replace=False))].reset_index(drop=True)
+    new = pd.concat([old, df[~df['id'].isin(old['id'])]], ignore_index=True)
+
+    changed = rng.choice(len(old), size=60, replace=False)
+    new.loc[changed[:20], 'price'] = new.loc[changed[:20], 'price'] * 3
+    new.loc[changed[20:30], 'room_type'] = 'Shared Room'
+    new.loc[changed[30:40], 'neighbourhood_group'] = 'Bronx'
+    new.loc[changed[40:50], 'last_review'] = pd.NaT
+    new.loc[changed[50:], 'name'] = 'Sunny loft near the park'
+    return old, new.iloc[rng.permutation(len(new))].reset_index(drop=True)
+
+
+def _refresh(old, new):
+    current = DatasetVersion(old, ('current', 0, 0), 'current')
+    for name in BUILT:
+        getattr(current, name)
+    version = LiveDataset(warm_path=None)._next_version(current, new, ('new', 0, 0), 'new')
+    return version, DatasetVersion(version.df, ('new', 0, 0), 'new')
+
+
+def _selections():
+    for group in ['All', 'Brooklyn', 'Bronx']:
+        for room in ['All', 'Shared Room', 'Private Room']:
+            yield {'neighbourhood_group': group, 'room_type': room, 'host_experience': 'All'}
+
+
+def test_frame_is_snapshot_in_current_order(frames):
+    old, new = frames
+    version, _ = _refresh(old, new)
+    assert version.change['mode'] == 'incremental'
+    expected = new.set_index('id').loc[version.df['id']].reset_index()
+    changed = row_hashes(expected.iloc[:len(old)]) != row_hashes(old)
+    assert version.change['inserted'] == len(new) - len(old) and version.change['updated'] == changed.sum()
+    assert np.array_equal(version.df['id'].to_numpy()[:len(old)], old['id'].to_numpy())
+    pd.testing.assert_frame_equal(version.df, expected, check_categorical=False, check_dtype=False)
+
+
+def test_patched_filter_index_and_cube(frames):
+    old, new = frames
+    version, fresh = _refresh(old, new)
+    assert set(version.change['patched']) == set(BUILT)
+    patched = version.filter_index
+    assert (patched.price_min, patched.price_max, patched.price_cap) == (
+        fresh.filter_index.price_min, fresh.filter_index.price_max, fresh.filter_index.price_cap)
+    assert (patched.review_min, patched.review_max) == (fresh.filter_index.review_min, fresh.filter_index.review_max)
+    for col in patched.bitmaps:
+        assert patched.options(col) == fresh.filter_index.options(col)
+
+    for selections in _selections():
+        for price_range in [None, (50, 200), (0, 10_000)]:
+            for review_range in [None, ('2019-01-01', '2019-06-30')]:
+                rows = patched.select(selections, price_range, review_range, include_unreviewed=False)
+                expected = fresh.filter_index.select(selections, price_range, review_range, include_unreviewed=False)
+                assert (rows is None and expected is None) or np.array_equal(rows, expected)
+            for by in [(), 'price_category', ('room_type', 'review_activity')]:
+                actual = version.cube.slice(selections, price_range).rollup(by)
+                expected = fresh.cube.slice(selections, price_range).rollup(by)
+                pd.testing.assert_frame_equal(actual.sort_index(), expected.sort_index(), check_exact=False)
+
+
+def test_patched_grid_and_search(frames):
+    old, new = frames
+    version, fresh = _refresh(old, new)
+    grid = version.spatial_grid
+    df = version.df
+    for zoom in [8, 12]:
+        size = grid.levels[grid.level_for(zoom)]['size']
+        rows = (np.floor((df['latitude'].astype('float64') - grid.lat0) / size)).astype('int64')
+        cols = (np.floor((df['longitude'].astype('float64') - grid.lon0) / size)).astype('int64')
+        expected = df.groupby([rows, cols]).size().sort_values(ignore_index=True)
+        actual = grid.aggregate(np.arange(len(df)), zoom)['listings'].sort_values(ignore_index=True)
+        assert np.array_equal(actual.to_numpy(), expected.to_numpy())
+
+    for term in ['sunny loft', 'park', 'br', 'williamsburg']:
+        assert np.array_equal(version.search_index.search(term), fresh.search_index.search(term))
+
+
+def test_changes_that_do_not_fit_are_rebuilt(frames):
+    old, new = frames
+    new = new.copy()
+    new['room_type'] = new['room_type'].cat.add_categories(['Houseboat'])
+    new.loc[0, 'room_type'] = 'Houseboat'
+    new.loc[1, ['latitude', 'longitude']] = [old['latitude'].min() - 1, old['longitude'].min() - 1]
+    version, fresh = _refresh(old, new)
+    assert set(version.change['patched']) == {'filter_index', 'search_index'}
+    assert isinstance(version.spatial_grid, SpatialGrid)
+    selections = {'neighbourhood_group': 'All', 'room_type': 'Houseboat', 'host_experience': 'All'}
+    assert np.array_equal(version.filter_index.select(selections), fresh.filter_index.select(selections))
+    assert version.cube.slice(selections).totals()['count'] == 1
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from dashboard.data import load_frame
+from dashboard.sampling import StratifiedSampler, allocate
+
+TRANSFORMED = 'transformed/transformed_incremental.csv'
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_allocation_never_shrinks(seed):
+    rng = np.random.default_rng(seed)
+    counts = rng.integers(0, 400, size=rng.integers(2, 12))
+    previous = np.zeros(len(counts), dtype=np.int64)
+    for n in range(1, counts.sum() + 1):
+        take = allocate(counts, n, minimum=20)
+        assert take.sum() == n and (take <= counts).all() and (take >= previous).all()
+        previous = take
+
+
+def test_allocation_minimum_and_proportions():
+    counts = np.array([5000, 300, 12, 4000, 20000, 0, 900])
+    assert allocate(counts, 50, minimum=20).tolist() == [9, 9, 8, 8, 8, 0, 8]
+    take = allocate(counts, 1000, minimum=20)
+    assert (take[counts > 0] >= np.minimum(counts[counts > 0], 20)).all()
+    rest, left = take - np.minimum(counts, 20), counts - np.minimum(counts, 20)
+    assert np.abs(rest - left * rest.sum() / left.sum()).max() < 1
+
+
+def test_larger_sample_contains_smaller():
+    df = load_frame('missing.parquet', TRANSFORMED)
+    sampler = StratifiedSampler(df)
+    rows = np.flatnonzero(df['neighbourhood_group'] != 'Manhattan')
+    previous = np.empty(0, dtype=np.intp)
+    for n in [10, 50, 300, 301, 1000, 1999, len(rows)]:
+        sample = sampler.sample(rows, n)
+        assert len(sample) == n and np.isin(sample, rows).all()
+        assert np.isin(previous, sample).all()
+        previous = sample
+    assert np.array_equal(sampler.sample(rows, 300), StratifiedSampler(df).sample(rows, 300))
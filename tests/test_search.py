@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.data import load_frame
+from dashboard.search import SearchIndex
+
+TRANSFORMED = 'transformed/transformed_incremental.csv'
+# Terms shorter than a trigram, spaces, mixed case, and no match at all
+TERMS = ['park', 'Sunny', 'br', 'a', 'east village', 'ST.', 'williamsburg', 'zzqx']
+
+
+@pytest.fixture(scope='module')
+def listings():
+    return load_frame('missing.parquet', TRANSFORMED)
+
+
+@pytest.fixture(scope='module')
+def index(listings):
+    return SearchIndex(listings)
+
+
+def _expected(df, term):
+    """Ranked positions with pandas: name prefix, name match, neighbourhood match"""
+    name = df['name'].astype(str).str.lower()
+    in_name = name.str.contains(term.lower(), regex=False).to_numpy()
+    in_neighbourhood = df['neighbourhood'].astype(str).str.contains(term, case=False, regex=False).to_numpy()
+    ranks = np.select([name.str.startswith(term.lower()).to_numpy(), in_name, in_neighbourhood], [0, 1, 2], 3)
+    matched = np.flatnonzero(ranks < 3)
+    return matched[np.argsort(ranks[matched], kind='stable')]
+
+
+@pytest.mark.parametrize('term', TERMS)
+def test_search_matches_str_contains(listings, index, term):
+    assert np.array_equal(index.search(term), _expected(listings, term))
+
+
+@pytest.mark.parametrize('term', TERMS)
+def test_search_within_rows(listings, index, term):
+    rows = np.flatnonzero(listings['room_type'] == 'Private Room')
+    expected = _expected(listings.iloc[rows], term)
+    assert np.array_equal(index.search(term, rows), rows[expected])
+
+
+def test_short_texts_and_updates(listings):
+    df = listings.copy()
+    df['name'] = df['name'].astype('object')
+    df.loc[:3, 'name'] = ['Ab', 'b', '', None]
+    index = SearchIndex(df)
+    for term in ['b', 'ab', 'a']:
+        assert np.array_equal(index.search(term), _expected(df, term))
+
+    # Short names become long and long ones short; one listing is appended
+    changed = df.copy()
+    changed.loc[:1, 'name'] = ['Abbey Road', 'Brownstone']
+    changed.loc[10:11, 'name'] = ['BA', 'x']
+    changed = pd.concat([changed, changed.iloc[[5]].assign(name='ab')], ignore_index=True)
+    patched = index.updated(changed, [0, 1, 10, 11, len(changed) - 1])
+    fresh = SearchIndex(changed)
+    for col in patched.columns:
+        assert np.array_equal(patched.short[col], fresh.short[col])
+    for term in ['b', 'ab', 'x', 'abbey']:
+        assert np.array_equal(patched.search(term), _expected(changed, term))
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from dashboard import sections
+from dashboard.cube import ListingCube
+from dashboard.data import load_frame
+from dashboard.selection import Selection
+from dashboard.spatial import OVERVIEW_ZOOMS, SpatialGrid, viewport_bounds
+
+TRANSFORMED = 'transformed/transformed_incremental.csv'
+
+
+@pytest.fixture(scope='module')
+def listings():
+    return load_frame('missing.parquet', TRANSFORMED)
+
+
+@pytest.fixture(scope='module')
+def grid(listings):
+    return SpatialGrid(listings)
+
+
+@pytest.mark.parametrize('zoom', [10, 13, 15])
+def test_map_keeps_listings_outside_the_view(listings, grid, zoom):
+    rows = np.flatnonzero((listings['neighbourhood_group'] != 'Staten Island').to_numpy())
+    selection = Selection(listings, rows)
+    center = (float(selection['latitude'].mean()), float(selection['longitude'].mean()))
+    visible, outside = grid.split(rows, viewport_bounds(center, zoom))
+    assert np.array_equal(np.sort(np.concatenate([visible, outside])), rows)
+
+    result = sections.geographic(selection, ListingCube(listings).slice({}), grid=grid, zoom=zoom)
+    located = listings['latitude'].iloc[outside].notna() & listings['longitude'].iloc[outside].notna()
+    assert result['map_outside'] == located.sum()
+    if len(outside):
+        overview = result['map'].data[-1]
+        assert overview.name == 'Outside the view'
+        assert overview.customdata[:, 0].sum() == result['map_outside']
+        assert len(overview.lat) == len(grid.aggregate(outside, zoom - OVERVIEW_ZOOMS))
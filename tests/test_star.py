@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from dashboard.hosts import HostIndex
+from etl.star import DIMENSIONS, TABLES, UNKNOWN_DATE_KEY, build_star, denormalize, read_star, write_star
+
+TRANSFORMED = 'transformed/transformed_incremental.csv'
+
+
+@pytest.fixture(scope='module')
+def listings():
+    return pd.read_csv(TRANSFORMED, parse_dates=['last_review'])
+
+
+@pytest.fixture(scope='module')
+def star(listings):
+    return build_star(listings)
+
+
+def test_surrogate_keys_are_unique(listings, star):
+    fact = star['fact_listings']
+    for name, (key, columns) in DIMENSIONS.items():
+        dim = star[name]
+        assert np.array_equal(dim[key].to_numpy(), np.arange(1, len(dim) + 1))
+        assert not dim.duplicated(columns).any()
+        assert len(dim) == len(listings.drop_duplicates(columns))
+        assert fact[key].isin(dim[key]).all()
+
+    dates = star['dim_date']
+    assert dates['date_key'].is_unique and fact['date_key'].isin(dates['date_key']).all()
+    never = fact['date_key'] == UNKNOWN_DATE_KEY
+    assert np.array_equal(never.to_numpy(), listings['last_review'].isna().to_numpy())
+
+
+def test_keys_are_stable(listings, star):
+    # Same data in another row order gets the same keys
+    shuffled = build_star(listings.sample(frac=1, random_state=0))
+    for name in TABLES[1:]:
+        pd.testing.assert_frame_equal(shuffled[name], star[name])
+
+
+def test_joins_rebuild_the_flat_frame(listings, star, tmp_path):
+    pd.testing.assert_frame_equal(denormalize(star)[listings.columns], listings)
+
+    write_star(listings, str(tmp_path))
+    wide = denormalize(read_star(str(tmp_path)))[listings.columns]
+    pd.testing.assert_frame_equal(wide, listings, check_dtype=False)
+
+
+def test_hosts_without_listings_in_the_slice(listings, star):
+    index = HostIndex(listings)
+    rows = np.flatnonzero((listings['neighbourhood_group'] == 'Bronx').to_numpy())
+    selected = listings.iloc[rows]
+    absent = ~star['dim_host']['host_id'].isin(selected['host_id'])
+    assert absent.any()
+
+    # Hosts with no listing in the slice are not counted or listed
+    assert index.unique(rows) == selected['host_id'].nunique()
+    top = index.top(rows, n=len(listings))
+    assert len(top) == selected['host_id'].nunique() and (top['id'] > 0).all()
+    expected = selected.drop_duplicates('host_id')['host_experience'].value_counts()
+    pd.testing.assert_series_equal(index.experience(rows).sort_index(), expected.sort_index(), check_names=False)
+
+    # A star built from the slice only has the slice's hosts
+    sliced = build_star(selected)['dim_host']
+    assert len(sliced) == selected['host_id'].nunique()
+    assert np.array_equal(sliced['host_key'].to_numpy(), np.arange(1, len(sliced) + 1))
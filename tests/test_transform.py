@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl import transform
+
+INCREMENTAL = 'data/incremental_data.csv'
+
+
+@pytest.fixture(scope='module')
+def listings():
+    """Listings with missing group keys, groups with no price and missing names"""
+    df = pd.read_csv(INCREMENTAL).drop_duplicates('id', keep='last').reset_index(drop=True)
+    df.loc[:30, 'price'] = np.nan
+    df.loc[:10, 'neighbourhood'] = np.nan
+    df.loc[5:15, 'room_type'] = np.nan
+    df.loc[40:60, 'name'] = np.nan
+    # A group whose every price is missing
+    df.loc[100:104, ['room_type', 'neighbourhood', 'price']] = ['Private room', 'Nowhere', np.nan]
+    return df
+
+
+# ========== NOTEBOOK CODE (etl_transform.ipynb before vectorization) ==========
+
+def _notebook_price(df):
+    price = df.groupby(['room_type', 'neighbourhood'])['price'].transform(lambda x: x.fillna(x.median()))
+    return price.fillna(price.median())
+
+
+def _notebook_names(df):
+    return df.apply(lambda row: f"Listing {row['id']}" if pd.isnull(row['name']) else row['name'], axis=1)
+
+
+# Derived column -> source column and the notebook's pd.cut arguments
+NOTEBOOK_BINS = {
+    'price_category': ('price', [0, 50, 100, 200, 500, float('inf')],
+                       ['Budget', 'Economy', 'Mid-Range', 'Premium', 'Luxury']),
+    'availability_category': ('availability_365', [-1, 90, 180, 270, 365], ['Low', 'Medium', 'High', 'Full']),
+    'rental_duration_type': ('minimum_nights', [0, 3, 7, 30, float('inf')],
+                             ['Short-Stay', 'Weekly', 'Monthly', 'Long-Term']),
+    'review_volume_tier': ('number_of_reviews', [-1, 5, 20, 50, float('inf')], ['Low', 'Medium', 'High', 'Very High']),
+}
+
+
+def _notebook_review_activity(values):
+    return values.apply(lambda x: 'High' if x >= 2 else ('Medium' if x >= 0.5 else 'Low'))
+
+
+def _notebook_host_experience(values):
+    return values.apply(lambda x: 'Professional' if x >= 10 else ('Experienced' if x >= 3 else 'Beginner'))
+
+
+# ========== TESTS ==========
+
+def test_impute_price_matches_notebook_with_known_keys(listings):
+    # Missing keys only on listings without a price: no difference from the notebook
+    df = listings.copy()
+    df.loc[df[transform.PRICE_GROUP].isnull().any(axis=1), 'price'] = np.nan
+    pd.testing.assert_series_equal(transform.impute_price(df), _notebook_price(df))
+
+
+def test_impute_price_keeps_prices_with_missing_keys(listings):
+    df = listings.copy()
+    no_key = df[transform.PRICE_GROUP].isnull().any(axis=1).to_numpy()
+    df.loc[no_key & (np.arange(len(df)) % 2 == 0), 'price'] = 123.0
+    known = df['price'].notna().to_numpy()
+    assert (no_key & known).any() and (no_key & ~known).any()
+
+    actual = transform.impute_price(df)
+    notebook = _notebook_price(df)
+    overall = actual[~no_key | known].median()
+    # Known prices are kept; the notebook replaced those with missing keys
+    assert actual[known].equals(df['price'][known])
+    assert (notebook[no_key & known] == notebook[no_key].iloc[0]).all()
+    # Listings with a key and a group median are imputed as in the notebook
+    grouped = ~no_key & ~known & df.groupby(transform.PRICE_GROUP)['price'].transform('count').gt(0).to_numpy()
+    assert grouped.any()
+    pd.testing.assert_series_equal(actual[grouped], notebook[grouped])
+    # Everything else gets the overall median of the imputed prices
+    rest = ~known & ~grouped
+    assert rest[100:105].all()
+    assert (actual[rest] == overall).all()
+
+
+def test_impute_price_with_given_medians(listings):
+    medians = transform.group_medians(listings)
+    overall = transform.impute_price(listings).median()
+    pd.testing.assert_series_equal(transform.impute_price(listings, medians, overall),
+                                   transform.impute_price(listings))
+
+
+def test_fill_names_matches_notebook(listings):
+    pd.testing.assert_series_equal(transform.fill_names(listings), _notebook_names(listings), check_names=False)
+    assert transform.fill_names(listings).loc[40] == f"Listing {listings.loc[40, 'id']}"
+
+
+@pytest.mark.parametrize('column,notebook', [
+    ('review_activity', _notebook_review_activity),
+    ('host_experience', _notebook_host_experience),
+])
+def test_threshold_labels_match_notebook(listings, column, notebook):
+    source = transform.THRESHOLDS[column][0]
+    # Bounds, values either side of them and missing values
+    values = pd.concat([listings[source].astype('float64'), pd.Series([0, 0.5, 2, 3, 10, 0.49, 9.99, np.nan, -1])],
+                       ignore_index=True)
+    frame = pd.DataFrame({source: values})
+    pd.testing.assert_series_equal(transform.label_column(frame, column), notebook(values), check_names=False)
+
+
+@pytest.mark.parametrize('column', list(NOTEBOOK_BINS))
+def test_bins_match_notebook(listings, column):
+    source, bins, labels = NOTEBOOK_BINS[column]
+    edges = [edge for edge in bins if np.isfinite(edge)]
+    values = pd.concat([listings[source].astype('float64'),
+                        pd.Series(edges + [edge + 0.5 for edge in edges] + [bins[0] - 1, np.inf, np.nan])],
+                       ignore_index=True)
+    actual = transform.label_column(pd.DataFrame({source: values}), column)
+    pd.testing.assert_series_equal(actual, pd.cut(values, bins=bins, labels=labels), check_names=False)
+    # Left edges and values outside the bins stay unlabelled, as in the notebook
+    assert pd.isna(actual.iloc[len(listings)])
+
+
+def test_id_downcast_keeps_values(listings):
+    df = transform.standardize(listings)
+    for col in transform.ID_COLUMNS:
+        assert pd.api.types.is_integer_dtype(df[col])
+        # The notebook stored IDs as strings: same digits, no overflow
+        assert df[col].astype(str).tolist() == listings[col].astype(str).tolist()
+    assert df['id'].dtype == np.int64 and df['host_id'].dtype == np.int32
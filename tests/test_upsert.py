@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl import upsert
+from etl.chunked import extract
+from etl.quality import profile_csv
+from etl.storage import file_digest
+from etl.upsert import INDEX_FILE, ListingStore
+
+INCREMENTAL = 'data/incremental_data.csv'
+
+
+@pytest.fixture
+def files(tmp_path):
+    df = pd.read_csv(INCREMENTAL).drop_duplicates('id', keep='last').reset_index(drop=True)
+    raw, incremental = str(tmp_path / 'raw.csv'), str(tmp_path / 'incremental.csv')
+    df.iloc[:1500].to_csv(raw, index=False)
+    df.iloc[1200:].to_csv(incremental, index=False)
+    return df, raw, incremental, str(tmp_path / 'validated.csv'), str(tmp_path / 'store')
+
+
+def test_extract_reloads_edited_raw_file(files):
+    df, raw, incremental, output, store = files
+    first = extract(raw, incremental, output, store, chunk_rows=700)
+    assert first['raw_reloaded'] and first['rows'] == len(df)
+    again = extract(raw, incremental, output, store, chunk_rows=700)
+    assert not again['raw_reloaded'] and (again['inserted'], again['updated']) == (0, 0)
+
+    # Drop a listing and change a price in the raw file only
+    edited = df.iloc[1:1500].copy()
+    edited.loc[10, 'price'] = 12_345
+    edited.to_csv(raw, index=False)
+    result = extract(raw, incremental, output, store, chunk_rows=700)
+    assert result['raw_reloaded'] and result['rows'] == len(df) - 1
+    validated = pd.read_csv(output).set_index('id')
+    assert df['id'].iloc[0] not in validated.index
+    assert validated.loc[df['id'].iloc[10], 'price'] == 12_345
+
+
+def test_upserts_write_index_deltas(files, monkeypatch):
+    df, *_, store = files
+    monkeypatch.setattr(upsert, 'INDEX_DELTAS', 3)
+    listings = ListingStore(store)
+    for start in range(0, 500, 100):
+        # Overlapping batches with new prices: 50 updates each after the first
+        listings.upsert(df.iloc[start:start + 150].assign(price=lambda batch: batch['price'] + start))
+    # Five batches: the fourth folded the deltas into the full index
+    assert listings.index_deltas() == [4] and os.path.exists(os.path.join(store, INDEX_FILE))
+    reloaded = ListingStore(store)
+    pd.testing.assert_frame_equal(reloaded.index.sort_index(), listings.index.sort_index())
+    assert len(reloaded) == 550 and reloaded.index.loc[df['id'].iloc[120], 'segment'] == 1
+
+    # A delta a crash left behind after folding is skipped
+    pd.DataFrame({'id': [df['id'].iloc[0]], 'row_hash': np.uint64(1), 'segment': np.int32(0)}).to_parquet(
+        os.path.join(store, 'index-00002.parquet'), index=False)
+    assert ListingStore(store).index.loc[df['id'].iloc[0], 'segment'] == 0
+    assert ListingStore(store).index.loc[df['id'].iloc[0], 'row_hash'] != 1
+
+
+def test_unchanged_raw_file_is_not_hashed(files, monkeypatch):
+    df, raw, incremental, _, store = files
+    extract(raw, incremental, None, store, chunk_rows=700)
+    hashed = []
+    monkeypatch.setattr(upsert, 'file_digest', lambda path: hashed.append(path) or file_digest(path))
+    assert not extract(raw, incremental, None, store, chunk_rows=700)['raw_reloaded'] and hashed == []
+
+    # Rewritten with the same content: hashed once, not reloaded, then trusted again
+    os.utime(raw, ns=(0, 0))
+    assert not extract(raw, incremental, None, store, chunk_rows=700)['raw_reloaded'] and hashed == [raw]
+    assert not extract(raw, incremental, None, store, chunk_rows=700)['raw_reloaded'] and hashed == [raw]
+
+
+def test_upsert_counts_match_pandas(files):
+    df, *_, store = files
+    listings = ListingStore(store)
+    assert listings.upsert(df.iloc[:1000]) == {'inserted': 1000, 'updated': 0, 'unchanged': 0, 'segment': 0}
+
+    batch = df.iloc[800:1300].copy()
+    batch.loc[batch.index[::7], 'price'] += 1
+    batch.loc[batch.index[::11], 'last_review'] = None
+    batch = pd.concat([batch, batch.iloc[:5].assign(number_of_reviews=-1)])
+    result = listings.upsert(batch)
+
+    # Last row per id wins; an id is updated when any of its values differ
+    latest = batch.drop_duplicates('id', keep='last').set_index('id')
+    known = latest.index.isin(df['id'].iloc[:1000])
+    before = df.set_index('id').reindex(latest.index[known])
+    changed = ~((before == latest[known]) | (before.isna() & latest[known].isna())).all(axis=1)
+    assert result == {'inserted': int((~known).sum()), 'updated': int(changed.sum()),
+                      'unchanged': int((~changed).sum()), 'segment': 1}
+
+    stored = listings.read().set_index('id').sort_index()
+    expected = pd.concat([df.iloc[:1000].set_index('id').drop(latest.index, errors='ignore'), latest]).sort_index()
+    pd.testing.assert_frame_equal(stored, expected, check_dtype=False)
+    assert listings.upsert(latest.reset_index())['unchanged'] == len(latest)
+
+
+def test_existing_keys_leave_out_the_batch(files):
+    df, raw, incremental, output, store = files
+    raw_ids = np.sort(df['id'].iloc[:1500].to_numpy())
+    for run in range(2):
+        extract(raw, incremental, output, store, chunk_rows=700)
+        listings = ListingStore(store)
+        # Reruns find the same overlap: the store before the batch is the raw file
+        assert np.array_equal(np.sort(listings.existing_keys(incremental)), raw_ids)
+        report = profile_csv(incremental, chunk_rows=500).report(existing_keys=listings.existing_keys(incremental))
+        assert report['overlap']['overlapping_keys'] == 300
+
+    # Rows the batch updated keep their key; another file's listings count as existing
+    changed = df.iloc[1200:].assign(price=df['price'].iloc[1200:] + 1)
+    changed.to_csv(incremental, index=False)
+    extract(raw, incremental, output, store, chunk_rows=700)
+    listings = ListingStore(store)
+    other = df.iloc[:20].assign(id=df['id'].max() + np.arange(1, 21))
+    listings.upsert(other, source=os.path.join(os.path.dirname(store), 'other.csv'))
+    expected = np.sort(np.concatenate([raw_ids, other['id'].to_numpy()]))
+    assert np.array_equal(np.sort(listings.existing_keys(incremental)), expected)
+    assert len(listings.existing_keys()) == len(df) + 20
+
+    listings.compact()
+    assert len(ListingStore(store).existing_keys(incremental)) == len(df) + 20
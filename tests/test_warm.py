@@ -0,0 +1,81 @@
+import pickle
+import shutil
+import time
+
+import pytest
+
+from dashboard import warm
+from dashboard.refresh import LiveDataset
+from dashboard.warm import read_warm, write_warm
+from etl.storage import file_digest
+
+TRANSFORMED = 'transformed/transformed_incremental.csv'
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    """LiveDataset over a copy of the transformed CSV, with its warm snapshot path"""
+    csv_path = str(tmp_path / 'listings.csv')
+    shutil.copy(TRANSFORMED, csv_path)
+    warm_path = str(tmp_path / 'warm.pickle')
+    return LiveDataset(snapshot_path=str(tmp_path / 'missing.parquet'), csv_path=csv_path, warm_path=warm_path)
+
+
+def _wait_for_warm(digest, path, timeout=30):
+    """The snapshot written in the background after a cold load"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        found = read_warm(digest, path)
+        if found is not None:
+            return found
+        time.sleep(0.05)
+    return None
+
+
+def test_matching_snapshot_is_used(dataset):
+    cold = dataset._load_initial()
+    assert cold.change['source'] == 'listings.csv'
+    assert _wait_for_warm(cold.digest, dataset.warm_path) is not None
+
+    version = LiveDataset(dataset.snapshot_path, dataset.csv_path, warm_path=dataset.warm_path)._load_initial()
+    assert version.change['source'] == 'warm snapshot'
+    assert version.df.equals(cold.df)
+
+
+def _damage(damage, dataset, version, monkeypatch):
+    """Replace the warm snapshot with one read_warm must reject"""
+    digest = file_digest(dataset.csv_path)
+    if damage == 'digest':
+        write_warm(version.df, 'stale digest', version.filter_index, dataset.warm_path)
+    elif damage == 'format':
+        monkeypatch.setattr(warm, 'FORMAT', warm.FORMAT - 1)
+        write_warm(version.df, digest, version.filter_index, dataset.warm_path)
+        monkeypatch.undo()
+    elif damage == 'truncated':
+        write_warm(version.df, digest, version.filter_index, dataset.warm_path)
+        with open(dataset.warm_path, 'rb') as f:
+            data = f.read()
+        with open(dataset.warm_path, 'wb') as f:
+            f.write(data[:len(data) // 2])
+    else:
+        with open(dataset.warm_path, 'wb') as f:
+            f.write(b'not a pickle')
+
+
+@pytest.mark.parametrize('damage', ['digest', 'format', 'truncated', 'garbage'])
+def test_unusable_snapshot_is_rebuilt(dataset, monkeypatch, damage):
+    cold = dataset._load_initial()
+    digest = cold.digest
+    assert _wait_for_warm(digest, dataset.warm_path) is not None
+
+    _damage(damage, dataset, cold, monkeypatch)
+    assert read_warm(digest, dataset.warm_path) is None
+
+    # Rejected: loaded cold from the data file, and a valid snapshot written again
+    version = LiveDataset(dataset.snapshot_path, dataset.csv_path, warm_path=dataset.warm_path)._load_initial()
+    assert version.change['source'] == 'listings.csv'
+    assert version.df.equals(cold.df)
+    rebuilt = _wait_for_warm(digest, dataset.warm_path)
+    assert rebuilt is not None and rebuilt[0].equals(cold.df)
+    with open(dataset.warm_path, 'rb') as f:
+        assert pickle.load(f)['format'] == warm.FORMAT == 3